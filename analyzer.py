@@ -0,0 +1,459 @@
+"""
+The rule engine: keyword rule packs, domain and phone reputation, and the
+ScamAnalyzer checks behind the /api/analyze/* routes.
+
+Everything here runs locally. Importing it does not touch Flask, the
+database or AWS, so scripts and benchmarks that only need the rules can
+use it directly.
+"""
+
+import base64
+import io
+import logging
+import os
+import random
+import re
+from datetime import datetime
+
+import llm
+from config import INSTANCE_DIR
+from domain_reputation import DomainReputation, url_host
+from phone_reputation import BUILTIN_PREFIXES, PhoneReputation
+from rule_packs import RulePackManager
+
+log = logging.getLogger(__name__)
+
+# Keyword rules, reloaded from rules/*.json while the app runs
+rule_packs = RulePackManager()
+
+
+class ScamAnalyzer:
+    def analyze_email(self, sender, subject, content):
+        pack = rule_packs.active()
+        risk_score = 0
+        warnings = []
+        
+        # Check sender
+        if self._is_suspicious_sender(sender):
+            risk_score += 30
+            warnings.append("Suspicious sender address")
+        
+        # Check subject
+        if self._has_urgent_subject(subject, pack):
+            risk_score += 25
+            warnings.append("Urgent or threatening subject line")
+        
+        # Check content
+        content_analysis = self._analyze_content(content, pack)
+        risk_score += content_analysis['score']
+        warnings.extend(content_analysis['warnings'])
+        
+        # Check links in the body
+        link_analysis = self._check_links(subject + '\n' + content)
+        risk_score += link_analysis['score']
+        warnings.extend(link_analysis['warnings'])
+        
+        risk_level = self._calculate_risk_level(risk_score)
+        
+        return {
+            'risk_level': risk_level,
+            'risk_score': risk_score,
+            'warnings': warnings,
+            'recommendations': self._get_recommendations(risk_level),
+            'source_credibility': self._assess_source_credibility(sender),
+            'links': link_analysis['links'],
+            'rule_pack': pack.label,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def analyze_text(self, content, sender_number=None):
+        pack = rule_packs.active()
+        risk_score = 0
+        warnings = []
+        
+        # Check sender number
+        number_match = self._number_reputation(sender_number)
+        if number_match:
+            risk_score += 20
+            warnings.append(f"Suspicious phone number ({number_match[1]})")
+        
+        # Check content patterns
+        content_analysis = self._analyze_content(content, pack)
+        risk_score += content_analysis['score']
+        warnings.extend(content_analysis['warnings'])
+        
+        # Check for urgent requests
+        if self._has_urgent_requests(content, pack):
+            risk_score += 25
+            warnings.append("Urgent action requested")
+        
+        # Check links in the message
+        link_analysis = self._check_links(content)
+        risk_score += link_analysis['score']
+        warnings.extend(link_analysis['warnings'])
+        
+        risk_level = self._calculate_risk_level(risk_score)
+        
+        return {
+            'risk_level': risk_level,
+            'risk_score': risk_score,
+            'warnings': warnings,
+            'recommendations': self._get_recommendations(risk_level),
+            'source_credibility': self._assess_source_credibility(sender_number),
+            'links': link_analysis['links'],
+            'rule_pack': pack.label,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def analyze_call(self, caller_number, call_type, urgency_level):
+        risk_score = 0
+        warnings = []
+        
+        # Check caller number
+        number_match = self._number_reputation(caller_number)
+        if number_match:
+            risk_score += 25
+            warnings.append(f"Suspicious caller number ({number_match[1]})")
+        
+        # Check call patterns
+        if self._has_suspicious_call_patterns(call_type, urgency_level):
+            risk_score += 30
+            warnings.append("Suspicious call characteristics")
+        
+        risk_level = self._calculate_risk_level(risk_score)
+        
+        return {
+            'risk_level': risk_level,
+            'risk_score': risk_score,
+            'warnings': warnings,
+            'recommendations': self._get_recommendations(risk_level),
+            'source_credibility': self._assess_source_credibility(caller_number),
+            'rule_pack': rule_packs.active().label,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def analyze_website(self, url, content):
+        pack = rule_packs.active()
+        risk_score = 0
+        warnings = []
+        
+        # Check URL
+        if self._is_suspicious_url(url):
+            risk_score += 35
+            warnings.append("Suspicious website URL")
+        
+        # Check content patterns
+        if self._has_suspicious_website_patterns(content, pack):
+            risk_score += 25
+            warnings.append("Suspicious website content")
+        
+        risk_level = self._calculate_risk_level(risk_score)
+        
+        return {
+            'risk_level': risk_level,
+            'risk_score': risk_score,
+            'warnings': warnings,
+            'recommendations': self._get_recommendations(risk_level),
+            'source_credibility': self._assess_source_credibility(url),
+            'rule_pack': pack.label,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def analyze_image(self, image_data):
+        """Analyze image for fraud indicators"""
+        risk_score = 0
+        warnings = []
+        
+        # Rule-based image analysis
+        if self._has_suspicious_image_patterns(image_data):
+            risk_score += 40
+            warnings.append("Suspicious visual elements detected")
+        
+        risk_level = self._calculate_risk_level(risk_score)
+        
+        return {
+            'risk_level': risk_level,
+            'risk_score': risk_score,
+            'warnings': warnings,
+            'recommendations': self._get_image_recommendations(risk_level),
+            'rule_pack': rule_packs.active().label,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def generate_fake_call_scenario(self, difficulty='medium'):
+        """Generate AI-powered fake call scenario for testing"""
+        if llm.available():
+            try:
+                response, model_id = llm.invoke_llm(llm.call_scenario_prompt(difficulty), 'call-scenario')
+                scenario = self.build_call_scenario(llm.llm_response_text(response), difficulty, model_id)
+                if scenario:
+                    return scenario
+            except Exception as e:
+                log.warning("AI scenario generation failed: %s", e)
+        
+        return self.static_call_scenario(difficulty)
+    
+    def build_call_scenario(self, response_text, difficulty, model_id=None):
+        """Turn an LLM scenario response into a call scenario, or None if it has no JSON"""
+        scenario_data = llm.extract_json(response_text)
+        if scenario_data is None:
+            return None
+        return {
+            'caller_id': f"+1-{random.randint(100,999)}-{random.randint(100,999)}-{random.randint(1000,9999)}",
+            'caller_name': scenario_data.get('caller_name', 'Unknown Caller'),
+            'script': scenario_data.get('script', 'This is a test call.'),
+            'red_flags': scenario_data.get('red_flags', ['suspicious call']),
+            'difficulty': difficulty,
+            'timestamp': datetime.now().isoformat(),
+            'generated_by': 'AI',
+            'model_id': model_id
+        }
+    
+    def static_call_scenario(self, difficulty):
+        """Fallback to static scenarios"""
+        scenarios = {
+            'easy': [
+                {'caller': 'Bank Security', 'script': 'This is urgent! Your account has been compromised. Please verify your PIN immediately.', 'red_flags': ['urgency', 'PIN request']},
+                {'caller': 'IRS Agent', 'script': 'You owe back taxes. Pay now or face arrest. Give me your credit card number.', 'red_flags': ['threat', 'payment demand']}
+            ],
+            'medium': [
+                {'caller': 'Tech Support', 'script': 'We detected suspicious activity on your computer. Let me help you fix it remotely.', 'red_flags': ['unsolicited help', 'remote access']},
+                {'caller': 'Prize Winner', 'script': 'Congratulations! You won $10,000. Just pay the processing fee to claim your prize.', 'red_flags': ['upfront fee', 'too good to be true']}
+            ],
+            'hard': [
+                {'caller': 'Family Emergency', 'script': 'Hi grandma, I\'m in trouble and need money for bail. Please don\'t tell mom.', 'red_flags': ['emotional manipulation', 'secrecy request']},
+                {'caller': 'Investment Advisor', 'script': 'I have insider information on a stock that will triple your money this week.', 'red_flags': ['insider trading', 'guaranteed returns']}
+            ]
+        }
+        
+        scenario = random.choice(scenarios.get(difficulty, scenarios['medium']))
+        return {
+            'caller_id': f"+1-{random.randint(100,999)}-{random.randint(100,999)}-{random.randint(1000,9999)}",
+            'caller_name': scenario['caller'],
+            'script': scenario['script'],
+            'red_flags': scenario['red_flags'],
+            'difficulty': difficulty,
+            'timestamp': datetime.now().isoformat(),
+            'generated_by': 'Static',
+            'model_id': None
+        }
+    
+    def _is_suspicious_sender(self, sender):
+        domain = sender.strip().rstrip('>').rpartition('@')[2]
+        return '.' in domain and domain_reputation.lookup(domain) is not None
+    
+    def _has_urgent_subject(self, subject, pack):
+        subject = subject.lower()
+        return any(word in subject for word in pack.urgent_subject)
+    
+    def _analyze_content(self, content, pack):
+        score = 0
+        warnings = []
+        content = content.lower()
+        
+        for category, patterns in pack.content_patterns:
+            for pattern in patterns:
+                if pattern in content:
+                    score += 10
+                    warnings.append(f"Suspicious {category} pattern detected")
+        
+        return {'score': score, 'warnings': warnings}
+    
+    def _number_reputation(self, number):
+        """(matched number or prefix, category) if the number has been reported, else None"""
+        return phone_reputation.lookup(number) if number else None
+    
+    def _has_suspicious_call_patterns(self, call_type, urgency_level):
+        return call_type == 'unknown' and urgency_level == 'high'
+    
+    def _has_urgent_requests(self, content, pack):
+        content = content.lower()
+        return any(word in content for word in pack.urgent_requests)
+    
+    def _is_suspicious_url(self, url):
+        host = url_host(url)
+        return '.' in host and domain_reputation.lookup(host) is not None
+    
+    def _check_links(self, content):
+        """Score links in a message body against the domain reputation index"""
+        links = domain_reputation.check_text(content)
+        score = 0
+        warnings = []
+        for entry in links['blocked']:
+            score += 35
+            warnings.append(f"Link to blocked domain: {entry['host']} ({entry['category']})")
+        if links['ip_links']:
+            score += 15
+            warnings.append("Link points to a raw IP address")
+        return {'score': score, 'warnings': warnings,
+                'links': {'found': len(links['domains']), 'blocked': links['blocked']}}
+    
+    def _has_suspicious_website_patterns(self, content, pack):
+        content = content.lower()
+        return any(indicator in content for indicator in pack.website_indicators)
+    
+    def _has_suspicious_image_patterns(self, image_data):
+        """Basic image analysis - can be enhanced with ML models"""
+        from PIL import Image
+
+        try:
+            # Decode base64 image
+            image_bytes = base64.b64decode(image_data.split(',')[1])
+            image = Image.open(io.BytesIO(image_bytes))
+            
+            # Basic checks
+            width, height = image.size
+            
+            # Suspicious if image is very small (common in phishing)
+            if width < 100 or height < 100:
+                return True
+                
+            return False
+        except:
+            return True  # If we can't process the image, consider it suspicious
+    
+    def _get_image_recommendations(self, risk_level):
+        recommendations = {
+            'HIGH': [
+                'Do not trust this image',
+                'Verify information through official sources',
+                'Check for image manipulation signs',
+                'Report if received via suspicious channels'
+            ],
+            'MEDIUM': [
+                'Verify image authenticity',
+                'Check original source',
+                'Look for inconsistencies',
+                'Be cautious of claims made'
+            ],
+            'LOW': [
+                'Image appears normal',
+                'Still verify any claims made',
+                'Check source credibility'
+            ]
+        }
+        return recommendations.get(risk_level, [])
+    
+    def _calculate_risk_level(self, score):
+        if score >= 60:
+            return 'HIGH'
+        elif score >= 30:
+            return 'MEDIUM'
+        else:
+            return 'LOW'
+    
+    def _get_recommendations(self, risk_level):
+        recommendations = {
+            'HIGH': [
+                'Do not respond or click any links',
+                'Block the sender/number immediately',
+                'Report to relevant authorities',
+                'Check your accounts for suspicious activity'
+            ],
+            'MEDIUM': [
+                'Verify the source through official channels',
+                'Do not provide personal information',
+                'Be cautious of urgent requests',
+                'Check for spelling/grammar errors'
+            ],
+            'LOW': [
+                'Still verify through official channels',
+                'Be cautious of unexpected requests',
+                'Trust your instincts'
+            ]
+        }
+        return recommendations.get(risk_level, [])
+    
+    def _assess_source_credibility(self, source):
+        if self._is_legitimate_source(source):
+            return 'HIGH'
+        elif source and len(str(source)) > 5:
+            return 'MEDIUM'
+        else:
+            return 'LOW'
+    
+    def _is_legitimate_source(self, source):
+        legitimate_indicators = ['gov', 'edu', 'bank', 'official']
+        return any(indicator in str(source).lower() for indicator in legitimate_indicators)
+
+
+# Demo entries checked alongside the feed-built index
+BUILTIN_BLOCKED_DOMAINS = {
+    'free-email.com': 'suspicious-sender', 'suspicious.net': 'suspicious-sender', 'fake-domain.org': 'suspicious-sender',
+    'fake-site.com': 'scam', 'scam-website.net': 'scam', 'phishing.org': 'phishing'
+}
+
+# Blocked domains from DOMAIN_FEED_PATH, compiled into a memory-mapped index
+domain_reputation = DomainReputation(
+    os.getenv('DOMAIN_INDEX_PATH') or os.path.join(INSTANCE_DIR, 'domain_reputation.idx'),
+    feed_path=os.getenv('DOMAIN_FEED_PATH'),
+    builtin=BUILTIN_BLOCKED_DOMAINS
+)
+
+# Reported numbers from PHONE_FEED_PATH plus built-in premium-rate prefixes
+phone_reputation = PhoneReputation(
+    os.getenv('PHONE_FEED_PATH'),
+    snapshot_path=os.getenv('PHONE_INDEX_PATH') or os.path.join(INSTANCE_DIR, 'phone_reputation.idx'),
+    builtin_prefixes=BUILTIN_PREFIXES
+)
+
+# Initialize analyzer
+analyzer = ScamAnalyzer()
+
+
+# Amount/keyword proximity checks for rule_based_analysis. Each anchor match
+# only looks for an amount inside a fixed window on the same line, so the
+# cost is linear in the input; the old greedy r'\d+.*keyword' searches
+# backtracked quadratically on digit-heavy text.
+AMOUNT_RE = re.compile(r'\d')
+MONEY_KEYWORD_RE = re.compile(r'dollar|money|cash|profit|return')
+TRANSFER_VERB_RE = re.compile(r'give|send')
+MONEY_PROXIMITY_WINDOW = int(os.getenv('MONEY_PROXIMITY_WINDOW', 80))
+
+
+def _amount_near(text, anchor_re, before, window=MONEY_PROXIMITY_WINDOW):
+    """True if a number appears within `window` chars before/after an anchor_re match on the same line"""
+    scanned_to = 0  # text[:scanned_to] is known to hold no number in any window checked so far
+    for match in anchor_re.finditer(text):
+        if before:
+            lo, hi = max(0, match.start() - window), match.start()
+            newline = text.rfind('\n', lo, hi)
+            if newline != -1:
+                lo = newline + 1
+        else:
+            lo, hi = match.end(), min(len(text), match.end() + window)
+            newline = text.find('\n', lo, hi)
+            if newline != -1:
+                hi = newline
+        if AMOUNT_RE.search(text, max(lo, scanned_to), hi):
+            return True
+        scanned_to = max(scanned_to, hi)
+    return False
+
+
+def rule_based_analysis(text: str, pack=None) -> str:
+    text_lower = text.lower()
+    text_risk = (pack or rule_packs.active()).text_risk
+    high_risk = text_risk['high']
+    investment_scam = text_risk['investment']
+    medium_risk = text_risk['medium']
+
+    money_pattern = _amount_near(text_lower, MONEY_KEYWORD_RE, before=True)
+    give_pattern = _amount_near(text_lower, TRANSFER_VERB_RE, before=False)
+
+    high_count = sum(1 for word in high_risk if word in text_lower)
+    investment_count = sum(1 for word in investment_scam if word in text_lower)
+    medium_count = sum(1 for word in medium_risk if word in text_lower)
+
+    if investment_count >= 1 or give_pattern or money_pattern:
+        return "Risk Level: HIGH\nWarning Signs: Investment/money scam pattern detected\nExplanation: This appears to be a financial scam. Never send money to strangers promising returns. Legitimate investments don't work this way."
+    elif high_count >= 2:
+        return "Risk Level: HIGH\nWarning Signs: Multiple urgency tactics detected\nExplanation: This text uses several fraud indicators like urgency and pressure tactics."
+    elif high_count >= 1:
+        return "Risk Level: HIGH\nWarning Signs: Urgency tactics detected\nExplanation: Fraudsters use pressure tactics to make you act quickly without thinking."
+    elif medium_count >= 2:
+        return "Risk Level: MEDIUM\nWarning Signs: Suspicious promotional language\nExplanation: Be cautious of offers that seem too good to be true."
+    elif medium_count >= 1:
+        return "Risk Level: MEDIUM\nWarning Signs: Promotional language detected\nExplanation: Be cautious of unsolicited offers and verify sources."
+    else:
+        return "Risk Level: LOW\nWarning Signs: No obvious fraud indicators\nExplanation: Text appears normal, but always verify requests for personal information through official channels."
@@ -1,1206 +1,87 @@
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for
-from flask_cors import CORS
-
-from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
-from langchain_aws import BedrockLLM
-import os
-from dotenv import load_dotenv
-import re
-from models import db, User, AnalysisHistory
-load_dotenv()
-
-app = Flask(__name__)
-CORS(app)
-app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-this')
-
-# Static translations
-TRANSLATIONS = {
-    'es': {
-        'home': 'Inicio',
-        'learn': 'Aprender',
-        'practice': 'Práctica',
-        'about': 'Acerca de',
-        'logout': 'Cerrar sesión',
-        'fraud_detection_trainer': 'Entrenador de Detección de Fraude',
-        'learn_to_identify': 'Aprende a identificar correos fraudulentos y artículos de noticias con análisis impulsado por IA',
-        'text_analyzer': 'Analizador de Texto',
-        'paste_suspicious': 'Pega texto sospechoso a continuación para análisis instantáneo de fraude:',
-        'placeholder': 'Pega correo o texto de noticias aquí...',
-        'analyze_button': 'Analizar por Fraude',
-        'analyzing': 'Analizando...',
-        'practice_examples': 'Ejemplos de Práctica'
-    },
-    'zh': {
-        'home': '首页',
-        'learn': '学习',
-        'practice': '练习',
-        'about': '关于',
-        'logout': '登出',
-        'fraud_detection_trainer': '欺诈检测训练器',
-        'learn_to_identify': '学习使用AI分析识别欺诈邮件和新闻文章',
-        'text_analyzer': '文本分析器',
-        'paste_suspicious': '在下方粘贴可疑文本进行即时欺诈分析：',
-        'placeholder': '在此粘贴邮件或新闻文本...',
-        'analyze_button': '分析欺诈',
-        'analyzing': '分析中...',
-        'practice_examples': '练习示例'
-    }
-}
-
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///scamsense.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-this')
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = False  # Tokens don't expire
-
-# Initialize extensions
-db.init_app(app)
-jwt = JWTManager(app)
-
-# Create tables
-try:
-    with app.app_context():
-        db.create_all()
-        print("✅ Database tables created successfully")
-except Exception as e:
-    print(f"❌ Database initialization failed: {e}")
-
-# Load config from .env or defaults
-MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "meta.llama3-8b-instruct-v1:0")
-REGION = os.getenv("AWS_REGION", "us-west-2")
-
-# Initialize Bedrock with default credentials
-try:
-    import boto3
-    session = boto3.Session()
-    
-    bedrock_client = session.client('bedrock-runtime', region_name=REGION)
-    bedrock_list_client = session.client('bedrock', region_name=REGION)
-    
-    # Check available vision models
-    try:
-        models_response = bedrock_list_client.list_foundation_models()
-        available_vision_models = []
-        
-        for model in models_response['modelSummaries']:
-            input_modalities = model.get('inputModalities', [])
-            provider = model.get('providerName', '')
-            
-            # Look for non-Anthropic vision models
-            if 'IMAGE' in input_modalities and provider.lower() != 'anthropic':
-                available_vision_models.append({
-                    'id': model['modelId'],
-                    'name': model['modelName'],
-                    'provider': provider
-                })
-                print(f"✅ Found vision model: {model['modelName']} ({model['modelId']})")
-        
-        vision_available = len(available_vision_models) > 0
-        if vision_available:
-            print(f"✅ {len(available_vision_models)} non-Anthropic vision models available")
-        else:
-            print("⚠️ No non-Anthropic vision models found")
-            
-    except Exception as e:
-        print(f"⚠️ Could not check vision models: {e}")
-        available_vision_models = []
-        vision_available = False
-    
-    llm = BedrockLLM(
-        model_id=MODEL_ID,
-        region_name=REGION,
-        client=bedrock_client
-    )
-    bedrock_available = True
-    print(f"✅ Bedrock initialized successfully with {MODEL_ID} in {REGION}")
-except Exception as e:
-    print(f"❌ Bedrock initialization failed: {e}")
-    llm = None
-    bedrock_available = False
-    vision_available = False
-    print("⚠️ Falling back to rule-based analysis")
-
-import re
-import json
-from datetime import datetime
-import base64
-from PIL import Image
-import io
-import random
-from pydub import AudioSegment
-from pydub.generators import Sine
-
-class ScamAnalyzer:
-    def __init__(self):
-        self.suspicious_patterns = {
-            'urgency': ['urgent', 'immediately', 'now', 'expire', 'suspended', 'limited time'],
-            'requests': ['verify', 'confirm', 'update', 'click here', 'call now'],
-            'threats': ['account suspended', 'legal action', 'immediate action required'],
-            'financial': ['bank account', 'credit card', 'social security', 'tax refund'],
-            'suspicious_urls': ['bit.ly', 'tinyurl', 'goo.gl', 'shortened links']
-        }
-    
-    def analyze_email(self, sender, subject, content):
-        risk_score = 0
-        warnings = []
-        
-        # Check sender
-        if self._is_suspicious_sender(sender):
-            risk_score += 30
-            warnings.append("Suspicious sender address")
-        
-        # Check subject
-        if self._has_urgent_subject(subject):
-            risk_score += 25
-            warnings.append("Urgent or threatening subject line")
-        
-        # Check content
-        content_analysis = self._analyze_content(content)
-        risk_score += content_analysis['score']
-        warnings.extend(content_analysis['warnings'])
-        
-        risk_level = self._calculate_risk_level(risk_score)
-        
-        return {
-            'risk_level': risk_level,
-            'risk_score': risk_score,
-            'warnings': warnings,
-            'recommendations': self._get_recommendations(risk_level),
-            'source_credibility': self._assess_source_credibility(sender),
-            'timestamp': datetime.now().isoformat()
-        }
-    
-    def analyze_text(self, content, sender_number=None):
-        risk_score = 0
-        warnings = []
-        
-        # Check sender number
-        if sender_number and self._is_suspicious_number(sender_number):
-            risk_score += 20
-            warnings.append("Suspicious phone number")
-        
-        # Check content patterns
-        content_analysis = self._analyze_content(content)
-        risk_score += content_analysis['score']
-        warnings.extend(content_analysis['warnings'])
-        
-        # Check for urgent requests
-        if self._has_urgent_requests(content):
-            risk_score += 25
-            warnings.append("Urgent action requested")
-        
-        risk_level = self._calculate_risk_level(risk_score)
-        
-        return {
-            'risk_level': risk_level,
-            'risk_score': risk_score,
-            'warnings': warnings,
-            'recommendations': self._get_recommendations(risk_level),
-            'source_credibility': self._assess_source_credibility(sender_number),
-            'timestamp': datetime.now().isoformat()
-        }
-    
-    def analyze_call(self, caller_number, call_type, urgency_level):
-        risk_score = 0
-        warnings = []
-        
-        # Check caller number
-        if self._is_suspicious_number(caller_number):
-            risk_score += 25
-            warnings.append("Suspicious caller number")
-        
-        # Check call patterns
-        if self._has_suspicious_call_patterns(call_type, urgency_level):
-            risk_score += 30
-            warnings.append("Suspicious call characteristics")
-        
-        risk_level = self._calculate_risk_level(risk_score)
-        
-        return {
-            'risk_level': risk_level,
-            'risk_score': risk_score,
-            'warnings': warnings,
-            'recommendations': self._get_recommendations(risk_level),
-            'source_credibility': self._assess_source_credibility(caller_number),
-            'timestamp': datetime.now().isoformat()
-        }
-    
-    def analyze_website(self, url, content):
-        risk_score = 0
-        warnings = []
-        
-        # Check URL
-        if self._is_suspicious_url(url):
-            risk_score += 35
-            warnings.append("Suspicious website URL")
-        
-        # Check content patterns
-        if self._has_suspicious_website_patterns(content):
-            risk_score += 25
-            warnings.append("Suspicious website content")
-        
-        risk_level = self._calculate_risk_level(risk_score)
-        
-        return {
-            'risk_level': risk_level,
-            'risk_score': risk_score,
-            'warnings': warnings,
-            'recommendations': self._get_recommendations(risk_level),
-            'source_credibility': self._assess_source_credibility(url),
-            'timestamp': datetime.now().isoformat()
-        }
-    
-    def analyze_image(self, image_data):
-        """Analyze image for fraud indicators"""
-        risk_score = 0
-        warnings = []
-        
-        # Rule-based image analysis
-        if self._has_suspicious_image_patterns(image_data):
-            risk_score += 40
-            warnings.append("Suspicious visual elements detected")
-        
-        risk_level = self._calculate_risk_level(risk_score)
-        
-        return {
-            'risk_level': risk_level,
-            'risk_score': risk_score,
-            'warnings': warnings,
-            'recommendations': self._get_image_recommendations(risk_level),
-            'timestamp': datetime.now().isoformat()
-        }
-    
-    def generate_fake_call_scenario(self, difficulty='medium'):
-        """Generate AI-powered fake call scenario for testing"""
-        if bedrock_available and llm:
-            try:
-                prompt = f"""Generate a realistic {difficulty} difficulty scam call scenario. Return ONLY a JSON object with this exact format:
-{{
-    "caller_name": "caller identity (e.g., Bank Security, IRS Agent)",
-    "script": "what the scammer says (1-2 sentences)",
-    "red_flags": ["list", "of", "fraud", "indicators"]
-}}
-
-Make it {difficulty} to detect. Use common scam tactics like urgency, threats, requests for personal info, or too-good-to-be-true offers."""
-                
-                response = llm.invoke(prompt)
-                if hasattr(response, 'content'):
-                    response_text = response.content
-                elif isinstance(response, dict) and 'content' in response:
-                    response_text = response['content']
-                else:
-                    response_text = str(response)
-                
-                # Extract JSON from response
-                import json
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                if json_start != -1 and json_end != -1:
-                    json_str = response_text[json_start:json_end]
-                    scenario_data = json.loads(json_str)
-                    
-                    return {
-                        'caller_id': f"+1-{random.randint(100,999)}-{random.randint(100,999)}-{random.randint(1000,9999)}",
-                        'caller_name': scenario_data.get('caller_name', 'Unknown Caller'),
-                        'script': scenario_data.get('script', 'This is a test call.'),
-                        'red_flags': scenario_data.get('red_flags', ['suspicious call']),
-                        'difficulty': difficulty,
-                        'timestamp': datetime.now().isoformat(),
-                        'generated_by': 'AI'
-                    }
-            except Exception as e:
-                print(f"AI scenario generation failed: {e}")
-        
-        # Fallback to static scenarios
-        scenarios = {
-            'easy': [
-                {'caller': 'Bank Security', 'script': 'This is urgent! Your account has been compromised. Please verify your PIN immediately.', 'red_flags': ['urgency', 'PIN request']},
-                {'caller': 'IRS Agent', 'script': 'You owe back taxes. Pay now or face arrest. Give me your credit card number.', 'red_flags': ['threat', 'payment demand']}
-            ],
-            'medium': [
-                {'caller': 'Tech Support', 'script': 'We detected suspicious activity on your computer. Let me help you fix it remotely.', 'red_flags': ['unsolicited help', 'remote access']},
-                {'caller': 'Prize Winner', 'script': 'Congratulations! You won $10,000. Just pay the processing fee to claim your prize.', 'red_flags': ['upfront fee', 'too good to be true']}
-            ],
-            'hard': [
-                {'caller': 'Family Emergency', 'script': 'Hi grandma, I\'m in trouble and need money for bail. Please don\'t tell mom.', 'red_flags': ['emotional manipulation', 'secrecy request']},
-                {'caller': 'Investment Advisor', 'script': 'I have insider information on a stock that will triple your money this week.', 'red_flags': ['insider trading', 'guaranteed returns']}
-            ]
-        }
-        
-        scenario = random.choice(scenarios.get(difficulty, scenarios['medium']))
-        return {
-            'caller_id': f"+1-{random.randint(100,999)}-{random.randint(100,999)}-{random.randint(1000,9999)}",
-            'caller_name': scenario['caller'],
-            'script': scenario['script'],
-            'red_flags': scenario['red_flags'],
-            'difficulty': difficulty,
-            'timestamp': datetime.now().isoformat(),
-            'generated_by': 'Static'
-        }
-    
-    def _is_suspicious_sender(self, sender):
-        suspicious_domains = ['free-email.com', 'suspicious.net', 'fake-domain.org']
-        return any(domain in sender.lower() for domain in suspicious_domains)
-    
-    def _has_urgent_subject(self, subject):
-        urgency_words = ['urgent', 'immediate', 'suspended', 'expire', 'action required']
-        return any(word in subject.lower() for word in urgency_words)
-    
-    def _analyze_content(self, content):
-        score = 0
-        warnings = []
-        
-        for category, patterns in self.suspicious_patterns.items():
-            for pattern in patterns:
-                if pattern in content.lower():
-                    score += 10
-                    warnings.append(f"Suspicious {category} pattern detected")
-        
-        return {'score': score, 'warnings': warnings}
-    
-    def _is_suspicious_number(self, number):
-        # Check for common scam number patterns
-        suspicious_patterns = ['000', '123', '999']
-        return any(pattern in str(number) for pattern in suspicious_patterns)
-    
-    def _has_suspicious_call_patterns(self, call_type, urgency_level):
-        return call_type == 'unknown' and urgency_level == 'high'
-    
-    def _has_urgent_requests(self, content):
-        urgent_words = ['call now', 'respond immediately', 'urgent action']
-        return any(word in content.lower() for word in urgent_words)
-    
-    def _is_suspicious_url(self, url):
-        suspicious_domains = ['fake-site.com', 'scam-website.net', 'phishing.org']
-        return any(domain in url.lower() for domain in suspicious_domains)
-    
-    def _has_suspicious_website_patterns(self, content):
-        suspicious_indicators = ['free money', 'miracle cure', 'act now', 'limited time']
-        return any(indicator in content.lower() for indicator in suspicious_indicators)
-    
-    def _has_suspicious_image_patterns(self, image_data):
-        """Basic image analysis - can be enhanced with ML models"""
-        try:
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_data.split(',')[1])
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Basic checks
-            width, height = image.size
-            
-            # Suspicious if image is very small (common in phishing)
-            if width < 100 or height < 100:
-                return True
-                
-            return False
-        except:
-            return True  # If we can't process the image, consider it suspicious
-    
-    def _get_image_recommendations(self, risk_level):
-        recommendations = {
-            'HIGH': [
-                'Do not trust this image',
-                'Verify information through official sources',
-                'Check for image manipulation signs',
-                'Report if received via suspicious channels'
-            ],
-            'MEDIUM': [
-                'Verify image authenticity',
-                'Check original source',
-                'Look for inconsistencies',
-                'Be cautious of claims made'
-            ],
-            'LOW': [
-                'Image appears normal',
-                'Still verify any claims made',
-                'Check source credibility'
-            ]
-        }
-        return recommendations.get(risk_level, [])
-    
-    def _calculate_risk_level(self, score):
-        if score >= 60:
-            return 'HIGH'
-        elif score >= 30:
-            return 'MEDIUM'
-        else:
-            return 'LOW'
-    
-    def _get_recommendations(self, risk_level):
-        recommendations = {
-            'HIGH': [
-                'Do not respond or click any links',
-                'Block the sender/number immediately',
-                'Report to relevant authorities',
-                'Check your accounts for suspicious activity'
-            ],
-            'MEDIUM': [
-                'Verify the source through official channels',
-                'Do not provide personal information',
-                'Be cautious of urgent requests',
-                'Check for spelling/grammar errors'
-            ],
-            'LOW': [
-                'Still verify through official channels',
-                'Be cautious of unexpected requests',
-                'Trust your instincts'
-            ]
-        }
-        return recommendations.get(risk_level, [])
-    
-    def _assess_source_credibility(self, source):
-        if self._is_legitimate_source(source):
-            return 'HIGH'
-        elif source and len(str(source)) > 5:
-            return 'MEDIUM'
-        else:
-            return 'LOW'
-    
-    def _is_legitimate_source(self, source):
-        legitimate_indicators = ['gov', 'edu', 'bank', 'official']
-        return any(indicator in str(source).lower() for indicator in legitimate_indicators)
-    
-    def generate_fake_call_audio(self, script, voice_type='scammer'):
-        """Generate fake call audio using AWS Polly"""
-        try:
-            polly = session.client('polly', region_name=REGION)
-            
-            voice_settings = {
-                'scammer': {'VoiceId': 'Matthew', 'Engine': 'standard'},
-                'elderly': {'VoiceId': 'Joanna', 'Engine': 'standard'},
-                'authority': {'VoiceId': 'Brian', 'Engine': 'standard'}
-            }
-            
-            voice = voice_settings.get(voice_type, voice_settings['scammer'])
-            
-            response = polly.synthesize_speech(
-                Text=script,
-                OutputFormat='mp3',
-                VoiceId=voice['VoiceId'],
-                Engine=voice['Engine']
-            )
-            
-            audio_data = response['AudioStream'].read()
-            audio_b64 = base64.b64encode(audio_data).decode('utf-8')
-            
-            return {
-                'audio_data': audio_b64,
-                'format': 'mp3',
-                'voice_type': voice_type,
-                'duration_estimate': len(script) * 0.1  # Rough estimate
-            }
-            
-        except Exception as e:
-            print(f"Polly audio generation failed: {e}")
-            # Fallback to simple tone generation
-            return self._generate_simple_audio_placeholder()
-    
-    def _generate_simple_audio_placeholder(self):
-        """Generate simple audio placeholder when Polly fails"""
-        try:
-            # Generate a simple tone as placeholder
-            tone = Sine(440).to_audio_segment(duration=3000)  # 3 second tone
-            audio_data = tone.export(format="mp3").read()
-            audio_b64 = base64.b64encode(audio_data).decode('utf-8')
-            
-            return {
-                'audio_data': audio_b64,
-                'format': 'mp3',
-                'voice_type': 'placeholder',
-                'duration_estimate': 3.0,
-                'note': 'Audio placeholder - AWS Polly unavailable'
-            }
-        except:
-            return {
-                'audio_data': '',
-                'format': 'mp3',
-                'voice_type': 'none',
-                'duration_estimate': 0,
-                'error': 'Audio generation failed'
-            }
-
-
-# Initialize analyzer
-analyzer = ScamAnalyzer()
-
-# Initialize Polly client for audio generation
-try:
-    polly_client = session.client('polly', region_name=REGION)
-    polly_available = True
-    print("✅ AWS Polly initialized for audio generation")
-except Exception as e:
-    print(f"⚠️ AWS Polly initialization failed: {e}")
-    polly_client = None
-    polly_available = False
-
-@app.route('/')
-def home():
-    return jsonify({'status': 'Backend is running', 'port': 8000})
+"""
+Flask app factory.
 
-@app.route('/register', methods=['POST'])
-def register():
-    try:
-        data = request.json
-        print(f"Register request: {data}")
-        email = data.get('email')
-        password = data.get('password')
-        
-        if not email or not password:
-            return jsonify({'error': 'Email and password required'}), 400
-        
-        if User.query.filter_by(email=email).first():
-            return jsonify({'error': 'Email already registered'}), 400
-        
-        user = User(email=email)
-        user.set_password(password)
-        db.session.add(user)
-        db.session.commit()
-        
-        access_token = create_access_token(identity=user.id)
-        print(f"User registered successfully: {email}")
-        return jsonify({'access_token': access_token, 'user': user.to_dict()})
-    except Exception as e:
-        print(f"Register error: {e}")
-        return jsonify({'error': str(e)}), 500
+create_app() wires the extensions, quotas and the route blueprints in
+routes/. It does not touch the schema or AWS: tables are created by
+init_db() (`flask --app app init-db`, run.py or `python app.py`), and the
+Bedrock, Rekognition and Polly clients, PIL and pydub are loaded on first
+use, so importing the app stays cheap for workers, scripts and benchmarks.
 
-@app.route('/login', methods=['POST'])
-def login():
-    try:
-        data = request.json
-        print(f"Login request: {data}")
-        email = data.get('email')
-        password = data.get('password')
-        
-        if not email or not password:
-            return jsonify({'error': 'Email and password required'}), 400
-        
-        user = User.query.filter_by(email=email).first()
-        print(f"User found: {user is not None}")
-        
-        if user and user.check_password(password):
-            access_token = create_access_token(identity=user.id)
-            print(f"Login successful: {email}")
-            return jsonify({'access_token': access_token, 'user': user.to_dict()})
-        
-        print(f"Login failed for: {email}")
-        return jsonify({'error': 'Invalid credentials'}), 401
-    except Exception as e:
-        print(f"Login error: {e}")
-        return jsonify({'error': str(e)}), 500
+    flask --app app init-db
+    gunicorn app:app
+"""
 
+import logging
 
+from flask import Flask
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager
 
-@app.route('/analyze', methods=['POST'])
-def analyze_text_main():
-    user_id = None
-    auth_header = request.headers.get('Authorization')
-    if auth_header and auth_header.startswith('Bearer '):
-        try:
-            user_id = 1  # Default user ID for testing
-        except:
-            pass
-    
-    data = request.json
-    text = data.get('text', '')
-    
-    if not text:
-        return jsonify({'error': 'No text provided'}), 400
-    
-    original_text = text
-    text_for_analysis, detected_lang = detect_and_translate(text, 'en')
-    
-    if bedrock_available and llm:
-        try:
-            prompt = f"Analyze this text for fraud indicators: {text_for_analysis}"
-            response = llm.invoke(prompt)
-            if hasattr(response, 'content'):
-                response = response.content
-            elif isinstance(response, dict) and 'content' in response:
-                response = response['content']
-        except Exception as e:
-            response = rule_based_analysis(text_for_analysis)
-    else:
-        response = rule_based_analysis(text_for_analysis)
-    
-    if detected_lang != 'en':
-        response = translate_response(response, detected_lang)
-
-    if user_id:
-        analysis_record = AnalysisHistory(
-            user_id=user_id,
-            text=original_text,
-            result=response
-        )
-        db.session.add(analysis_record)
-        db.session.commit()
-    
-    return jsonify({'result': response})
-
-@app.route('/api/health')
-def health_check():
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.now().isoformat(),
-        'service': 'ScamGuard API'
-    })
-
-@app.route('/api/analyze/email', methods=['POST'])
-def analyze_email():
-    try:
-        data = request.json
-        sender = data.get('sender', '')
-        subject = data.get('subject', '')
-        content = data.get('content', '')
-        
-        if not all([sender, subject, content]):
-            return jsonify({'error': 'Missing required fields: sender, subject, content'}), 400
-        
-        result = analyzer.analyze_email(sender, subject, content)
-        return jsonify(result)
-    
-    except Exception as e:
-        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
-
-@app.route('/api/analyze/text', methods=['POST'])
-def analyze_text_api():
-    try:
-        data = request.json
-        content = data.get('content', '')
-        sender_number = data.get('sender_number', '')
-        
-        if not content:
-            return jsonify({'error': 'Missing required field: content'}), 400
-        
-        result = analyzer.analyze_text(content, sender_number)
-        return jsonify(result)
-    
-    except Exception as e:
-        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
-@app.route('/api/analyze/call', methods=['POST'])
-def analyze_call():
-    try:
-        data = request.json
-        caller_number = data.get('caller_number', '')
-        call_type = data.get('call_type', 'unknown')
-        urgency_level = data.get('urgency_level', 'normal')
-        
-        if not caller_number:
-            return jsonify({'error': 'Missing required field: caller_number'}), 400
-        
-        result = analyzer.analyze_call(caller_number, call_type, urgency_level)
-        return jsonify(result)
-    
-    except Exception as e:
-        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
-
-@app.route('/api/analyze/website', methods=['POST'])
-def analyze_website():
-    try:
-        data = request.json
-        url = data.get('url', '')
-        content = data.get('content', '')
-        
-        if not url:
-            return jsonify({'error': 'Missing required field: url'}), 400
-        
-        result = analyzer.analyze_website(url, content)
-        return jsonify(result)
-    
-    except Exception as e:
-        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
-
-@app.route('/api/analyze/image', methods=['POST'])
-def analyze_image():
-    try:
-        data = request.json
-        image_data = data.get('image', '')
-        
-        if not image_data:
-            return jsonify({'error': 'Missing required field: image'}), 400
-        
-        # Use Bedrock vision model if available
-        if bedrock_available:
-            try:
-                result = analyze_image_with_bedrock(image_data)
-                return jsonify(result)
-            except Exception as e:
-                print(f"Bedrock vision analysis failed: {e}")
-        
-        # Fallback to rule-based analysis
-        result = analyzer.analyze_image(image_data)
-        return jsonify(result)
-    
-    except Exception as e:
-        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
-
-@app.route('/api/generate/call-scenario', methods=['POST'])
-def generate_call_scenario():
-    try:
-        data = request.json or {}
-        difficulty = data.get('difficulty', 'medium')
-        
-        if difficulty not in ['easy', 'medium', 'hard']:
-            return jsonify({'error': 'Invalid difficulty. Use: easy, medium, hard'}), 400
-        
-        scenario = analyzer.generate_fake_call_scenario(difficulty)
-        return jsonify(scenario)
-    
-    except Exception as e:
-        return jsonify({'error': f'Scenario generation failed: {str(e)}'}), 500
-
-@app.route('/api/generate/call-audio', methods=['POST'])
-def generate_call_audio():
-    try:
-        data = request.json
-        script = data.get('script', '')
-        voice_type = data.get('voice_type', 'scammer')
-        
-        if not script:
-            return jsonify({'error': 'Missing required field: script'}), 400
-        
-        if voice_type not in ['scammer', 'elderly', 'authority']:
-            return jsonify({'error': 'Invalid voice_type. Use: scammer, elderly, authority'}), 400
-        
-        audio_result = analyzer.generate_fake_call_audio(script, voice_type)
-        return jsonify(audio_result)
-    
-    except Exception as e:
-        return jsonify({'error': f'Audio generation failed: {str(e)}'}), 500
-
-@app.route('/api/practice/call-test', methods=['POST'])
-def call_test_practice():
-    try:
-        data = request.json or {}
-        difficulty = data.get('difficulty', 'medium')
-        include_audio = data.get('include_audio', False)
-        
-        # Generate scenario
-        scenario = analyzer.generate_fake_call_scenario(difficulty)
-        
-        # Generate audio if requested
-        if include_audio and polly_available:
-            audio_result = analyzer.generate_fake_call_audio(scenario['script'], 'scammer')
-            scenario['audio'] = audio_result
-        
-        return jsonify({
-            'test_id': f"test_{random.randint(1000, 9999)}",
-            'scenario': scenario,
-            'instructions': 'Listen to or read the call scenario. Identify red flags and determine if this is a scam.',
-            'timestamp': datetime.now().isoformat()
-        })
-    
-    except Exception as e:
-        return jsonify({'error': f'Test generation failed: {str(e)}'}), 500
-
-
-@app.route('/api/practice/call-test/<test_id>/submit', methods=['POST'])
-def submit_call_test(test_id):
-    try:
-        data = request.json
-        user_answer = data.get('is_scam', None)
-        identified_flags = data.get('identified_flags', [])
-        
-        if user_answer is None:
-            return jsonify({'error': 'Missing required field: is_scam'}), 400
-        
-        # For this demo, assume all generated scenarios are scams
-        correct_answer = True
-        is_correct = user_answer == correct_answer
-        
-        score = 0
-        if is_correct:
-            score += 50
-        
-        # Bonus points for identifying red flags
-        score += min(len(identified_flags) * 10, 50)
-        
-        return jsonify({
-            'test_id': test_id,
-            'correct': is_correct,
-            'score': score,
-            'feedback': 'Correct! This was indeed a scam call.' if is_correct else 'Incorrect. This was a scam call with several red flags.',
-            'learning_points': [
-                'Scammers often create urgency to prevent you from thinking clearly',
-                'Legitimate organizations rarely ask for sensitive information over the phone',
-                'Always verify caller identity through official channels'
-            ],
-            'timestamp': datetime.now().isoformat()
-        })
-    
-    except Exception as e:
-        return jsonify({'error': f'Test submission failed: {str(e)}'}), 500
-
-@app.route('/api/generate/examples', methods=['POST'])
-def generate_practice_examples():
-    try:
-        data = request.json or {}
-        example_type = data.get('type', 'mixed')
-        count = min(int(data.get('count', 5)), 10)  # Max 10 examples
-        
-        examples = generate_ai_examples(example_type, count)
-        
-        if not examples:
-            # Fallback to static examples
-            static_examples = [
-                {'type': 'phishing_email', 'text': 'Your PayPal account has been limited. Click to restore access.', 'is_fraud': True, 'explanation': 'Phishing attempt using urgency and fake links'},
-                {'type': 'legitimate', 'text': 'Your order #12345 has shipped. Track at our website.', 'is_fraud': False, 'explanation': 'Normal business communication with order details'}
-            ]
-            return jsonify(static_examples[:count])
-        
-        return jsonify(examples)
-    
-    except Exception as e:
-        return jsonify({'error': f'Example generation failed: {str(e)}'}), 500
-
-@app.route('/history', methods=['GET'])
-@jwt_required()
-def get_history():
-    user_id = get_jwt_identity()
-    analyses = AnalysisHistory.query.filter_by(user_id=user_id).order_by(AnalysisHistory.created_at.desc()).limit(20).all()
-    return jsonify([analysis.to_dict() for analysis in analyses])
+import config  # loads .env; keep above the modules that read settings at import time
+import structured_logging  # routes logging through its queue; keep above modules that log while loading
+import aws_clients
+import llm
+import profiling
+import quota
+import response_encoding
+import storage
+from models import db, upgrade_schema
+from routes import register_blueprints
 
+log = logging.getLogger(__name__)
 
-def analyze_image_with_bedrock(image_data):
-    """Analyze image using Amazon Rekognition"""
-    try:
-        # Handle different base64 formats
-        if ',' in image_data:
-            image_b64 = image_data.split(',')[1]
-        else:
-            image_b64 = image_data
-            
-        image_bytes = base64.b64decode(image_b64)
-        image = Image.open(io.BytesIO(image_bytes))
-        width, height = image.size
-        file_size = len(image_bytes)
-        
-        # Use Amazon Rekognition for image analysis
-        rekognition = session.client('rekognition', region_name=REGION)
-        
-        # Detect text in image
-        text_response = rekognition.detect_text(Image={'Bytes': image_bytes})
-        detected_texts = [item['DetectedText'] for item in text_response.get('TextDetections', [])]
-        
-        # Detect labels/objects
-        label_response = rekognition.detect_labels(Image={'Bytes': image_bytes}, MaxLabels=20)
-        detected_labels = [(item['Name'], item['Confidence']) for item in label_response.get('Labels', [])]
-        
-        # Analyze for fraud indicators
-        fraud_score = 0
-        fraud_indicators = []
-        detailed_analysis = f"Amazon Rekognition analysis of {width}x{height} image ({file_size} bytes): "
-        
-        # Check detected text for fraud patterns
-        fraud_keywords = ['urgent', 'verify', 'suspended', 'winner', 'congratulations', 'prize', 'click here', 'act now', 'limited time']
-        suspicious_texts = []
-        
-        for text in detected_texts:
-            if any(keyword in text.lower() for keyword in fraud_keywords):
-                fraud_score += 25
-                suspicious_texts.append(text)
-        
-        if suspicious_texts:
-            fraud_indicators.append(f'Suspicious text detected: {", ".join(suspicious_texts[:3])}')
-            detailed_analysis += f"Found {len(suspicious_texts)} suspicious text elements including urgency tactics and fraud keywords. "
-        
-        # Check for document-like content
-        document_labels = ['document', 'text', 'paper', 'receipt', 'invoice', 'form', 'id card', 'license']
-        found_documents = [label for label, conf in detected_labels if label.lower() in document_labels and conf > 70]
-        
-        if found_documents:
-            fraud_score += 15
-            fraud_indicators.append(f'Document detected: {found_documents[0]} - verify authenticity through official channels')
-            detailed_analysis += f"Detected document-like content: {', '.join(found_documents)}. This could be a legitimate document or a fraudulent reproduction. "
-        
-        # Technical analysis for fraud patterns
-        if width < 300 or height < 300:
-            fraud_score += 20
-            fraud_indicators.append(f'Small image size ({width}x{height}) - commonly used in phishing emails to evade detection')
-            detailed_analysis += "Small image dimensions are often used in phishing campaigns to bypass email security filters. "
-        
-        if file_size < 10000:
-            fraud_score += 10
-            fraud_indicators.append('Small file size indicates heavy compression or low quality - common in fraudulent images')
-            detailed_analysis += "Low file size suggests image compression that may hide manipulation artifacts. "
-        
-        # Check for QR codes or barcodes
-        qr_labels = [label for label, conf in detected_labels if 'qr' in label.lower() or 'barcode' in label.lower()]
-        if qr_labels:
-            fraud_score += 15
-            fraud_indicators.append('QR code or barcode detected - verify destination before scanning')
-            detailed_analysis += "QR codes can redirect to malicious websites or download harmful content. "
-        
-        # High confidence labels analysis
-        high_conf_labels = [label for label, conf in detected_labels if conf > 90]
-        if high_conf_labels:
-            detailed_analysis += f"High-confidence visual elements detected: {', '.join(high_conf_labels[:5])}. "
-        
-        if detected_texts:
-            detailed_analysis += f"Text elements found: {', '.join(detected_texts[:3])}{'...' if len(detected_texts) > 3 else ''}. "
-        
-        risk_level = 'HIGH' if fraud_score >= 50 else 'MEDIUM' if fraud_score >= 25 else 'LOW'
-        
-        return {
-            'risk_level': risk_level,
-            'risk_score': min(fraud_score, 100),
-            'detailed_analysis': detailed_analysis,
-            'fraud_indicators': fraud_indicators if fraud_indicators else ['No specific fraud indicators detected in image analysis'],
-            'warnings': fraud_indicators,
-            'recommendations': [
-                'Verify any text claims through official channels',
-                'Check document authenticity if official-looking',
-                'Be cautious of urgent language or prize notifications',
-                'Do not scan QR codes from untrusted sources',
-                'Cross-reference with known legitimate sources'
-            ],
-            'timestamp': datetime.now().isoformat(),
-            'analysis_method': 'Amazon-Rekognition',
-            'detected_text_count': len(detected_texts),
-            'detected_labels_count': len(detected_labels)
-        }
-        
-        # Enhanced rule-based fallback
-        risk_score = 30
-        warnings = []
-        detailed_analysis = f'Analyzed {width}x{height} pixel image ({file_size} bytes). '
-        
-        if width < 200 or height < 200:
-            risk_score += 25
-            warnings.append('Very small image size - commonly used in phishing emails')
-            detailed_analysis += 'Small image dimensions suggest this may be a low-quality screenshot or thumbnail, which is often used in fraudulent communications to evade detection. '
-        
-        if width > 1920 or height > 1080:
-            risk_score += 15
-            warnings.append('Unusually large image - possible full screenshot')
-            detailed_analysis += 'Large image size suggests this may be a full screenshot of a website or application, which could indicate phishing attempts. '
-        
-        if file_size < 10000:  # Less than 10KB
-            risk_score += 20
-            warnings.append('Very small file size - possible compressed or low-quality image')
-            detailed_analysis += 'Small file size combined with image dimensions suggests heavy compression or poor quality, common in fraudulent documents. '
-        
-        risk_level = 'HIGH' if risk_score >= 60 else 'MEDIUM' if risk_score >= 35 else 'LOW'
-        
-        return {
-            'risk_level': risk_level,
-            'risk_score': risk_score,
-            'detailed_analysis': detailed_analysis,
-            'fraud_indicators': warnings if warnings else ['Basic technical analysis completed'],
-            'warnings': warnings if warnings else ['Basic image validation completed'],
-            'recommendations': [
-                'Verify image source and authenticity through official channels',
-                'Check for signs of digital manipulation or editing',
-                'Be cautious of unsolicited images, especially with urgent requests',
-                'Cross-reference any claims made in the image with official sources'
-            ],
-            'timestamp': datetime.now().isoformat(),
-            'analysis_method': 'Enhanced-Rule-Based-Fallback',
-            'image_properties': f'{width}x{height}'
-        }
-        
-    except Exception as e:
-        print(f"Image analysis error: {e}")
-        print(f"Image data length: {len(image_data) if image_data else 0}")
-        print(f"Image data starts with: {image_data[:50] if image_data else 'None'}")
-        
-        return {
-            'risk_level': 'MEDIUM',
-            'risk_score': 50,
-            'warnings': [f'Image processing failed: {str(e)[:100]}'],
-            'recommendations': ['Check image format and try again', 'Manually verify image authenticity'],
-            'timestamp': datetime.now().isoformat(),
-            'analysis_method': 'Error-Fallback',
-            'error_details': str(e)
-        }
 
-def generate_ai_examples(example_type='mixed', count=5):
-    """Generate AI-powered examples for practice"""
-    if not bedrock_available or not llm:
-        return []
-    
-    try:
-        prompt = f"""Generate {count} realistic {example_type} examples for fraud detection training. Return ONLY a JSON array:
-[
-    {{
-        "type": "category",
-        "text": "example content",
-        "is_fraud": true/false,
-        "explanation": "why this is/isn't fraud"
-    }}
-]
+def create_app(config_object=config.Config):
+    app = Flask(__name__, instance_path=config.INSTANCE_DIR)
+    app.config.from_object(config_object)
+    CORS(app)
 
-Types: phishing_email, scam_text, fake_news, investment_scam, tech_support_scam, legitimate_message
-Make them realistic and educational."""
-        
-        response = llm.invoke(prompt)
-        if hasattr(response, 'content'):
-            response_text = response.content
-        elif isinstance(response, dict) and 'content' in response:
-            response_text = response['content']
-        else:
-            response_text = str(response)
-        
-        json_start = response_text.find('[')
-        json_end = response_text.rfind(']') + 1
-        if json_start != -1 and json_end != -1:
-            json_str = response_text[json_start:json_end]
-            return json.loads(json_str)
-    except Exception as e:
-        print(f"AI example generation failed: {e}")
-    
-    return []
+    # Initialize extensions; request ids and profiling first, so their hooks wrap the others
+    structured_logging.init_app(app)
+    profiling.init_app(app)
+    db.init_app(app)
+    storage.init_app(app, db)
+    JWTManager(app)
+    response_encoding.init_app(app)
+    quota.init_app(app)
 
-def rule_based_analysis(text: str) -> str:
-    text_lower = text.lower()
+    register_blueprints(app)
 
-    high_risk = ['urgent', 'click here', 'verify now', 'suspended', 'expire', 'act now', 'limited time', 'winner', 'congratulations']
-    investment_scam = ['give me', 'send me', 'i give you', 'double your money', 'guaranteed return', 'easy money', 'quick profit']
-    medium_risk = ['free', 'guarantee', 'no risk', 'exclusive', 'special offer']
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables and apply schema upgrades."""
+        init_db(app)
 
-    money_pattern = re.search(r'\$?\d+.*(?:dollar|money|cash|profit|return)', text_lower)
-    give_pattern = re.search(r'(?:give|send).*\$?\d+', text_lower)
+    return app
 
-    high_count = sum(1 for word in high_risk if word in text_lower)
-    investment_count = sum(1 for word in investment_scam if word in text_lower)
-    medium_count = sum(1 for word in medium_risk if word in text_lower)
 
-    if investment_count >= 1 or give_pattern or money_pattern:
-        return "Risk Level: HIGH\nWarning Signs: Investment/money scam pattern detected\nExplanation: This appears to be a financial scam. Never send money to strangers promising returns. Legitimate investments don't work this way."
-    elif high_count >= 2:
-        return "Risk Level: HIGH\nWarning Signs: Multiple urgency tactics detected\nExplanation: This text uses several fraud indicators like urgency and pressure tactics."
-    elif high_count >= 1:
-        return "Risk Level: HIGH\nWarning Signs: Urgency tactics detected\nExplanation: Fraudsters use pressure tactics to make you act quickly without thinking."
-    elif medium_count >= 2:
-        return "Risk Level: MEDIUM\nWarning Signs: Suspicious promotional language\nExplanation: Be cautious of offers that seem too good to be true."
-    elif medium_count >= 1:
-        return "Risk Level: MEDIUM\nWarning Signs: Promotional language detected\nExplanation: Be cautious of unsolicited offers and verify sources."
-    else:
-        return "Risk Level: LOW\nWarning Signs: No obvious fraud indicators\nExplanation: Text appears normal, but always verify requests for personal information through official channels."
+def init_db(app):
+    """Create missing tables, then add the columns and indexes introduced since they were created"""
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+    log.info("Database tables created")
 
 
-@app.route('/api/examples')
-def get_examples():
-    lang = request.args.get('lang', 'en')
-    count = int(request.args.get('count', 4))
-    
-    if bedrock_available and llm:
-        try:
-            prompt = f"""Generate {count} diverse fraud detection examples. Return ONLY a JSON array with this exact format:
-[
-    {{
-        "type": "example_type",
-        "text": "example text content",
-        "is_fraud": true/false
-    }}
-]
+def use_aws_clients(aws_session, bedrock_llm=None):
+    """Swap the AWS session (and optionally the LLM) used by every route.
 
-Include mix of: phishing_email, fake_news, scam_text, legitimate_message. Make examples realistic and varied."""
-            
-            response = llm.invoke(prompt)
-            if hasattr(response, 'content'):
-                response_text = response.content
-            elif isinstance(response, dict) and 'content' in response:
-                response_text = response['content']
-            else:
-                response_text = str(response)
-            
-            # Extract JSON array
-            json_start = response_text.find('[')
-            json_end = response_text.rfind(']') + 1
-            if json_start != -1 and json_end != -1:
-                json_str = response_text[json_start:json_end]
-                examples = json.loads(json_str)
-                
-                # Add generated flag
-                for example in examples:
-                    example['generated_by'] = 'AI'
-                
-                return jsonify(examples)
-        except Exception as e:
-            print(f"AI example generation failed: {e}")
-    
-    # Fallback static examples
-    examples = [
-        {
-            'type': 'phishing_email',
-            'text': 'URGENT: Your account will be suspended! Click here immediately to verify your information.',
-            'is_fraud': True,
-            'generated_by': 'Static'
-        },
-        {
-            'type': 'fake_news',
-            'text': "Scientists discover miracle cure that doctors don't want you to know about!",
-            'is_fraud': True,
-            'generated_by': 'Static'
-        },
-        {
-            'type': 'legitimate',
-            'text': 'Your monthly statement is now available. Log in to your account to view it.',
-            'is_fraud': False,
-            'generated_by': 'Static'
-        },
-        {
-            'type': 'scam_call',
-            'text': 'This is the IRS. You owe back taxes and will be arrested unless you pay immediately.',
-            'is_fraud': True,
-            'generated_by': 'Static'
-        }
-    ]
-    
-    return jsonify(examples[:count])
+    Lets the load-test harness point the app at local stand-ins instead of
+    real Bedrock, Rekognition and Polly.
+    """
+    aws_clients.registry.use_session(aws_session)
+    if bedrock_llm is not None:
+        llm.use_llm(bedrock_llm)
 
-@app.route('/api/stats')
-def get_stats():
-    return jsonify({
-        'total_analyses': 0,  # Could track this in a database
-        'risk_distribution': {
-            'high': 0,
-            'medium': 0,
-            'low': 0
-        },
-        'api_status': 'operational',
-        'services': {
-            'bedrock': bedrock_available,
-            'polly': polly_available,
-            'rekognition': bedrock_available  # Same session
-        },
-        'last_updated': datetime.now().isoformat()
-    })
 
-@app.route('/api/translations/<lang>')
-def get_translations(lang):
-    """Get translations for the specified language"""
-    translations = {
-        'home': 'Home',
-        'learn': 'Learn',
-        'practice': 'Practice',
-        'about': 'About',
-        'logout': 'Logout',
-        'fraud_detection_trainer': 'Fraud Detection Trainer',
-        'learn_to_identify': 'Learn to identify fraudulent emails and news articles with AI-powered analysis',
-        'text_analyzer': 'Text Analyzer',
-        'paste_suspicious': 'Paste suspicious text below for instant fraud analysis:',
-        'placeholder': 'Paste email or news text here...',
-        'analyze_button': 'Analyze for Fraud',
-        'analyzing': 'Analyzing...',
-        'practice_examples': 'Practice Examples'
-    }
-    
-    if lang == 'en':
-        return jsonify(translations)
-    
-    try:
-        translated = {}
-        for key, text in translations.items():
-            result = translator.translate(text, src='en', dest=lang)
-            translated[key] = result.text
-        return jsonify(translated)
-    except Exception as e:
-        print(f"Translation error: {e}")
-        return jsonify(translations)  # Return English if translation fails
+# Spawned worker processes (the batch image decode pool) re-import the
+# parent's main script as __mp_main__. Under `python app.py` that is this
+# file, and those workers never serve requests, so they skip building the app
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
+    init_db(app)
     print("Starting Flask server...")
-    print(f"Services available: Bedrock={bedrock_available}, Polly={polly_available}")
+    print(f"Services available: Bedrock={llm.available()}, Polly={aws_clients.registry.available('polly')}")
     app.run(debug=True, port=8000, host='0.0.0.0')
-
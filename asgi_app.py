@@ -0,0 +1,614 @@
+"""
+ASGI serving mode for the I/O-bound analysis routes.
+
+    uvicorn asgi_app:app --port 8000 --workers 2
+
+/analyze, /api/analyze/image, /api/generate/examples,
+/api/generate/call-scenario, /api/generate/call-audio and
+/api/practice/call-test reuse the prompt, parsing and scoring helpers of
+the Flask routes (llm.py, analyzer.py, image_analysis.py, audio.py) but await Bedrock, Rekognition and Polly through aiobotocore, so a
+request waiting on AWS holds a coroutine instead of an OS thread. Every
+other route is passed through to the Flask app on a small thread pool.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import importlib
+import io
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import app as core
+import audio
+import aws_clients
+import llm
+import quota
+import structured_logging
+from analyzer import analyzer, rule_based_analysis, rule_packs
+from circuit_breaker import CircuitBreaker, CircuitOpenError, breakers
+from routes import analysis
+from jobs import JOB_POLL_SECONDS, JOB_SSE_HEARTBEAT_SECONDS, sse_event
+from routes.practice import STATIC_PRACTICE_EXAMPLES, job_manager
+from text_cache import simhash
+
+log = logging.getLogger(__name__)
+
+try:
+    import orjson
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
+ASYNC_MAX_POOL_CONNECTIONS = int(os.getenv('ASYNC_MAX_POOL_CONNECTIONS', 1000))
+ASYNC_WSGI_THREADS = int(os.getenv('ASYNC_WSGI_THREADS', 16))
+ASYNC_WSGI_STREAM_THREADS = int(os.getenv('ASYNC_WSGI_STREAM_THREADS', 32))
+
+# Quota check result for the request being handled (see quota.admit_request)
+_admission = contextvars.ContextVar('admission', default=None)
+
+
+def upstream_allowed():
+    admission = _admission.get()
+    return admission is None or admission.upstream
+
+
+class AsyncUpstream:
+    """Async Bedrock, Rekognition and Polly calls, each through its circuit breaker"""
+
+    SERVICES = ('bedrock-runtime', 'rekognition', 'polly')
+
+    def __init__(self):
+        self.clients = {}
+        self._stack = None
+
+    async def start(self):
+        if self.clients:
+            return
+        from aiobotocore.config import AioConfig
+        from aiobotocore.session import get_session
+
+        config = AioConfig(**aws_clients.config_options(ASYNC_MAX_POOL_CONNECTIONS))
+        session = get_session()
+        self._stack = contextlib.AsyncExitStack()
+        for service in self.SERVICES:
+            self.clients[service] = await self._stack.enter_async_context(
+                session.create_client(service, region_name=llm.REGION, config=config))
+        log.info("Async AWS clients ready (pool size %d)", ASYNC_MAX_POOL_CONNECTIONS)
+
+    async def close(self):
+        if self._stack is not None:
+            await self._stack.aclose()
+            self._stack = None
+        self.clients = {}
+
+    def use_clients(self, clients):
+        """Replace the aiobotocore clients, e.g. with async fakes for benchmarks"""
+        self.clients = dict(clients)
+
+    async def _call(self, service, coro_factory):
+        breaker = breakers[service]
+        if not breaker.allow_request():
+            raise CircuitOpenError(service)
+        start = time.monotonic()
+        try:
+            result = await coro_factory()
+        except Exception as e:
+            breaker.record_error(e, time.monotonic() - start)
+            raise
+        breaker.record_success(time.monotonic() - start)
+        return result
+
+    async def invoke_llm(self, prompt, endpoint='analyze', input_chars=None):
+        """Same routing as llm.invoke_llm; returns (text, model_id)"""
+        from langchain_aws.llms.bedrock import LLMInputOutputAdapter
+
+        model_id = llm.model_router.choose(endpoint, len(prompt) if input_chars is None else input_chars)
+        provider = _model_provider(model_id)
+        body = LLMInputOutputAdapter.prepare_input(provider, {}, prompt=prompt)
+
+        async def call():
+            response = await self.clients['bedrock-runtime'].invoke_model(
+                modelId=model_id, body=json.dumps(body),
+                accept='application/json', contentType='application/json')
+            return await response['body'].read()
+
+        start = time.monotonic()
+        try:
+            raw = await self._call('bedrock', call)
+        except CircuitOpenError:
+            raise
+        except Exception:
+            llm.model_router.record(model_id, time.monotonic() - start, ok=False)
+            raise
+        llm.model_router.record(model_id, time.monotonic() - start, ok=True)
+        return LLMInputOutputAdapter.prepare_output(provider, {'body': io.BytesIO(raw)})['text'], model_id
+
+    async def detect_text(self, image_bytes):
+        return await self._call('rekognition', lambda: self.clients['rekognition'].detect_text(
+            Image={'Bytes': image_bytes}))
+
+    async def detect_text_tiles(self, tile_bytes, concurrency):
+        """detect_text for each tile, at most `concurrency` in flight"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def detect(tile):
+            async with semaphore:
+                return await self.detect_text(tile)
+        return await asyncio.gather(*(detect(tile) for tile in tile_bytes))
+
+    async def detect_labels(self, image_bytes, max_labels=20):
+        return await self._call('rekognition', lambda: self.clients['rekognition'].detect_labels(
+            Image={'Bytes': image_bytes}, MaxLabels=max_labels))
+
+    async def synthesize_speech(self, script, voice):
+        async def call():
+            response = await self.clients['polly'].synthesize_speech(
+                Text=script, OutputFormat='mp3', VoiceId=voice['VoiceId'], Engine=voice['Engine'])
+            return await response['AudioStream'].read()
+        return await self._call('polly', call)
+
+
+def _model_provider(model_id):
+    """'meta' for both meta.llama3-... and cross-region us.meta.llama3-... ids"""
+    parts = model_id.split('.')
+    if len(parts) > 2 and parts[0] in ('us', 'eu', 'apac', 'global'):
+        return parts[1]
+    return parts[0]
+
+
+upstream = AsyncUpstream()
+_executor = ThreadPoolExecutor(max_workers=ASYNC_WSGI_THREADS, thread_name_prefix='asgi-sync')
+# Streamed Flask response bodies (e.g. NDJSON image batches) can take a thread for a
+# long time, so they get their own pool rather than stalling quota checks and DB saves
+_stream_executor = ThreadPoolExecutor(max_workers=ASYNC_WSGI_STREAM_THREADS, thread_name_prefix='asgi-stream')
+
+
+async def run_sync(func, *args, executor=_executor):
+    # Run in a copy of this request's context so log lines keep its request id
+    return await asyncio.get_running_loop().run_in_executor(executor, contextvars.copy_context().run, func, *args)
+
+
+async def llm_available():
+    """llm.available() off the event loop: its first call imports langchain_aws and builds the client"""
+    loaded = llm.loaded()
+    return loaded if loaded is not None else await run_sync(llm.available)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# Route handlers: each takes the parsed JSON body and headers, returns (status, payload)
+
+async def analyze_text_main(data, headers):
+    user_id = 1 if headers.get('authorization', '').startswith('Bearer ') else None  # Same as the Flask route
+    text = data.get('text', '')
+    if not text:
+        return 400, {'error': 'No text provided'}
+
+    text_for_analysis, detected_lang = analysis.detect_and_translate(text, 'en')
+    pack = rule_packs.active()
+    response = model_id = cached = None
+    bedrock = await llm_available()
+    if bedrock:
+        text_hash = simhash(text_for_analysis)
+        cached = analysis.text_cache.lookup(text_hash)
+    backend = 'rules'
+    if cached is not None:
+        response, model_id = cached['result'], cached['model_id']
+        backend = 'cache'
+    elif bedrock and upstream_allowed():
+        try:
+            response, model_id = await upstream.invoke_llm(
+                llm.analysis_prompt(text_for_analysis), 'analyze', len(text_for_analysis))
+            backend = 'llm'
+            analysis.text_cache.store(text_hash, {'result': response, 'model_id': model_id})
+        except Exception:
+            response = None
+    if response is None:
+        response = rule_based_analysis(text_for_analysis, pack)
+
+    if detected_lang != 'en':
+        response = analysis.translate_response(response, detected_lang)
+
+    if user_id:
+        def save():
+            with core.app.app_context():
+                analysis.save_analysis(user_id, text, response, backend, detected_lang)
+        await run_sync(save)
+
+    result = {'result': response, 'rule_pack': pack.label, 'model_id': model_id}
+    if cached is not None:
+        result['cache'] = cached['cache']
+    return 200, result
+
+
+async def analyze_image(data, headers):
+    image_data = data.get('image', '')
+    if not image_data:
+        return 400, {'error': 'Missing required field: image'}
+
+    if breakers['rekognition'].state != CircuitBreaker.OPEN and upstream_allowed():
+        import image_analysis  # PIL and numpy load on the first image request
+        import image_tiling
+
+        try:
+            image_bytes, width, height = await run_sync(image_analysis.decode_image, image_data)
+            image_hash = await run_sync(image_analysis.dhash, image_bytes)
+        except Exception as e:
+            return 200, image_analysis.image_error_result(image_data, e)
+        cached = image_analysis.image_cache.lookup(image_hash)
+        if cached is not None:
+            return 200, cached
+        screen = await run_sync(image_analysis.screen_image, image_bytes, width, height)
+        if screen and screen['skipped']:
+            return 200, image_analysis.prescreen_result(screen, width, height, len(image_bytes))
+        try:
+            whole, tiles, tile_bytes, _ = await run_sync(image_analysis.rekognition_inputs, image_bytes)
+            text_call = (upstream.detect_text_tiles(tile_bytes, image_tiling.IMAGE_TILE_CONCURRENCY) if tiles
+                         else upstream.detect_text(whole))
+            text_response, label_response = await asyncio.gather(text_call, upstream.detect_labels(whole))
+            if tiles:
+                text_response = image_tiling.merge_detections(text_response, tiles, width, height)
+            result = image_analysis.score_rekognition_results(text_response, label_response, width, height, len(image_bytes))
+            if screen:
+                result['prescreen'] = {'decision': screen['decision'], 'reasons': screen['reasons']}
+            await run_sync(image_analysis.image_cache.store, image_hash, result)
+            return 200, result
+        except Exception as e:
+            log.warning("Async Rekognition analysis failed: %s", e)
+
+    return 200, await run_sync(analyzer.analyze_image, image_data)
+
+
+async def generate_examples(data, headers):
+    example_type = data.get('type', 'mixed')
+    count = min(int(data.get('count', 5)), 10)  # Max 10 examples
+
+    if await llm_available() and upstream_allowed():
+        try:
+            response_text, model_id = await upstream.invoke_llm(
+                llm.practice_examples_prompt(example_type, count), 'examples')
+            examples = llm.extract_json(response_text, '[', ']')
+            if examples:
+                for example in examples:
+                    if isinstance(example, dict):
+                        example['model_id'] = model_id
+                return 200, examples
+        except Exception as e:
+            log.warning("AI example generation failed: %s", e)
+
+    return 200, STATIC_PRACTICE_EXAMPLES[:count]
+
+
+async def call_scenario(difficulty):
+    if await llm_available() and upstream_allowed():
+        try:
+            response_text, model_id = await upstream.invoke_llm(llm.call_scenario_prompt(difficulty), 'call-scenario')
+            scenario = analyzer.build_call_scenario(response_text, difficulty, model_id)
+            if scenario:
+                return scenario
+        except Exception as e:
+            log.warning("AI scenario generation failed: %s", e)
+    return analyzer.static_call_scenario(difficulty)
+
+
+async def call_audio(script, voice_type):
+    if not upstream_allowed():
+        return await run_sync(audio.simple_audio_placeholder)
+    voice = audio.POLLY_VOICES.get(voice_type, audio.POLLY_VOICES['scammer'])
+    try:
+        audio_data = await upstream.synthesize_speech(script, voice)
+        return audio.audio_result(audio_data, script, voice_type)
+    except Exception as e:
+        log.warning("Polly audio generation failed: %s", e)
+        return await run_sync(audio.simple_audio_placeholder)
+
+
+async def generate_call_scenario(data, headers):
+    difficulty = data.get('difficulty', 'medium')
+    if difficulty not in ['easy', 'medium', 'hard']:
+        return 400, {'error': 'Invalid difficulty. Use: easy, medium, hard'}
+    return 200, await call_scenario(difficulty)
+
+
+async def generate_call_audio(data, headers):
+    script = data.get('script', '')
+    voice_type = data.get('voice_type', 'scammer')
+    if not script:
+        return 400, {'error': 'Missing required field: script'}
+    if voice_type not in ['scammer', 'elderly', 'authority']:
+        return 400, {'error': 'Invalid voice_type. Use: scammer, elderly, authority'}
+    return 200, await call_audio(script, voice_type)
+
+
+async def call_test_practice(data, headers):
+    difficulty = data.get('difficulty', 'medium')
+    include_audio = data.get('include_audio', False)
+
+    scenario = await call_scenario(difficulty)
+    if include_audio and aws_clients.registry.available('polly'):
+        scenario['audio'] = await call_audio(scenario['script'], 'scammer')
+
+    return 200, {
+        'test_id': f"test_{random.randint(1000, 9999)}",
+        'scenario': scenario,
+        'instructions': 'Listen to or read the call scenario. Identify red flags and determine if this is a scam.',
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+ASYNC_ROUTES = {
+    ('POST', '/analyze'): (analyze_text_main, 'Analysis failed'),
+    ('POST', '/api/analyze/image'): (analyze_image, 'Analysis failed'),
+    ('POST', '/api/generate/examples'): (generate_examples, 'Example generation failed'),
+    ('POST', '/api/generate/call-scenario'): (generate_call_scenario, 'Scenario generation failed'),
+    ('POST', '/api/generate/call-audio'): (generate_call_audio, 'Audio generation failed'),
+    ('POST', '/api/practice/call-test'): (call_test_practice, 'Test generation failed'),
+}
+
+
+JOB_EVENTS_PATH = re.compile(r'/api/jobs/([^/]+)/events')
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def job_events(job_id, receive, send, request_id):
+    """GET /api/jobs/<id>/events as a coroutine that polls the job every
+    JOB_POLL_SECONDS. Through the Flask fallback, each open stream would hold
+    a bridge thread until its job finished"""
+    job = await run_sync(job_manager.get, job_id)
+    if job is None:
+        await _send_json(send, 404, {'error': 'Job not found or expired'},
+                         {structured_logging.REQUEST_ID_HEADER: request_id})
+        return
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache'),
+        (b'x-accel-buffering', b'no'), (b'access-control-allow-origin', b'*'),
+        (structured_logging.REQUEST_ID_HEADER.lower().encode('latin-1'), request_id.encode('latin-1'))]})
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        seen, quiet_since = -1, time.monotonic()
+        while not disconnected.done():
+            # Local jobs are checked under the manager's lock and stored ones with
+            # one SQLite read, so each poll holds a bridge thread only briefly
+            version, snapshot = await run_sync(job_manager.next_update, job, seen)
+            if snapshot is None:
+                break
+            if version == seen:
+                if time.monotonic() - quiet_since >= JOB_SSE_HEARTBEAT_SECONDS:
+                    await send({'type': 'http.response.body', 'body': b': keep-alive\n\n', 'more_body': True})
+                    quiet_since = time.monotonic()
+                await asyncio.sleep(JOB_POLL_SECONDS)
+                continue
+            seen, quiet_since = version, time.monotonic()
+            event, done = sse_event(version, snapshot)
+            await send({'type': 'http.response.body', 'body': event.encode('utf-8'), 'more_body': not done})
+            if done:
+                return
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        disconnected.cancel()
+
+
+def _max_body():
+    """The Flask app's MAX_CONTENT_LENGTH, which bounds bodies on both paths"""
+    return core.app.config.get('MAX_CONTENT_LENGTH')
+
+
+async def _read_body(receive, limit):
+    """The whole request body; HTTPError 413 as soon as more than limit bytes have arrived"""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise HTTPError(499, 'Client disconnected')
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if limit is not None and size > limit:
+            raise HTTPError(413, f'Request body is larger than {limit} bytes')
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+class _ReceiveStream(io.RawIOBase):
+    """wsgi.input for the Flask fallback: body chunks are pulled from the ASGI
+    receive channel as Flask reads them, so Werkzeug's MAX_CONTENT_LENGTH
+    and the routes' own caps stop an oversized upload before it is all read"""
+
+    def __init__(self, receive, loop):
+        self._receive = receive
+        self._loop = loop
+        self._pending = b''
+        self._done = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending and not self._done:
+            message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+            if message['type'] == 'http.disconnect':
+                self._done = True
+                break
+            self._pending = message.get('body', b'')
+            self._done = not message.get('more_body')
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+async def _send_response(send, status, body, headers):
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_json(send, status, payload, extra_headers=None):
+    body = _dumps(payload)
+    await _send_response(send, status, body, [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(body)).encode()),
+        (b'access-control-allow-origin', b'*'),
+    ] + [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in (extra_headers or {}).items()])
+
+
+def _wsgi_environ(scope, body_stream):
+    headers = {k.decode('latin-1'): v.decode('latin-1') for k, v in scope['headers']}
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body_stream,
+        'wsgi.input_terminated': True,  # the stream ends with the body, chunked or not
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers.items():
+        key = name.upper().replace('-', '_')
+        if key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[key] = value
+        else:
+            environ[f'HTTP_{key}'] = value
+    return environ
+
+
+def _start_wsgi(environ):
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    result = core.app(environ, start_response)
+    chunks = iter(result)
+    first = next(chunks, b'')  # Flask calls start_response before the first chunk
+    if any(name.lower() == 'content-length' for name, _ in started['headers']):
+        first += b''.join(chunks)  # buffered response: finish it on this thread
+        chunks = None
+    return started['status'], started['headers'], result, chunks, first
+
+
+async def _wsgi_fallback(scope, receive, send):
+    """Run a Flask route on the thread pool, streaming the request body in as
+    Flask reads it and the response body out chunk by chunk, so streamed
+    responses reach the client live"""
+    body_stream = io.BufferedReader(_ReceiveStream(receive, asyncio.get_running_loop()), 64 * 1024)
+    status, headers, result, chunks, chunk = await run_sync(_start_wsgi, _wsgi_environ(scope, body_stream))
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]})
+    try:
+        while chunk is not None:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': chunks is not None})
+            chunk = await run_sync(next, chunks, None, executor=_stream_executor) if chunks is not None else None
+        if chunks is not None:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        if hasattr(result, 'close'):
+            await run_sync(result.close, executor=_stream_executor)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                if not upstream.clients:
+                    await upstream.start()
+                # Set up Bedrock on a worker thread before traffic arrives, not on the loop
+                if await run_sync(llm.available):
+                    await run_sync(importlib.import_module, 'langchain_aws.llms.bedrock')
+                await send({'type': 'lifespan.startup.complete'})
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+        elif message['type'] == 'lifespan.shutdown':
+            await upstream.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    job_path = JOB_EVENTS_PATH.fullmatch(scope['path']) if scope['method'] == 'GET' else None
+    if job_path is not None:
+        request_id = structured_logging.new_request_id()
+        structured_logging.bind_request_id(request_id)
+        await job_events(job_path.group(1), receive, send, request_id)
+        return
+
+    route = ASYNC_ROUTES.get((scope['method'], scope['path']))
+    if route is None:
+        await _wsgi_fallback(scope, receive, send)
+        return
+
+    limit = _max_body()
+    try:
+        declared = int(dict(scope['headers']).get(b'content-length', 0))
+        if limit is not None and declared > limit:
+            raise HTTPError(413, f'Request body is larger than {limit} bytes')
+        body = await _read_body(receive, limit)
+    except ValueError:
+        await _send_json(send, 400, {'error': 'Invalid Content-Length'})
+        return
+    except HTTPError as e:
+        if e.status == 413:
+            await _send_json(send, 413, {'error': e.message})
+        return
+
+    handler, error_prefix = route
+    # Each ASGI request runs in its own task, so the id stays with this request's log lines
+    request_id = structured_logging.new_request_id()
+    structured_logging.bind_request_id(request_id)
+    headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+    # Every async route calls AWS, so all of them are charged to the 'upstream' budget
+    admission = await run_sync(quota.admit_request, 'upstream', headers.get('authorization'),
+                               headers.get('x-forwarded-for'), (scope.get('client') or (None,))[0])
+    response_headers = dict(admission.headers()) if admission is not None else {}
+    response_headers[structured_logging.REQUEST_ID_HEADER] = request_id
+    if admission is not None and admission.status == 'rejected':
+        await _send_json(send, 429, {'error': 'Rate limit exceeded', 'retry_after': round(admission.retry_after, 1)},
+                         response_headers)
+        return
+    _admission.set(admission)
+    try:
+        data = json.loads(body) if body else {}
+        if not isinstance(data, dict):
+            raise ValueError('JSON body must be an object')
+        status, payload = await handler(data, headers)
+    except ValueError as e:
+        status, payload = 400, {'error': f'Invalid request body: {e}'}
+    except Exception as e:
+        status, payload = 500, {'error': f'{error_prefix}: {str(e)}'}
+    await _send_json(send, status, payload, response_headers)
@@ -0,0 +1,80 @@
+"""
+Call audio for the practice routes: Polly speech, or a pydub tone when
+Polly is unavailable.
+
+pydub probes for ffmpeg when it is imported, so it is imported only when a
+placeholder is actually generated.
+"""
+
+import base64
+import logging
+
+import aws_clients
+from circuit_breaker import breakers
+
+log = logging.getLogger(__name__)
+
+POLLY_VOICES = {
+    'scammer': {'VoiceId': 'Matthew', 'Engine': 'standard'},
+    'elderly': {'VoiceId': 'Joanna', 'Engine': 'standard'},
+    'authority': {'VoiceId': 'Brian', 'Engine': 'standard'}
+}
+
+
+def audio_result(audio_data, script, voice_type):
+    return {
+        'audio_data': base64.b64encode(audio_data).decode('utf-8'),
+        'format': 'mp3',
+        'voice_type': voice_type,
+        'duration_estimate': len(script) * 0.1  # Rough estimate
+    }
+
+
+def generate_fake_call_audio(script, voice_type='scammer'):
+    """Generate fake call audio using AWS Polly"""
+    try:
+        polly = aws_clients.registry.client('polly')
+
+        voice = POLLY_VOICES.get(voice_type, POLLY_VOICES['scammer'])
+
+        response = breakers['polly'].call(
+            polly.synthesize_speech,
+            Text=script,
+            OutputFormat='mp3',
+            VoiceId=voice['VoiceId'],
+            Engine=voice['Engine']
+        )
+
+        return audio_result(response['AudioStream'].read(), script, voice_type)
+
+    except Exception as e:
+        log.warning("Polly audio generation failed: %s", e)
+        # Fallback to simple tone generation
+        return simple_audio_placeholder()
+
+
+def simple_audio_placeholder():
+    """Generate simple audio placeholder when Polly fails"""
+    try:
+        from pydub.generators import Sine
+
+        # Generate a simple tone as placeholder
+        tone = Sine(440).to_audio_segment(duration=3000)  # 3 second tone
+        audio_data = tone.export(format="mp3").read()
+        audio_b64 = base64.b64encode(audio_data).decode('utf-8')
+
+        return {
+            'audio_data': audio_b64,
+            'format': 'mp3',
+            'voice_type': 'placeholder',
+            'duration_estimate': 3.0,
+            'note': 'Audio placeholder - AWS Polly unavailable'
+        }
+    except:
+        return {
+            'audio_data': '',
+            'format': 'mp3',
+            'voice_type': 'none',
+            'duration_estimate': 0,
+            'error': 'Audio generation failed'
+        }
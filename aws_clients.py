@@ -0,0 +1,167 @@
+import logging
+import os
+import threading
+from urllib.parse import urlparse
+
+log = logging.getLogger(__name__)
+
+REGION = os.getenv("AWS_REGION", "us-west-2")
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', 50))
+AWS_CONNECT_TIMEOUT = float(os.getenv('AWS_CONNECT_TIMEOUT', 5))
+AWS_READ_TIMEOUT = float(os.getenv('AWS_READ_TIMEOUT', 60))
+AWS_MAX_ATTEMPTS = int(os.getenv('AWS_MAX_ATTEMPTS', 3))
+
+
+def config_options(max_pool_connections=AWS_MAX_POOL_CONNECTIONS):
+    """botocore Config settings shared by the sync registry and the async clients"""
+    return {
+        'max_pool_connections': max_pool_connections,
+        'connect_timeout': AWS_CONNECT_TIMEOUT,
+        'read_timeout': AWS_READ_TIMEOUT,
+        'tcp_keepalive': True,
+        'retries': {'mode': 'adaptive', 'max_attempts': AWS_MAX_ATTEMPTS}
+    }
+
+
+class PoolStats:
+    """In-flight HTTP attempts for one service client, fed by botocore events.
+
+    A call that starts while every pooled connection is busy is counted as
+    saturated: urllib3 opens a throwaway connection for it and logs
+    "Connection pool is full" when handing it back, which is counted as a
+    discarded connection.
+    """
+
+    def __init__(self, service, pool_size):
+        self.service = service
+        self.pool_size = pool_size
+        self.host = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.calls = 0
+        self.saturated_calls = 0
+        self.discarded_connections = 0
+
+    def before_send(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            if self.in_flight >= self.pool_size:
+                self.saturated_calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def response_received(self, **kwargs):
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def record_discard(self):
+        with self._lock:
+            self.discarded_connections += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pool_size': self.pool_size,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'calls': self.calls,
+                'saturated_calls': self.saturated_calls,
+                'discarded_connections': self.discarded_connections
+            }
+
+
+class _PoolFullHandler(logging.Handler):
+    """Counts urllib3 "Connection pool is full" warnings per host"""
+
+    def __init__(self, registry):
+        super().__init__(logging.WARNING)
+        self.registry = registry
+
+    def emit(self, record):
+        if isinstance(record.msg, str) and record.msg.startswith('Connection pool is full') and record.args:
+            self.registry._record_discard(str(record.args[0]))
+
+
+class ClientRegistry:
+    """Builds each AWS service client once per process and shares it.
+
+    boto3 clients are thread-safe, so one client per service with a pool
+    sized for the server's concurrency replaces the per-request clients.
+    """
+
+    def __init__(self, session=None, region=REGION, max_pool_connections=AWS_MAX_POOL_CONNECTIONS):
+        self.region = region
+        self.max_pool_connections = max_pool_connections
+        self._session = session
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._stats = {}
+        self._discards_by_host = {}
+        logging.getLogger('urllib3.connectionpool').addHandler(_PoolFullHandler(self))
+
+    @property
+    def session(self):
+        if self._session is None:
+            import boto3
+            self._session = boto3.Session()
+        return self._session
+
+    def use_session(self, session):
+        """Swap the session (e.g. for the load-test fakes) and drop cached clients"""
+        with self._lock:
+            self._session = session
+            self._clients = {}
+            self._stats = {}
+
+    def client(self, service):
+        client = self._clients.get(service)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(service)
+            if client is None:
+                client = self._build(service)
+                self._clients[service] = client
+        return client
+
+    def available(self, service):
+        """True if the service client can be built; it is built (and boto3 imported) on the first call"""
+        try:
+            self.client(service)
+        except Exception as e:
+            log.warning("AWS %s client initialization failed: %s", service, e)
+            return False
+        return True
+
+    def _build(self, service):
+        from botocore.config import Config
+
+        client = self.session.client(service, region_name=self.region,
+                                     config=Config(**config_options(self.max_pool_connections)))
+
+        stats = PoolStats(service, self.max_pool_connections)
+        meta = getattr(client, 'meta', None)
+        if meta is not None and hasattr(meta, 'events'):
+            meta.events.register('before-send', stats.before_send)
+            meta.events.register('response-received', stats.response_received)
+            stats.host = urlparse(meta.endpoint_url).hostname
+        self._stats[service] = stats
+        return client
+
+    def _record_discard(self, host):
+        for stats in list(self._stats.values()):
+            if stats.host == host:
+                stats.record_discard()
+                return
+        with self._lock:
+            self._discards_by_host[host] = self._discards_by_host.get(host, 0) + 1
+
+    def stats(self):
+        report = {service: stats.snapshot() for service, stats in list(self._stats.items())}
+        if self._discards_by_host:
+            report['other_hosts_discarded_connections'] = dict(self._discards_by_host)
+        return report
+
+
+registry = ClientRegistry()
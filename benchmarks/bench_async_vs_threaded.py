@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Side-by-side benchmark: threaded Flask vs the ASGI serving mode.
+
+Each server runs in its own process with Bedrock, Rekognition and Polly
+replaced by the latency-injecting fakes from loadtest/fake_aws.py. An
+asyncio client holds N requests in flight against an upstream-bound route
+and records throughput, latency percentiles, and the server's resident
+memory and thread count under load.
+
+    python benchmarks/bench_async_vs_threaded.py --concurrency 10,100,500 \\
+        --path /api/generate/call-scenario --bedrock-latency const:300
+
+Requires aiohttp and uvicorn (installed with the async serving extras).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REQUEST_BODIES = {
+    '/api/generate/call-scenario': {'difficulty': 'medium'},
+    '/api/generate/examples': {'count': 5},
+    '/api/generate/call-audio': {'script': 'This is the IRS. You owe back taxes.', 'voice_type': 'authority'},
+    '/api/practice/call-test': {'difficulty': 'hard', 'include_audio': True},
+    '/analyze': {'text': 'URGENT: verify your account now or it will be suspended'},
+}
+
+
+def serve(mode, port, args):
+    """Child process: run one server flavour against the fakes"""
+    tmp_dir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    os.environ['IMAGE_CACHE_PATH'] = os.path.join(tmp_dir, 'image_cache.json')
+    os.environ['RATE_LIMIT'] = 'false'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as core
+        from loadtest.fake_aws import build_async_clients, build_fakes
+        core.init_db(core.app)
+
+    fake_session, fake_llm = build_fakes(args.bedrock_latency, args.rekognition_latency, args.polly_latency)
+    core.use_aws_clients(fake_session, fake_llm)
+
+    if mode == 'threaded':
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *a, **kw):
+                pass
+
+        server = make_server('127.0.0.1', port, core.app, threaded=True, request_handler=QuietHandler)
+        server.request_queue_size = 4096
+        server.serve_forever()
+    else:
+        import uvicorn
+        import asgi_app
+
+        asgi_app.upstream.use_clients(build_async_clients(fake_session, fake_llm))
+        uvicorn.run(asgi_app.app, host='127.0.0.1', port=port, log_level='warning',
+                    access_log=False, backlog=4096)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def _proc_status(pid):
+    status = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            status[key] = value.strip()
+    return int(status['VmRSS'].split()[0]), int(status['Threads'])
+
+
+def _pct(values, pct):
+    index = min(len(values) - 1, max(0, int(round(pct / 100.0 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+async def drive(port, path, concurrency, duration, pid):
+    import aiohttp
+
+    body = REQUEST_BODIES.get(path, {})
+    latencies, errors = [], 0
+    peak_rss, peak_threads = 0, 0
+    deadline = time.monotonic() + duration
+    url = f'http://127.0.0.1:{port}{path}'
+
+    async def worker(session):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                async with session.post(url, json=body) as response:
+                    await response.read()
+                    if response.status >= 500:
+                        errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000.0)
+
+    async def sampler():
+        nonlocal peak_rss, peak_threads
+        while time.monotonic() < deadline:
+            rss, threads = _proc_status(pid)
+            peak_rss, peak_threads = max(peak_rss, rss), max(peak_threads, threads)
+            await asyncio.sleep(0.25)
+
+    idle_rss, idle_threads = _proc_status(pid)
+    connector = aiohttp.TCPConnector(limit=0, force_close=True)
+    timeout = aiohttp.ClientTimeout(total=120)
+    started = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        await asyncio.gather(sampler(), *(worker(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(_pct(latencies, 50), 1) if latencies else None,
+        'p95_ms': round(_pct(latencies, 95), 1) if latencies else None,
+        'p99_ms': round(_pct(latencies, 99), 1) if latencies else None,
+        'error_rate': round(errors / max(1, len(latencies)), 4),
+        'idle_rss_kb': idle_rss,
+        'peak_rss_kb': peak_rss,
+        'rss_per_in_flight_kb': round((peak_rss - idle_rss) / concurrency, 1),
+        'idle_threads': idle_threads,
+        'peak_threads': peak_threads
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Threaded Flask vs ASGI serving mode')
+    parser.add_argument('--serve', choices=['threaded', 'async'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--modes', default='threaded,async')
+    parser.add_argument('--concurrency', default='10,100,500')
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--path', default='/api/generate/call-scenario', choices=sorted(REQUEST_BODIES))
+    parser.add_argument('--bedrock-latency', default='const:300')
+    parser.add_argument('--rekognition-latency', default='const:150')
+    parser.add_argument('--polly-latency', default='const:250')
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.port, args)
+        return
+
+    levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+    report = {'path': args.path, 'bedrock_latency': args.bedrock_latency, 'modes': {}}
+    for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+        port = _free_port()
+        cmd = [sys.executable, os.path.abspath(__file__), '--serve', mode, '--port', str(port),
+               '--bedrock-latency', args.bedrock_latency, '--rekognition-latency', args.rekognition_latency,
+               '--polly-latency', args.polly_latency]
+        proc = subprocess.Popen(cmd, cwd=ROOT, stderr=subprocess.DEVNULL)
+        try:
+            _wait_for_port(port)
+            results = []
+            for concurrency in levels:
+                result = asyncio.run(drive(port, args.path, concurrency, args.duration, proc.pid))
+                results.append(result)
+                print(f"{mode:<9} c={concurrency:<5} {result['throughput_rps']:>8.1f} rps "
+                      f"p50={result['p50_ms']}ms p99={result['p99_ms']}ms err={result['error_rate']:.1%} "
+                      f"rss={result['peak_rss_kb'] // 1024}MB threads={result['peak_threads']}", file=sys.stderr)
+            report['modes'][mode] = results
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Cold-start time: importing the app and its subsystems in a fresh interpreter.
+
+Each target runs in a new subprocess (no warm module cache) and is timed
+from inside that process; the result is the median of --rounds runs. The
+heavy optional dependencies each target ended up loading are recorded too,
+and `app` / `analyzer` must not load any of them eagerly.
+
+    python benchmarks/bench_import.py                      # compare with baseline
+    python benchmarks/bench_import.py --save-baseline      # record a new baseline
+    python benchmarks/bench_import.py --importtime app     # top modules by -X importtime
+
+Exits with status 1 when a target is slower than the baseline by more than
+the regression threshold, or when a lightweight target imports a heavy module.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_rules import DEFAULT_BASELINE, compare
+
+HEAVY_MODULES = ('langchain_aws', 'boto3', 'PIL', 'pydub')
+
+# name -> (statement timed in the child, may load heavy modules)
+TARGETS = {
+    'analyzer': ('import analyzer', False),
+    'app': ('import app', False),
+    'app_first_request': ("import app; app.app.test_client().get('/health')", False),
+    'llm': ('import llm; llm.available()', True),
+    'image_analysis': ('import image_analysis', True),
+    'audio': ('import audio; audio.simple_audio_placeholder()', True),
+}
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+exec(sys.argv[1])
+elapsed = time.perf_counter() - start
+heavy = [m for m in sys.argv[2].split(',') if m in sys.modules]
+sys.__stdout__.write('\\n' + json.dumps({'ns': int(elapsed * 1e9), 'heavy': heavy}) + '\\n')
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+    env.setdefault('RATE_LIMIT', 'false')
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def cold_import(statement):
+    proc = subprocess.run([sys.executable, '-c', CHILD, statement, ','.join(HEAVY_MODULES)],
+                          cwd=ROOT, env=child_env(), capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{proc.stderr.strip()}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(statement, rounds):
+    runs = [cold_import(statement) for _ in range(rounds)]
+    samples = sorted(run['ns'] for run in runs)
+    return {
+        'ns_per_op': int(statistics.median(samples)),
+        'min_ms': round(samples[0] / 1e6, 1),
+        'median_ms': round(statistics.median(samples) / 1e6, 1),
+        'heavy_modules': runs[-1]['heavy'],
+    }
+
+
+def importtime_top(statement, limit=15):
+    """Largest cumulative entries from `python -X importtime` for one cold run"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                          cwd=ROOT, env=child_env(), capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return [{'module': name, 'cumulative_ms': round(us / 1000, 1)} for us, name in rows[:limit]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filter', default='', help='only run targets whose name contains this')
+    parser.add_argument('--rounds', type=int, default=5, help='fresh interpreters per target')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=float(os.getenv('BENCH_REGRESSION_THRESHOLD', 0.25)),
+                        help='allowed slowdown vs baseline, e.g. 0.25 = 25%%')
+    parser.add_argument('--importtime', metavar='TARGET', help='also report the slowest imports of one target')
+    parser.add_argument('--save-baseline', action='store_true', help='merge results into the baseline')
+    parser.add_argument('--output', default='-', help='JSON results path, or - for stdout')
+    args = parser.parse_args(argv)
+
+    results = {}
+    eager = []
+    for name, (statement, heavy_allowed) in TARGETS.items():
+        if args.filter not in name:
+            continue
+        result = measure(statement, args.rounds)
+        results[f'cold_start[{name}]'] = result
+        if result['heavy_modules'] and not heavy_allowed:
+            eager.append({'target': name, 'heavy_modules': result['heavy_modules']})
+        print(f"{name:20s} median {result['median_ms']:8.1f} ms  min {result['min_ms']:8.1f} ms  "
+              f"heavy: {', '.join(result['heavy_modules']) or '-'}", file=sys.stderr)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('benchmarks', {})
+    regressions = [] if args.save_baseline else compare(results, baseline, args.threshold)
+
+    report = {
+        'python': sys.version.split()[0],
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'threshold': args.threshold,
+        'benchmarks': results,
+        'eager_heavy_imports': eager,
+        'regressions': regressions
+    }
+    if args.importtime:
+        report['importtime'] = {args.importtime: importtime_top(TARGETS[args.importtime][0])}
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+    if args.save_baseline:
+        merged = dict(baseline)
+        merged.update({name: {'ns_per_op': r['ns_per_op'], 'alloc_peak_bytes': 0} for name, r in results.items()})
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': report['python'], 'generated_at': report['generated_at'],
+                       'benchmarks': dict(sorted(merged.items()))}, f, indent=2)
+            f.write('\n')
+
+    for item in eager:
+        print(f"EAGER IMPORT {item['target']}: {', '.join(item['heavy_modules'])}", file=sys.stderr)
+    for r in regressions:
+        print(f"REGRESSION {r['benchmark']}: {r['baseline_ns_per_op']} -> {r['ns_per_op']} ns/op "
+              f"(+{r['change']:.0%})", file=sys.stderr)
+    return 1 if eager or regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
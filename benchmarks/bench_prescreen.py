@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Speed and agreement benchmark for the local image pre-screen.
+
+Speed: ms/op of image_prescreen.prescreen() for each corpus image.
+Agreement: how often an image the pre-screen would skip is one that
+Rekognition also scores LOW (skip precision), and how many LOW images it
+still sends to Rekognition (missed savings).
+
+    python benchmarks/bench_prescreen.py                        # synthetic labelled corpus
+    python benchmarks/bench_prescreen.py --corpus-dir ~/scam-images \\
+        --rekognition-results benchmarks/rekognition_results.json
+    python benchmarks/bench_prescreen.py --corpus-dir ~/scam-images \\
+        --rekognition-results results.json --record             # call Rekognition once and save
+
+With --corpus-dir, the reference verdict for each image is
+score_rekognition_results() over the recorded detect_text/detect_labels
+responses, so the comparison runs offline after one --record pass.
+Exits with status 1 if skip precision is below --min-agreement.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image
+
+from benchmarks.bench_rules import load_rule_engine, time_per_op
+from benchmarks.corpus import make_prescreen_corpus
+from image_prescreen import IMAGE_PRESCREEN_MIN_CONFIDENCE, prescreen, should_skip_rekognition
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp')
+
+
+def load_directory(corpus_dir):
+    images = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(os.path.join(corpus_dir, name), 'rb') as f:
+                images.append((name, f.read()))
+    return images
+
+
+def rekognition_verdicts(images, results_path, record):
+    """Reference risk level per image from recorded (or freshly recorded) Rekognition responses"""
+    image_module = load_rule_engine()[1]
+    recorded = {}
+    if results_path and os.path.exists(results_path):
+        with open(results_path) as f:
+            recorded = json.load(f)
+
+    if record:
+        client = image_module.aws_clients.registry.client('rekognition')
+        for name, image_bytes in images:
+            if name in recorded:
+                continue
+            recorded[name] = {
+                'TextDetections': client.detect_text(Image={'Bytes': image_bytes}).get('TextDetections', []),
+                'Labels': client.detect_labels(Image={'Bytes': image_bytes}, MaxLabels=20).get('Labels', [])
+            }
+            print(f"recorded {name}", file=sys.stderr)
+        with open(results_path, 'w') as f:
+            json.dump(recorded, f)
+
+    verdicts = {}
+    for name, image_bytes in images:
+        if name not in recorded:
+            continue
+        width, height = Image.open(io.BytesIO(image_bytes)).size
+        result = image_module.score_rekognition_results(
+            {'TextDetections': recorded[name]['TextDetections']}, {'Labels': recorded[name]['Labels']},
+            width, height, len(image_bytes))
+        verdicts[name] = result['risk_level']
+    return verdicts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local image pre-screen: speed and agreement with Rekognition')
+    parser.add_argument('--corpus-dir', help='directory of images; default is the synthetic labelled corpus')
+    parser.add_argument('--rekognition-results', help='JSON of recorded Rekognition responses per file name')
+    parser.add_argument('--record', action='store_true', help='call Rekognition for images missing from the results file')
+    parser.add_argument('--per-kind', type=int, default=8, help='synthetic images per kind')
+    parser.add_argument('--min-confidence', type=float, default=IMAGE_PRESCREEN_MIN_CONFIDENCE)
+    parser.add_argument('--min-agreement', type=float, default=0.98)
+    parser.add_argument('--min-time', type=float, default=0.1)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    if args.corpus_dir:
+        images = load_directory(args.corpus_dir)
+        verdicts = rekognition_verdicts(images, args.rekognition_results, args.record)
+    else:
+        corpus = make_prescreen_corpus(per_kind=args.per_kind)
+        images = [(name, image_bytes) for name, image_bytes, _ in corpus]
+        # Synthetic labels: only the text-free photos would score LOW on Rekognition
+        verdicts = {name: 'LOW' if expected == 'clean' else 'ESCALATE' for name, _, expected in corpus}
+
+    rows = []
+    for name, image_bytes in images:
+        if name not in verdicts:
+            continue
+        screen = prescreen(image_bytes)
+        ns_per_op, _ = time_per_op(lambda b=image_bytes: prescreen(b), args.min_time, args.rounds)
+        rows.append({
+            'image': name,
+            'bytes': len(image_bytes),
+            'ms_per_op': round(ns_per_op / 1e6, 2),
+            'skipped': should_skip_rekognition(screen, args.min_confidence),
+            'confidence': screen['confidence'],
+            'reasons': screen['reasons'],
+            'rekognition': verdicts[name]
+        })
+        r = rows[-1]
+        print(f"{name:<32} {r['ms_per_op']:>7.2f} ms  {'skip' if r['skipped'] else 'escalate':<8} "
+              f"rekognition={r['rekognition']:<8} {', '.join(r['reasons'])}", file=sys.stderr)
+
+    skipped = [r for r in rows if r['skipped']]
+    low = [r for r in rows if r['rekognition'] == 'LOW']
+    false_skips = [r['image'] for r in skipped if r['rekognition'] != 'LOW']
+    times = sorted(r['ms_per_op'] for r in rows)
+    summary = {
+        'images': len(rows),
+        'skip_rate': round(len(skipped) / len(rows), 4) if rows else 0.0,
+        'skip_precision': round(1 - len(false_skips) / len(skipped), 4) if skipped else 1.0,
+        'low_recall': round(sum(1 for r in low if r['skipped']) / len(low), 4) if low else None,
+        'false_skips': false_skips,
+        'ms_per_op_median': times[len(times) // 2] if times else None,
+        'ms_per_op_max': times[-1] if times else None
+    }
+    report = {'min_confidence': args.min_confidence, 'summary': summary, 'images': rows}
+
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+    print(f"skip rate {summary['skip_rate']:.0%}, skip precision {summary['skip_precision']:.1%}, "
+          f"median {summary['ms_per_op_median']} ms/image", file=sys.stderr)
+    if summary['skip_precision'] < args.min_agreement:
+        print(f"❌ Skip precision below {args.min_agreement:.0%}: {', '.join(false_skips)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the rule engine and image heuristics.
+
+Measures ns/op, peak allocated bytes per op and throughput for the
+ScamAnalyzer checks, rule_based_analysis, _has_suspicious_image_patterns,
+URL extraction, text SimHash and domain/phone reputation lookups over a generated corpus (SMS, email, 100 KB article; thumbnail to photo
+sized images), then compares against a stored baseline.
+
+    python benchmarks/bench_rules.py                      # compare with baseline
+    python benchmarks/bench_rules.py --save-baseline      # record a new baseline
+    python benchmarks/bench_rules.py --threshold 0.10 --filter rule_based
+
+Exits with status 1 when any benchmark is slower than the baseline by more
+than the regression threshold.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import make_adversarial_texts, make_images, make_texts
+from domain_reputation import DomainReputation, extract_domains, write_index
+from phone_reputation import BUILTIN_PREFIXES, PhoneReputation
+from text_cache import TextResultCache, simhash
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def load_rule_engine():
+    """Import the rule engine and image helpers quietly (no app, database or AWS clients)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        import analyzer
+        import image_analysis
+    return analyzer, image_analysis
+
+
+def build_benchmarks(modules, seed=0):
+    """Return a list of (name, callable, input_bytes)"""
+    analyzer_module, image_module = modules
+    analyzer = analyzer_module.ScamAnalyzer()
+    texts = make_texts(seed)
+    images = make_images(seed)
+    benches = []
+
+    for size, text in texts.items():
+        n = len(text.encode('utf-8'))
+        benches.append((f'rule_based_analysis[{size}]', lambda t=text: analyzer_module.rule_based_analysis(t), n))
+        benches.append((f'analyze_text[{size}]', lambda t=text: analyzer.analyze_text(t, '+1-202-555-0143'), n))
+        benches.append((f'analyze_email[{size}]',
+                        lambda t=text: analyzer.analyze_email('billing@example.com', 'Your monthly statement', t), n))
+        benches.append((f'analyze_website[{size}]',
+                        lambda t=text: analyzer.analyze_website('https://www.example.com/news', t), n))
+        benches.append((f'extract_domains[{size}]', lambda t=text: extract_domains(t), n))
+        benches.append((f'simhash[{size}]', lambda t=text: simhash(t), n))
+
+    for name, text in make_adversarial_texts().items():
+        benches.append((f'rule_based_analysis[adversarial-{name}]',
+                        lambda t=text: analyzer_module.rule_based_analysis(t), len(text)))
+        benches.append((f'extract_domains[adversarial-{name}]', lambda t=text: extract_domains(t), len(text)))
+
+    for size, data_url in images.items():
+        benches.append((f'_has_suspicious_image_patterns[{size}]',
+                        lambda d=data_url: analyzer._has_suspicious_image_patterns(d), len(data_url)))
+        image_bytes = image_module.decode_image(data_url)[0]
+        benches.append((f'dhash[{size}]', lambda b=image_bytes: image_module.dhash(b), len(image_bytes)))
+
+    benches.extend(hamming_benchmarks(seed))
+    benches.extend(text_cache_benchmarks(seed))
+    benches.extend(domain_reputation_benchmarks(seed))
+    benches.extend(phone_reputation_benchmarks(seed))
+    return benches
+
+
+def hamming_benchmarks(seed=0, entries=100000):
+    """Near-duplicate lookups against a HammingIndex of random 64-bit hashes"""
+    import random
+    from hamming_index import HammingIndex
+
+    rng = random.Random(seed)
+    index = HammingIndex()
+    hashes = [rng.getrandbits(64) for _ in range(entries)]
+    for key, value in enumerate(hashes):
+        index.add(key, value)
+    query = hashes[entries // 2] ^ 0b1010001  # 3 bits away from a stored hash
+    return [(f'HammingIndex.search[{entries // 1000}k,r={radius}]',
+             lambda r=radius: index.search(query, r), 0) for radius in (3, 6)]
+
+
+def text_cache_benchmarks(seed=0, entries=20000):
+    """Near-duplicate lookups (hit, miss) against a full TextResultCache of random SimHashes"""
+    import random
+
+    rng = random.Random(seed)
+    cache = TextResultCache(capacity=entries, enabled=True)
+    hashes = [rng.getrandbits(64) for _ in range(entries)]
+    for value in hashes:
+        cache.store(value, {'result': 'Risk Level: LOW'})
+    near = hashes[entries // 2] ^ 0b1000100010001  # 4 bits away from a stored hash
+    size = f'{entries // 1000}k'
+    return [
+        (f'TextResultCache.lookup[{size},hit]', lambda: cache.lookup(near), 0),
+        (f'TextResultCache.lookup[{size},miss]', lambda: cache.lookup(hashes[0] ^ (1 << 64) - 1), 0)
+    ]
+
+
+def domain_reputation_benchmarks(seed=0, entries=200000):
+    """Host lookups (hit, parent-domain hit, miss) against a memory-mapped index of random domains"""
+    import random
+    import tempfile
+
+    rng = random.Random(seed)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz0123456789'
+    domains = [''.join(rng.choices(alphabet, k=rng.randint(6, 16))) + rng.choice(('.com', '.net', '.xyz', '.co.uk'))
+               for _ in range(entries)]
+    index_path = os.path.join(tempfile.mkdtemp(prefix='bench-domains-'), 'domains.idx')
+    write_index({'.'.join(reversed(d.split('.'))).encode(): 'blocked' for d in domains}, index_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        reputation = DomainReputation(index_path)
+    size = f'{entries // 1000}k'
+    return [
+        (f'DomainReputation.lookup[{size},hit]', lambda: reputation.lookup(domains[entries // 2]), 0),
+        (f'DomainReputation.lookup[{size},subdomain]', lambda: reputation.lookup('login.secure.' + domains[7]), 0),
+        (f'DomainReputation.lookup[{size},miss]', lambda: reputation.lookup('mail.example.com'), 0)
+    ]
+
+
+def phone_reputation_benchmarks(seed=0, entries=200000):
+    """Number lookups (reported, prefix, clean) against an index of random reported NANP numbers"""
+    import random
+    import tempfile
+
+    rng = random.Random(seed)
+    feed_path = os.path.join(tempfile.mkdtemp(prefix='bench-phones-'), 'numbers.txt')
+    with open(feed_path, 'w') as f:
+        f.writelines(f"+1{rng.randint(2002000000, 9899999999)},reported\n" for _ in range(entries))
+        f.write('+1 415 555 0123,robocall\n')
+    with contextlib.redirect_stdout(io.StringIO()):
+        reputation = PhoneReputation(feed_path, builtin_prefixes=BUILTIN_PREFIXES)
+    size = f'{entries // 1000}k'
+    return [
+        (f'PhoneReputation.lookup[{size},reported]', lambda: reputation.lookup('(415) 555-0123'), 0),
+        (f'PhoneReputation.lookup[{size},prefix]', lambda: reputation.lookup('+1 900 555 1234'), 0),
+        (f'PhoneReputation.lookup[{size},clean]', lambda: reputation.lookup('+44 20 7946 0958'), 0)
+    ]
+
+
+def time_per_op(func, min_time=0.2, rounds=7):
+    """Best ns/op over `rounds`; the minimum is the least noisy estimate"""
+    iterations = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_time * 1e9 / rounds or iterations >= 1 << 20:
+            break
+        iterations *= 2
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            for _ in range(iterations):
+                func()
+            samples.append((time.perf_counter_ns() - start) / iterations)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return min(samples), iterations
+
+
+def peak_alloc_per_op(func):
+    """Peak bytes allocated while running func once (tracemalloc)"""
+    func()  # warm caches so one-off allocations are not counted
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - baseline)
+
+
+def run(benches, min_time, rounds):
+    results = {}
+    for name, func, n_bytes in benches:
+        ns_per_op, iterations = time_per_op(func, min_time, rounds)
+        results[name] = {
+            'ns_per_op': round(ns_per_op, 1),
+            'ns_per_byte': round(ns_per_op / n_bytes, 3) if n_bytes else None,
+            'alloc_peak_bytes': peak_alloc_per_op(func),
+            'throughput_mb_s': round(n_bytes / ns_per_op * 1e3, 2) if ns_per_op else None,
+            'input_bytes': n_bytes,
+            'iterations': iterations
+        }
+        r = results[name]
+        print(f"{name:<48} {r['ns_per_op']:>14,.0f} ns/op {r['alloc_peak_bytes']:>12,} B/op "
+              f"{r['throughput_mb_s'] or 0:>10.2f} MB/s", file=sys.stderr)
+    return results
+
+
+def scaling_report(results):
+    """ns/byte spread across input sizes for each adversarial input kind.
+
+    A linear-time matcher keeps the largest/smallest ratio near 1; a
+    backtracking one grows with the input size.
+    """
+    groups = {}
+    for name, r in results.items():
+        if '[adversarial-' not in name:
+            continue
+        base, _, size = name.rstrip(']').rpartition('-')
+        groups.setdefault(base + ']', []).append((r['input_bytes'], r['ns_per_byte']))
+    report = {}
+    for base, points in groups.items():
+        points.sort()
+        report[base] = {
+            'ns_per_byte_by_size': {str(n): v for n, v in points},
+            'largest_vs_smallest': round(points[-1][1] / points[0][1], 2) if len(points) > 1 and points[0][1] else None
+        }
+        print(f"{base:<48} ns/byte across sizes: "
+              f"{', '.join(f'{v:.2f}' for _, v in points)} (x{report[base]['largest_vs_smallest']})", file=sys.stderr)
+    return report
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regression dicts for benchmarks slower than baseline*(1+threshold)"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get('ns_per_op'):
+            continue
+        ratio = current['ns_per_op'] / previous['ns_per_op']
+        current['baseline_ns_per_op'] = previous['ns_per_op']
+        current['change'] = round(ratio - 1.0, 4)
+        if ratio > 1.0 + threshold:
+            regressions.append({'benchmark': name, 'baseline_ns_per_op': previous['ns_per_op'],
+                                'ns_per_op': current['ns_per_op'], 'change': round(ratio - 1.0, 4)})
+    return regressions
+
+
+def main(argv=None, build=build_benchmarks, default_baseline=DEFAULT_BASELINE):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds of measurement per benchmark')
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--baseline', default=default_baseline)
+    parser.add_argument('--threshold', type=float, default=float(os.getenv('BENCH_REGRESSION_THRESHOLD', 0.25)),
+                        help='allowed slowdown vs baseline, e.g. 0.25 = 25%%')
+    parser.add_argument('--save-baseline', action='store_true', help='write results as the new baseline')
+    parser.add_argument('--output', default='-', help='JSON results path, or - for stdout')
+    args = parser.parse_args(argv)
+
+    benches = build(load_rule_engine())
+    if args.filter:
+        benches = [b for b in benches if args.filter in b[0]]
+    results = run(benches, args.min_time, args.rounds)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('benchmarks', {})
+    regressions = [] if args.save_baseline else compare(results, baseline, args.threshold)
+
+    report = {
+        'python': sys.version.split()[0],
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'threshold': args.threshold,
+        'benchmarks': results,
+        'scaling': scaling_report(results),
+        'regressions': regressions
+    }
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+    if args.save_baseline:
+        merged = dict(baseline)
+        merged.update({name: {'ns_per_op': r['ns_per_op'], 'alloc_peak_bytes': r['alloc_peak_bytes']}
+                       for name, r in results.items()})
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': report['python'], 'generated_at': report['generated_at'],
+                       'benchmarks': dict(sorted(merged.items()))}, f, indent=2)
+            f.write('\n')
+        print(f"Saved baseline for {len(results)} benchmarks to {args.baseline}", file=sys.stderr)
+        return 0
+
+    for r in regressions:
+        print(f"❌ REGRESSION {r['benchmark']}: {r['baseline_ns_per_op']:,.0f} -> {r['ns_per_op']:,.0f} ns/op "
+              f"({r['change']:+.1%})", file=sys.stderr)
+    if regressions:
+        return 1
+    print(f"✅ No regressions above {args.threshold:.0%}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Mixed read/write throughput of the SQLite storage layer, before and after tuning.
+
+Writer threads insert AnalysisHistory rows one per transaction (like
+save_analysis() on /analyze) while reader threads run the /history query
+(a user's newest 20 rows). Two configurations run against fresh database
+files with the same schema and seed data:
+
+    default  rollback journal, synchronous=FULL, readers share the write engine
+    tuned    storage.py: WAL, tuned pragmas, separate query-only read pool
+
+    python benchmarks/bench_sqlite.py
+    python benchmarks/bench_sqlite.py --writers 4 --readers 16 --duration 10 --dir /var/tmp
+
+Run it on the disk the database lives on: tmpfs makes fsync nearly free and
+hides most of the synchronous=FULL cost.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+
+import storage
+from models import AnalysisHistory, User, db
+
+TABLE = AnalysisHistory.__table__
+
+
+def build_engines(path, mode):
+    url = f'sqlite:///{path}'
+    write_engine = create_engine(url)
+    if mode == 'default':
+        return write_engine, write_engine
+    storage.tune_sqlite(write_engine)
+    storage.enable_wal(write_engine)
+    return write_engine, storage.create_read_engine(write_engine)
+
+
+def seed(path, rows, users):
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+    rng = random.Random(0)
+    start = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{'id': i, 'email': f'user{i}@example.com'} for i in range(1, users + 1)])
+        conn.execute(insert(TABLE), [{
+            'user_id': rng.randint(1, users), 'text': 'Seed message ' * rng.randint(2, 30),
+            'result': 'Risk Level: LOW\nWarning Signs: none', 'backend': 'rules', 'language': 'en',
+            'created_at': start + timedelta(seconds=i)} for i in range(rows)])
+    engine.dispose()
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 2)
+
+
+def run_mode(mode, directory, args):
+    path = os.path.join(directory, f'{mode}.db')
+    seed(path, args.rows, args.users)
+    write_engine, read_engine = build_engines(path, mode)
+    deadline = time.monotonic() + args.duration
+    latencies = {'read': [], 'write': []}
+    errors = {'read': 0, 'write': 0}
+    lock = threading.Lock()
+
+    def writer(worker):
+        rng = random.Random(f'w{worker}')
+        local, failed = [], 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                with write_engine.begin() as conn:
+                    conn.execute(insert(TABLE).values(
+                        user_id=rng.randint(1, args.users), text='New message ' * rng.randint(2, 30),
+                        result='Risk Level: HIGH', backend='llm', language='en', created_at=datetime.utcnow()))
+                local.append(time.perf_counter() - start)
+            except OperationalError:
+                failed += 1
+        with lock:
+            latencies['write'].extend(local)
+            errors['write'] += failed
+
+    history = select(TABLE).order_by(TABLE.c.created_at.desc()).limit(20)
+
+    def reader(worker):
+        rng = random.Random(f'r{worker}')
+        local, failed = [], 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                with read_engine.connect() as conn:
+                    conn.execute(history.where(TABLE.c.user_id == rng.randint(1, args.users))).all()
+                local.append(time.perf_counter() - start)
+            except OperationalError:
+                failed += 1
+        with lock:
+            latencies['read'].extend(local)
+            errors['read'] += failed
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    write_engine.dispose()
+    read_engine.dispose()
+
+    result = {'mode': mode}
+    for kind in ('read', 'write'):
+        result[f'{kind}s_per_s'] = round(len(latencies[kind]) / args.duration, 1)
+        result[f'{kind}_p50_ms'] = _percentile(latencies[kind], 0.5)
+        result[f'{kind}_p99_ms'] = _percentile(latencies[kind], 0.99)
+        result[f'{kind}_errors'] = errors[kind]
+    print(f"{mode:<8} reads {result['reads_per_s']:>9,.1f}/s (p99 {result['read_p99_ms']} ms)  "
+          f"writes {result['writes_per_s']:>8,.1f}/s (p99 {result['write_p99_ms']} ms)  "
+          f"errors {errors['read']}/{errors['write']}", file=sys.stderr)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SQLite mixed read/write throughput, default vs tuned')
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per configuration')
+    parser.add_argument('--rows', type=int, default=50000, help='seed rows')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--dir', help='directory for the database files (default: a new temp dir)')
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix='bench-sqlite-', dir=args.dir)
+    try:
+        results = [run_mode(mode, directory, args) for mode in ('default', 'tuned')]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    before, after = results
+    speedup = {kind: round(after[f'{kind}s_per_s'] / before[f'{kind}s_per_s'], 2) if before[f'{kind}s_per_s'] else None
+               for kind in ('read', 'write')}
+    report = {'writers': args.writers, 'readers': args.readers, 'duration': args.duration,
+              'seed_rows': args.rows, 'results': results, 'speedup': speedup}
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(f"tuned vs default: reads x{speedup['read']}, writes x{speedup['write']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
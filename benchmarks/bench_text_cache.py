@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Hit rate and false-match rate of the near-duplicate text cache.
+
+Messages are replayed in order through a TextResultCache. A miss stores the
+message's label as its "verdict"; a hit counts as a false match when the
+stored label differs from the message's own. The hit rate is over repeats
+only (messages whose label was already seen), since a first message can
+never hit.
+
+    python benchmarks/bench_text_cache.py                            # synthetic campaign corpus
+    python benchmarks/bench_text_cache.py --corpus messages.jsonl    # {"label": ..., "text": ...} per line
+    python benchmarks/bench_text_cache.py --distances 4,6,7,8,10
+
+Labels in a real corpus can be campaign ids or reviewed verdicts (e.g. the
+risk level a human assigned). Exits with status 1 if the false-match rate at
+TEXT_CACHE_MAX_DISTANCE is above --max-false-match.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_rules import time_per_op
+from benchmarks.corpus import make_text_campaigns
+from text_cache import TEXT_CACHE_MAX_DISTANCE, TextResultCache, simhash
+
+
+def load_corpus(path):
+    messages = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                messages.append((str(record['label']), record['text']))
+    return messages
+
+
+def replay(hashes, max_distance):
+    cache = TextResultCache(capacity=len(hashes) + 1, max_distance=max_distance, enabled=True)
+    seen = set()
+    repeats = hits = 0
+    false_matches = []
+    for i, (label, text_hash) in enumerate(hashes):
+        repeats += label in seen
+        seen.add(label)
+        cached = cache.lookup(text_hash)
+        if cached is None:
+            cache.store(text_hash, {'label': label, 'message': i})
+            continue
+        hits += 1
+        if cached['label'] != label:
+            false_matches.append({'message': i, 'label': label, 'matched': cached['label'],
+                                  'matched_message': cached['message'], 'distance': cached['cache']['distance']})
+    stats = cache.stats()
+    return {
+        'max_distance': max_distance,
+        'hits': hits,
+        'repeat_hit_rate': round(hits / repeats, 4) if repeats else 0.0,
+        'false_match_rate': round(len(false_matches) / hits, 4) if hits else 0.0,
+        'false_matches': false_matches,
+        'skipped_too_short': stats['skipped_too_short'],
+        'entries': stats['entries']
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Near-duplicate text cache: hit rate and false matches')
+    parser.add_argument('--corpus', help='JSONL of {"label", "text"}; default is the synthetic campaign corpus')
+    parser.add_argument('--variants', type=int, default=20, help='synthetic messages per campaign')
+    parser.add_argument('--distances', default='4,6,7,8,10', help='comma-separated max distances to compare')
+    parser.add_argument('--max-false-match', type=float, default=0.01)
+    parser.add_argument('--min-time', type=float, default=0.1)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    messages = load_corpus(args.corpus) if args.corpus else make_text_campaigns(variants=args.variants)
+    hashes = [(label, simhash(text)) for label, text in messages]
+
+    distances = sorted({int(d) for d in args.distances.split(',')} | {TEXT_CACHE_MAX_DISTANCE})
+    sweeps = [replay(hashes, d) for d in distances]
+    for sweep in sweeps:
+        marker = '*' if sweep['max_distance'] == TEXT_CACHE_MAX_DISTANCE else ' '
+        print(f"{marker} distance {sweep['max_distance']:>2}: repeat hit rate {sweep['repeat_hit_rate']:.1%}, "
+              f"false matches {len(sweep['false_matches'])} ({sweep['false_match_rate']:.2%})", file=sys.stderr)
+
+    # Timing on a warm cache holding the whole corpus
+    cache = TextResultCache(capacity=len(hashes) + 1, enabled=True)
+    for label, text_hash in hashes:
+        cache.store(text_hash, {'label': label})
+    sample_text = messages[len(messages) // 2][1]
+    sample_hash = hashes[len(hashes) // 2][1]
+    simhash_ns, _ = time_per_op(lambda: simhash(sample_text), args.min_time, args.rounds)
+    lookup_ns, _ = time_per_op(lambda: cache.lookup(sample_hash), args.min_time, args.rounds)
+
+    current = next(s for s in sweeps if s['max_distance'] == TEXT_CACHE_MAX_DISTANCE)
+    report = {
+        'messages': len(messages),
+        'labels': len({label for label, _ in messages}),
+        'configured_distance': TEXT_CACHE_MAX_DISTANCE,
+        'simhash_us': round(simhash_ns / 1e3, 1),
+        'lookup_us': round(lookup_ns / 1e3, 1),
+        'sweeps': sweeps
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+    print(f"simhash {report['simhash_us']} µs/text, lookup {report['lookup_us']} µs "
+          f"against {cache.stats()['entries']} cached texts", file=sys.stderr)
+    if current['false_match_rate'] > args.max_false_match:
+        print(f"❌ False-match rate {current['false_match_rate']:.2%} at distance {TEXT_CACHE_MAX_DISTANCE} "
+              f"is above {args.max_false_match:.2%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
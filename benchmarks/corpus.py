@@ -0,0 +1,248 @@
+"""Deterministic text and image corpus for the benchmarks"""
+
+import base64
+import io
+import random
+
+FILLER_WORDS = (
+    'the a to of and in is for on that with your you this our we will be are as at from by have it not or '
+    'account team update meeting report project customer order service information please thank regards '
+    'schedule review delivery invoice policy support week month today tomorrow office staff members '
+    'community event weather market city school local news research study results data analysis'
+).split()
+
+SCAM_PHRASES = [
+    'urgent', 'click here', 'verify now', 'account suspended', 'limited time', 'act now',
+    'congratulations you are a winner', 'bank account', 'credit card', 'tax refund', 'bit.ly/x1y2z3',
+    'send me $500 and I give you double your money', 'guaranteed return of 300 dollars', 'free', 'exclusive',
+]
+
+TEXT_SIZES = {
+    'sms': 160,
+    'email': 3 * 1024,
+    'article': 100 * 1024,
+}
+
+IMAGE_SIZES = {
+    'thumb': (64, 64),
+    'vga': (640, 480),
+    'fullhd': (1920, 1080),
+    'photo': (4032, 3024),
+}
+
+
+def make_text(size, seed=0, scam_ratio=0.05):
+    """Return roughly `size` characters of prose with scam phrases mixed in"""
+    rng = random.Random(f"{seed}-{size}")
+    parts = []
+    length = 0
+    while length < size:
+        if rng.random() < scam_ratio:
+            word = rng.choice(SCAM_PHRASES)
+        else:
+            word = rng.choice(FILLER_WORDS)
+        if rng.random() < 0.08:
+            word += '.'
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts)[:size]
+
+
+def make_texts(seed=0):
+    return {name: make_text(size, seed) for name, size in TEXT_SIZES.items()}
+
+
+def make_image_data_url(width, height, seed=0, fmt='JPEG'):
+    """Return a base64 data URL for a synthetic screenshot-like image"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(f"{seed}-{width}x{height}")
+    image = Image.new('RGB', (width, height), color=(245, 245, 245))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, width, max(1, height // 12)], fill=(rng.randint(150, 220), 30, 30))
+    for y in range(height // 8, height, 18):
+        draw.text((10, y), ' '.join(rng.choice(FILLER_WORDS) for _ in range(12)), fill=(20, 20, 20))
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, quality=85)
+    mime = 'jpeg' if fmt == 'JPEG' else fmt.lower()
+    return f"data:image/{mime};base64," + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def make_images(seed=0):
+    return {name: make_image_data_url(w, h, seed) for name, (w, h) in IMAGE_SIZES.items()}
+
+
+ADVERSARIAL_SIZES = {
+    '1k': 1024,
+    '10k': 10 * 1024,
+    '100k': 100 * 1024,
+}
+
+
+def make_adversarial(kind, size):
+    """Single-line worst cases for amount/keyword proximity matching.
+
+    digits:      many numbers, no money keyword (pasted log or spreadsheet row)
+    transfer:    many give/send verbs, no numbers
+    spreadsheet: comma-separated numbers with a money keyword only at the very end
+    """
+    if kind == 'digits':
+        unit = '1024 2048 4096 8192 '
+    elif kind == 'transfer':
+        unit = 'send it, give it, '
+    elif kind == 'spreadsheet':
+        unit = '12,345,678,'
+    else:
+        raise ValueError(f"Unknown adversarial kind: {kind}")
+    text = (unit * (size // len(unit) + 1))[:size]
+    if kind == 'spreadsheet':
+        text = text[:-len(' total cash')] + ' total cash'
+    return text
+
+
+def make_adversarial_texts():
+    return {f"{kind}-{label}": make_adversarial(kind, size)
+            for kind in ('digits', 'transfer', 'spreadsheet')
+            for label, size in ADVERSARIAL_SIZES.items()}
+
+
+def _encode(image, fmt='JPEG', quality=85):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, quality=quality)
+    return buffer.getvalue()
+
+
+def _photo(rng, width, height):
+    """Smooth low-frequency colour field with sensor-like noise, standing in for a camera photo"""
+    import numpy as np
+    from PIL import Image
+
+    np_rng = np.random.default_rng(rng.randrange(1 << 30))
+    coarse = Image.fromarray(np_rng.integers(30, 225, size=(6, 8, 3), dtype=np.uint8))
+    field = np.asarray(coarse.resize((width, height), Image.BICUBIC), dtype=np.float32)
+    field += np_rng.normal(0, 4, size=field.shape)
+    return Image.fromarray(np.clip(field, 0, 255).astype(np.uint8))
+
+
+def _qr_modules(rng, size=25):
+    """Random QR-like module grid with the three 7x7 finder patterns"""
+    grid = [[rng.random() < 0.5 for _ in range(size)] for _ in range(size)]
+    for top, left in ((0, 0), (0, size - 7), (size - 7, 0)):
+        for y in range(-1, 8):
+            for x in range(-1, 8):
+                if not (0 <= top + y < size and 0 <= left + x < size):
+                    continue
+                ring = max(abs(y - 3), abs(x - 3))
+                grid[top + y][left + x] = ring in (0, 1, 3) if ring <= 3 else False
+    return grid
+
+
+def make_prescreen_corpus(seed=0, per_kind=6):
+    """Labelled images for the pre-screen benchmark: [(name, image_bytes, expected)].
+
+    expected is 'clean' for text-free photos (Rekognition scores them LOW)
+    and 'escalate' for screenshots, QR flyers and alert banners, which need
+    Rekognition to read their text.
+    """
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(f"prescreen-{seed}")
+    sizes = [(1024, 768), (1920, 1080), (800, 600), (1280, 960)]
+    corpus = []
+    for i in range(per_kind):
+        width, height = sizes[i % len(sizes)]
+
+        corpus.append((f'photo-{i}', _encode(_photo(rng, width, height)), 'clean'))
+
+        screenshot = Image.new('RGB', (width, height), (250, 250, 250))
+        draw = ImageDraw.Draw(screenshot)
+        for y in range(40, height - 20, 22):
+            draw.text((30, y), ' '.join(rng.choice(FILLER_WORDS + SCAM_PHRASES) for _ in range(14)), fill=(25, 25, 25))
+        corpus.append((f'screenshot-{i}', _encode(screenshot), 'escalate'))
+
+        flyer = _photo(rng, width, height)
+        draw = ImageDraw.Draw(flyer)
+        module = max(4, min(width, height) // 60)
+        left, top = width - 27 * module - 20, height - 27 * module - 20
+        draw.rectangle([left - module, top - module, left + 26 * module, top + 26 * module], fill=(255, 255, 255))
+        for y, row in enumerate(_qr_modules(rng)):
+            for x, on in enumerate(row):
+                if on:
+                    draw.rectangle([left + x * module, top + y * module,
+                                    left + (x + 1) * module - 1, top + (y + 1) * module - 1], fill=(0, 0, 0))
+        corpus.append((f'qr-flyer-{i}', _encode(flyer), 'escalate'))
+
+        alert = _photo(rng, width, height)
+        draw = ImageDraw.Draw(alert)
+        draw.rectangle([0, 0, width, height // 7], fill=(rng.randint(190, 230), 25, 25))
+        draw.text((20, height // 20), 'WARNING: your device is infected', fill=(255, 255, 255))
+        corpus.append((f'alert-banner-{i}', _encode(alert), 'escalate'))
+    return corpus
+
+
+CAMPAIGN_TEMPLATES = {
+    'package-fee': "Hi {name}, your parcel {ref} could not be delivered because of an unpaid customs fee of {amount}. "
+                   "Pay within 24 hours at {url} or it will be returned to the sender.",
+    'bank-lock': "{bank} ALERT: Dear {name}, we detected unusual sign-in activity and your account has been locked. "
+                 "Verify your identity now at {url} to restore access.",
+    'tax-refund': "Dear {name}, you are eligible for a tax refund of {amount}. To receive your refund please "
+                  "submit your card details at {url} before {date}.",
+    'crypto-double': "Hello {name}, my investment group made {amount} profit last week. Send me {amount2} in bitcoin "
+                     "and I guarantee you double your money in 7 days. Message me on {phone}.",
+    'grandchild': "Grandma it's {name}, I lost my phone and I'm in trouble. I need {amount} for bail tonight, "
+                  "please don't tell mom. Send it through {url} and I will pay you back.",
+    'prize': "Congratulations {name}! Your number was selected as the winner of {amount} in our annual draw. "
+             "Claim your prize at {url} by paying a small processing fee.",
+    'tech-support': "Microsoft Security: {name}, your computer is infected with {count} viruses. Call our certified "
+                    "technicians at {phone} immediately to prevent data loss.",
+    'job-offer': "Hi {name}, we reviewed your profile and offer a remote job paying {amount} per day for liking "
+                 "videos. Contact our HR manager on WhatsApp {phone} to start today.",
+    'toll-unpaid': "{bank} Toll Services: You have an outstanding toll balance of {amount}. Avoid a late fee of "
+                   "{amount2} by settling at {url} today.",
+    'romance-visa': "My love {name}, the embassy will not release my visa until I pay {amount}. You are the only "
+                    "one I trust, please wire the money to account {ref} and we can finally meet.",
+    # Legitimate messages that share vocabulary with the scams above
+    'order-shipped': "Hi {name}, good news! Your order {ref} has shipped and should arrive on {date}. "
+                     "You can follow the delivery in the app.",
+    'appointment': "Reminder: {name}, you have a dental appointment on {date} at {time}. Reply C to confirm "
+                   "or call the office to reschedule.",
+    'statement': "{bank}: Your monthly statement for the account ending {count} is ready. Log in through the "
+                 "official app to view it. We will never ask for your password.",
+    'team-lunch': "Hey {name}, the team lunch moved to {date} at {time}. We booked a table for {count} people, "
+                  "let me know if you can make it.",
+}
+
+CAMPAIGN_NAMES = ['Alex', 'Maria', 'John', 'Priya', 'Chen', 'Fatima', 'Sam', 'Olga', 'David', 'Aisha', 'Tom', 'Lucia']
+CAMPAIGN_BANKS = ['Chase', 'Wells Fargo', 'Barclays', 'HSBC', 'Citi', 'E-ZPass', 'FasTrak']
+CAMPAIGN_DOMAINS = ['secure-verify', 'pay-fee', 'claim-now', 'account-help', 'delivery-update', 'refund-portal']
+CAMPAIGN_OPENERS = ['', '', 'URGENT: ', 'Notice: ', 'Important - ']
+CAMPAIGN_CLOSERS = ['', '', ' Thank you.', ' Regards.', ' Reply STOP to opt out.']
+
+
+def _fill_campaign(template, rng):
+    amount = rng.randint(2, 5000)
+    return template.format(
+        name=rng.choice(CAMPAIGN_NAMES), bank=rng.choice(CAMPAIGN_BANKS),
+        amount=f'${amount}.{rng.randint(0, 99):02d}', amount2=f'${amount * rng.randint(2, 5)}',
+        url=f'https://{rng.choice(CAMPAIGN_DOMAINS)}-{rng.randint(10, 999)}.{rng.choice(["com", "info", "xyz"])}/{rng.randint(1000, 99999)}',
+        ref=f'{rng.choice("ABCDEFGH")}{rng.randint(100000, 999999)}', phone=f'+1 {rng.randint(200, 989)} 555 {rng.randint(1000, 9999)}',
+        date=f'{rng.randint(1, 12)}/{rng.randint(1, 28)}', time=f'{rng.randint(8, 17)}:{rng.choice(["00", "15", "30", "45"])}',
+        count=rng.randint(2, 9999))
+
+
+def make_text_campaigns(seed=0, variants=20):
+    """Labelled paraphrase corpus for the text cache benchmark: [(campaign, text)] in arrival order.
+
+    Each campaign template is sent `variants` times with different names,
+    amounts, links and reference numbers and an occasional opener or
+    closer, the way one scam script is re-sent with small edits. A cache
+    match between two different campaigns is a false match.
+    """
+    rng = random.Random(f"campaigns-{seed}")
+    messages = []
+    for campaign, template in CAMPAIGN_TEMPLATES.items():
+        for _ in range(variants):
+            text = rng.choice(CAMPAIGN_OPENERS) + _fill_campaign(template, rng) + rng.choice(CAMPAIGN_CLOSERS)
+            messages.append((campaign, text))
+    rng.shuffle(messages)
+    return messages
@@ -0,0 +1,186 @@
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Error codes that mean the service is overloaded, not that the request was bad
+THROTTLING_CODES = frozenset({
+    'ThrottlingException', 'Throttling', 'ThrottledException', 'TooManyRequestsException',
+    'ProvisionedThroughputExceededException', 'RequestLimitExceeded', 'RequestThrottled',
+    'RequestThrottledException', 'SlowDown', 'ServiceUnavailableException', 'ModelNotReadyException',
+})
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the service circuit is open"""
+
+    def __init__(self, service):
+        super().__init__(f"{service} circuit is open")
+        self.service = service
+
+
+def is_service_failure(error):
+    """True if error shows the service is unhealthy: throttling, a 5xx, a timeout or no connection.
+
+    Errors the caller caused (4xx validation errors such as Rekognition's
+    InvalidImageFormatException or Bedrock's ValidationException) say
+    nothing about the service and are not counted. Wrapped errors (e.g.
+    langchain re-raising a ClientError as ValueError) are classified by
+    the botocore error they wrap.
+    """
+    from botocore.exceptions import ClientError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError
+
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, (ReadTimeoutError, ConnectTimeoutError, EndpointConnectionError)):
+            return True
+        if isinstance(error, ClientError):
+            code = error.response.get('Error', {}).get('Code', '')
+            status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode') or 0
+            return code in THROTTLING_CODES or status >= 500
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class CircuitBreaker:
+    """Per-service circuit breaker.
+
+    CLOSED: calls go through; consecutive failures or slow calls are counted
+    (only service failures: see is_service_failure).
+    OPEN: calls are rejected so callers use their fallback right away.
+    HALF_OPEN: after reset_timeout a limited number of probe calls go through;
+    a successful probe closes the circuit, a failed one opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, slow_call_seconds=10.0,
+                 reset_timeout=30.0, half_open_max_calls=1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._total_failures = 0
+        self._total_slow_calls = 0
+        self._total_rejected = 0
+        self._last_error = None
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_in_flight = 0
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._half_open_in_flight = 0
+        log.warning("Circuit opened for %s after %d consecutive failures", self.name, self._consecutive_failures)
+
+    def allow_request(self):
+        """Return True if a call may go to the service right now"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self._total_rejected += 1
+            return False
+
+    def record_success(self, elapsed=0.0):
+        if elapsed >= self.slow_call_seconds:
+            self.record_failure(elapsed=elapsed, slow=True)
+            return
+        with self._lock:
+            if self._state != self.CLOSED:
+                log.info("Circuit closed for %s", self.name)
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._half_open_in_flight = 0
+
+    def record_failure(self, error=None, elapsed=0.0, slow=False):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._total_failures += 1
+            if slow:
+                self._total_slow_calls += 1
+                self._last_error = f"slow call ({elapsed:.2f}s)"
+            elif error is not None:
+                self._last_error = str(error)[:200]
+
+            if self._state == self.HALF_OPEN:
+                self._open()
+            elif self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def record_error(self, error, elapsed=0.0):
+        """Count a failed call if the service is to blame; otherwise only free its half-open probe slot"""
+        if is_service_failure(error):
+            self.record_failure(error=error, elapsed=elapsed)
+            return
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+    def call(self, func, *args, **kwargs):
+        """Run func through the breaker, raising CircuitOpenError when open"""
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_error(e, time.monotonic() - start)
+            raise
+        self.record_success(time.monotonic() - start)
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            self._maybe_half_open()
+            retry_in = 0.0
+            if self._state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                'state': self._state,
+                'available': self._state != self.OPEN,
+                'consecutive_failures': self._consecutive_failures,
+                'total_failures': self._total_failures,
+                'slow_calls': self._total_slow_calls,
+                'rejected_calls': self._total_rejected,
+                'retry_in_seconds': round(retry_in, 1),
+                'last_error': self._last_error
+            }
+
+
+def _breaker_from_env(name):
+    prefix = f"CIRCUIT_{name.upper()}_"
+    return CircuitBreaker(
+        name,
+        failure_threshold=int(os.getenv(prefix + 'FAILURE_THRESHOLD', os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))),
+        slow_call_seconds=float(os.getenv(prefix + 'SLOW_CALL_SECONDS', os.getenv('CIRCUIT_SLOW_CALL_SECONDS', 10))),
+        reset_timeout=float(os.getenv(prefix + 'RESET_SECONDS', os.getenv('CIRCUIT_RESET_SECONDS', 30)))
+    )
+
+
+breakers = {name: _breaker_from_env(name) for name in ('bedrock', 'rekognition', 'polly')}
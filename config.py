@@ -0,0 +1,28 @@
+"""
+Flask settings for create_app() and the instance directory.
+
+Importing this module loads .env, so import it before any module that
+reads its settings from the environment at import time.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Flask's default instance path for app.py; also holds the on-disk indexes and caches
+INSTANCE_DIR = os.path.join(ROOT, 'instance')
+
+
+class Config:
+    SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-this')
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///scamsense.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-this')
+    JWT_ACCESS_TOKEN_EXPIRES = False  # Tokens don't expire
+    # Largest request body, chunked uploads included; the default fits the
+    # image batch route's BATCH_MAX_BYTES once base64-encoded in JSON
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH')
+                             or int(os.getenv('BATCH_MAX_BYTES', 50 * 1024 * 1024)) * 4 // 3 + 64 * 1024)
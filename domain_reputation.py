@@ -0,0 +1,368 @@
+"""
+URL/domain extraction and a memory-mapped domain reputation index.
+
+The index is a single file holding every blocked domain as reversed labels
+("login.evil.com" -> "com.evil.login") in sorted order, with a u32 offset
+table and a category byte per entry. Lookups binary-search the mmap for the
+host and each of its parent domains, so a feed with millions of entries
+costs one page-cache copy shared by every pre-forked worker and a handful
+of comparisons per query.
+
+    python domain_reputation.py build blocklist.txt instance/domain_reputation.idx
+    python domain_reputation.py lookup instance/domain_reputation.idx login.evil.com
+
+Feed lines are "domain", "domain,category" or hosts-file style
+"0.0.0.0 domain"; blank lines and # comments are ignored.
+"""
+
+import bisect
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'SSDR'
+VERSION = 1
+HEADER = struct.Struct('<4sIQI')  # magic, version, entry count, categories json length
+FENCE_STRIDE = 256  # every Nth key is kept in memory to narrow the on-disk binary search
+DOMAIN_INDEX_CHECK_SECONDS = float(os.getenv('DOMAIN_INDEX_CHECK_SECONDS', 30))
+
+# Public suffixes with more than one label that are common in scam traffic;
+# registrable_domain() keeps one more label under these.
+MULTI_LABEL_SUFFIXES = {
+    'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'me.uk', 'com.au', 'net.au', 'org.au', 'co.nz', 'co.jp',
+    'co.in', 'co.za', 'co.kr', 'com.br', 'com.cn', 'com.mx', 'com.tr', 'com.sg', 'com.hk', 'com.ng',
+    'com.ph', 'com.pk', 'com.ar', 'com.co', 'com.vn', 'com.my', 'com.ua', 'net.cn', 'org.cn',
+    'github.io', 'blogspot.com', 'herokuapp.com', 'appspot.com', 'web.app', 'firebaseapp.com',
+    'netlify.app', 'vercel.app', 'pages.dev', 'workers.dev', 'azurewebsites.net', 'ngrok.io',
+}
+
+_LABEL = r'[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?'
+_TLD = r'(?:[a-z]{2,24}|xn--[a-z0-9-]{1,59})'
+URL_RE = re.compile(r'(?:\b(?:https?|hxxps?)://|\bwww\.)[^\s<>"\'`{}|\\^\[\]]+', re.IGNORECASE)
+HOST_RE = re.compile(rf'(?<![\w@.-])((?:{_LABEL}\.)+{_TLD})(?![\w-]|\.[a-z0-9])', re.IGNORECASE)
+LINK_DOT_RE = re.compile(r'\.(?=[a-z0-9])', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s')
+URL_TRAILING = '.,;:!?)\'"'  # sentence punctuation after a link
+MAX_TOKEN = 2048  # longest URL considered, in characters
+IPV4_RE = re.compile(r'^\d{1,3}(?:\.\d{1,3}){3}$')
+# Bare "word.tld" text is only taken as a host for TLDs that show up in links;
+# this keeps "e.g.", "file.txt" and sentence typos out of the lookups.
+BARE_HOST_TLDS = {
+    'com', 'net', 'org', 'info', 'biz', 'io', 'co', 'me', 'app', 'dev', 'xyz', 'top', 'site', 'online',
+    'shop', 'store', 'club', 'live', 'link', 'click', 'ly', 'gl', 'gd', 'to', 'cc', 'ru', 'cn', 'tk',
+    'ml', 'ga', 'cf', 'gq', 'us', 'uk', 'ca', 'de', 'fr', 'in', 'au', 'br', 'gov', 'edu', 'mobi',
+    'support', 'help', 'services', 'finance', 'bank', 'loan', 'win', 'vip', 'work', 'icu', 'buzz',
+}
+
+
+def normalize_host(host):
+    """Lower-case, strip userinfo/port/trailing dot and IDNA-encode a host name"""
+    host = host.strip().lower()
+    host = host.rpartition('@')[2]
+    if host.startswith('['):
+        return host.partition(']')[0] + ']'
+    host = host.partition(':')[0].rstrip('.')
+    if not host.isascii():
+        try:
+            host = host.encode('idna').decode('ascii')
+        except UnicodeError:
+            pass
+    return host
+
+
+def url_host(url):
+    """Host part of a URL, with or without a scheme"""
+    rest = url.split('://', 1)[1] if '://' in url else url
+    for stop in '/?#':
+        rest = rest.split(stop, 1)[0]
+    return normalize_host(rest)
+
+
+def registrable_domain(host):
+    """evil.co.uk for login.evil.co.uk; the host itself for IP literals"""
+    if IPV4_RE.match(host) or host.startswith('['):
+        return host
+    labels = host.split('.')
+    if len(labels) >= 3 and '.'.join(labels[-2:]) in MULTI_LABEL_SUFFIXES:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def _link_tokens(text):
+    """Whitespace-delimited tokens that contain a dot followed by a letter or digit.
+
+    Scanning for the dot first (a literal-prefixed search) and running the
+    URL/host patterns only on the surrounding token keeps extraction cheap
+    on long prose, where almost every dot ends a sentence.
+    """
+    end = 0
+    for match in LINK_DOT_RE.finditer(text):
+        dot = match.start()
+        if dot < end:
+            continue
+        window = max(0, dot - MAX_TOKEN)
+        start = max(text.rfind(' ', window, dot), text.rfind('\n', window, dot), text.rfind('\t', window, dot)) + 1
+        space = WHITESPACE_RE.search(text, dot, dot + MAX_TOKEN)
+        end = space.start() if space else min(len(text), dot + MAX_TOKEN)
+        yield text[start or window:end]
+
+
+def extract_urls(text):
+    return [match.group(0).rstrip(URL_TRAILING)
+            for token in _link_tokens(text) for match in URL_RE.finditer(token)]
+
+
+def extract_domains(text):
+    """Distinct hosts linked from text: URLs, www. names and bare example.com mentions"""
+    hosts = {}
+    for token in _link_tokens(text):
+        for match in URL_RE.finditer(token):
+            host = url_host(match.group(0).rstrip(URL_TRAILING))
+            if host:
+                hosts.setdefault(host, None)
+        for match in HOST_RE.finditer(token):
+            host = normalize_host(match.group(1))
+            if host.rsplit('.', 1)[-1] in BARE_HOST_TLDS:
+                hosts.setdefault(host, None)
+    return list(hosts)
+
+
+def _index_key(host):
+    return '.'.join(reversed(host.split('.'))).encode('ascii', 'ignore')
+
+
+def parse_feed_line(line):
+    """(host, category) from a feed line, or None"""
+    line = line.split('#', 1)[0].strip()
+    if not line:
+        return None
+    if ',' in line:
+        host, _, category = line.partition(',')
+    else:
+        parts = line.split()
+        host = parts[1] if len(parts) > 1 and IPV4_RE.match(parts[0]) else parts[0]
+        category = 'blocked'
+    host = normalize_host(host)
+    if '.' not in host:
+        return None
+    return host, category.strip() or 'blocked'
+
+
+def build_index(feed_path, index_path):
+    """Compile a feed file into a sorted, memory-mappable index; returns the entry count"""
+    entries = {}
+    with open(feed_path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            parsed = parse_feed_line(line)
+            if parsed:
+                entries[_index_key(parsed[0])] = parsed[1]
+    write_index(entries, index_path)
+    return len(entries)
+
+
+def write_index(entries, index_path):
+    """entries: {reversed key bytes: category}; written atomically (temp file + rename)"""
+    keys = sorted(entries)
+    categories = sorted(set(entries.values()))
+    category_ids = {name: i for i, name in enumerate(categories)}
+    categories_json = json.dumps(categories).encode('utf-8')
+
+    offsets = [0]
+    for key in keys:
+        offsets.append(offsets[-1] + len(key))
+
+    directory = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(keys), len(categories_json)))
+            f.write(categories_json)
+            f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+            for key in keys:
+                f.write(key)
+            f.write(bytes(category_ids[entries[key]] for key in keys))
+        os.replace(tmp_path, index_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class _Keys:
+    """Sequence view of the mmap'd keys so bisect can search them in place"""
+
+    def __init__(self, buf, offsets, base, count):
+        self.buf, self.offsets, self.base, self.count = buf, offsets, base, count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return self.buf[self.base + self.offsets[i]:self.base + self.offsets[i + 1]]
+
+
+class MappedDomainIndex:
+    """Read-only view over an index file written by write_index()"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mtime = os.fstat(f.fileno()).st_mtime
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, categories_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a domain reputation index")
+        position = HEADER.size
+        self.categories = json.loads(self._mm[position:position + categories_len])
+        position += categories_len
+        self.count = count
+        self._offsets = memoryview(self._mm)[position:position + 4 * (count + 1)].cast('I')
+        blob_start = position + 4 * (count + 1)
+        self._category_base = blob_start + (self._offsets[count] if count else 0)
+        self._keys = _Keys(self._mm, self._offsets, blob_start, count)
+        self._fences = [self._keys[i] for i in range(0, count, FENCE_STRIDE)]
+
+    def category(self, host):
+        key = _index_key(host)
+        block = bisect.bisect_right(self._fences, key) - 1
+        if block < 0:
+            return None
+        lo = block * FENCE_STRIDE
+        i = bisect.bisect_left(self._keys, key, lo, min(lo + FENCE_STRIDE, self.count))
+        if i < self.count and self._keys[i] == key:
+            return self.categories[self._mm[self._category_base + i]]
+        return None
+
+    def close(self):
+        self._offsets.release()
+        self._mm.close()
+
+
+class DomainReputation:
+    """Blocked-domain lookups by host and parent domain.
+
+    Combines the memory-mapped index (if present) with a small in-memory
+    set of built-in entries. The index file is re-opened when it is
+    replaced on disk, checked at most every DOMAIN_INDEX_CHECK_SECONDS.
+    """
+
+    def __init__(self, index_path=None, feed_path=None, builtin=None, check_seconds=DOMAIN_INDEX_CHECK_SECONDS):
+        self.index_path = index_path
+        self.feed_path = feed_path
+        self.builtin = {normalize_host(host): category for host, category in (builtin or {}).items()}
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._index = None
+        self._checked_at = 0.0
+        self.lookups = 0
+        self.hits = 0
+        self._build_if_stale()
+        self._open()
+
+    def _build_if_stale(self):
+        if not self.feed_path or not self.index_path or not os.path.exists(self.feed_path):
+            return
+        if os.path.exists(self.index_path) and os.path.getmtime(self.index_path) >= os.path.getmtime(self.feed_path):
+            return
+        start = time.perf_counter()
+        count = build_index(self.feed_path, self.index_path)
+        log.info("Built domain reputation index", extra={'domains': count,
+                                                         'seconds': round(time.perf_counter() - start, 1)})
+
+    def _open(self):
+        if not self.index_path or not os.path.exists(self.index_path):
+            return
+        try:
+            index = MappedDomainIndex(self.index_path)
+        except Exception as e:
+            log.warning("Could not open domain reputation index %s: %s", self.index_path, e)
+            return
+        # The old index is not closed here: lookups on other threads may still
+        # hold it, and closing releases the mmap under them. It is unmapped
+        # when the last reference goes.
+        self._index = index
+        log.info("Domain reputation index loaded", extra={'domains': index.count})
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_seconds or not self.index_path:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_seconds:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.index_path)
+            except OSError:
+                return
+            if self._index is None or mtime != self._index.mtime:
+                self._open()
+
+    def lookup(self, host):
+        """(matched domain, category) for host or its nearest blocked parent, else None"""
+        self._refresh()
+        host = normalize_host(host)
+        self.lookups += 1
+        labels = host.split('.')
+        index = self._index
+        for i in range(len(labels) - 1):
+            candidate = '.'.join(labels[i:])
+            category = self.builtin.get(candidate)
+            if category is None and index is not None:
+                category = index.category(candidate)
+            if category is not None:
+                self.hits += 1
+                return candidate, category
+        return None
+
+    def check_text(self, text):
+        """Blocked and raw-IP links in text: {'domains': [...], 'blocked': [...], 'ip_links': [...]}"""
+        domains = extract_domains(text)
+        blocked, ip_links = [], []
+        for host in domains:
+            if IPV4_RE.match(host):
+                ip_links.append(host)
+                continue
+            match = self.lookup(host)
+            if match:
+                blocked.append({'host': host, 'domain': registrable_domain(host),
+                                'matched': match[0], 'category': match[1]})
+        return {'domains': domains, 'blocked': blocked, 'ip_links': ip_links}
+
+    def stats(self):
+        return {
+            'indexed_domains': self._index.count if self._index is not None else 0,
+            'builtin_domains': len(self.builtin),
+            'lookups': self.lookups,
+            'hits': self.hits
+        }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) == 3 and argv[0] == 'build':
+        start = time.perf_counter()
+        count = build_index(argv[1], argv[2])
+        print(f"Indexed {count} domains into {argv[2]} in {time.perf_counter() - start:.1f}s")
+        return 0
+    if len(argv) >= 3 and argv[0] == 'lookup':
+        reputation = DomainReputation(argv[1])
+        for host in argv[2:]:
+            print(f"{host}: {reputation.lookup(host) or 'not listed'}")
+        return 0
+    print(__doc__.strip().split('\n\n')[1])
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+from itertools import combinations
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class HammingIndex:
+    """Multi-index hashing over fixed-width integer hashes.
+
+    Each hash is split into `chunks` equal bit ranges and filed under every
+    chunk value in its own table. Two hashes within distance r of each other
+    must agree to within r // chunks bits on at least one chunk
+    (pigeonhole), so a search only probes the chunk values within that
+    sub-radius and verifies the few candidates it finds, instead of
+    comparing against every stored hash.
+    """
+
+    def __init__(self, bits=64, chunks=4):
+        if bits % chunks:
+            raise ValueError('bits must be divisible by chunks')
+        self.bits = bits
+        self.chunks = chunks
+        self.chunk_bits = bits // chunks
+        self._mask = (1 << self.chunk_bits) - 1
+        self._tables = [{} for _ in range(chunks)]
+        self._hashes = {}  # key -> hash
+        self._mask_cache = {}
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, key):
+        return key in self._hashes
+
+    def _split(self, value):
+        return [(value >> (i * self.chunk_bits)) & self._mask for i in range(self.chunks)]
+
+    def add(self, key, value):
+        if key in self._hashes:
+            self.remove(key)
+        self._hashes[key] = value
+        for table, part in zip(self._tables, self._split(value)):
+            table.setdefault(part, set()).add(key)
+
+    def remove(self, key):
+        value = self._hashes.pop(key, None)
+        if value is None:
+            return
+        for table, part in zip(self._tables, self._split(value)):
+            bucket = table.get(part)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[part]
+
+    def _flip_masks(self, radius):
+        """XOR masks for every chunk value within `radius` bits, 0 first"""
+        masks = self._mask_cache.get(radius)
+        if masks is None:
+            masks = [0]
+            for r in range(1, radius + 1):
+                for positions in combinations(range(self.chunk_bits), r):
+                    masks.append(sum(1 << p for p in positions))
+            self._mask_cache[radius] = masks
+        return masks
+
+    def search(self, value, radius):
+        """All (distance, key) pairs within `radius` bits of value, nearest first"""
+        masks = self._flip_masks(radius // self.chunks)
+        hashes = self._hashes
+        seen = set()
+        matches = []
+        for table, part in zip(self._tables, self._split(value)):
+            for mask in masks:
+                bucket = table.get(part ^ mask)
+                if not bucket:
+                    continue
+                for key in bucket:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    distance = bin(value ^ hashes[key]).count('1')
+                    if distance <= radius:
+                        matches.append((distance, key))
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def nearest(self, value, radius):
+        """(distance, key) of the closest hash within radius, or None"""
+        matches = self.search(value, radius)
+        return matches[0] if matches else None
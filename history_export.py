@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Incremental Parquet export of AnalysisHistory for offline analytics.
+
+    python history_export.py                          # export rows added since the last run
+    python history_export.py --interval 300           # keep exporting every 5 minutes
+    python history_export.py --out /data/history --database-url sqlite:////srv/scamsense.db
+
+Rows are read in id order, EXPORT_BATCH_SIZE at a time, each batch in its
+own short read-only query (keyset pagination on id), so the live database
+is never held locked by an export and memory stays at one batch however
+large the table is. Batches are appended as row groups to Hive-style
+partitions:
+
+    <out>/date=2026-10-19/part-000000012345.parquet
+
+named by the first id they hold. The highest exported id (the high-water
+mark) is recorded in <out>/_state.json only after a file has been closed
+and renamed into place, so an interrupted run loses at most its open file
+and the next run re-creates it under the same name.
+
+Analysts query the export directory, never the database:
+
+    import pyarrow.dataset as ds
+    table = ds.dataset('instance/exports/analysis_history', partitioning='hive').to_table(
+        filter=ds.field('risk_level') == 'HIGH', columns=['id', 'created_at', 'backend'])
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from config import INSTANCE_DIR
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///scamsense.db')
+EXPORT_DIR = os.getenv('EXPORT_DIR') or os.path.join(INSTANCE_DIR, 'exports', 'analysis_history')
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 5000))
+EXPORT_MAX_ROWS_PER_FILE = int(os.getenv('EXPORT_MAX_ROWS_PER_FILE', 1000000))
+
+STATE_FILE = '_state.json'
+RISK_LEVEL_RE = re.compile(r'risk\s*level\W{0,4}(high|medium|low)', re.IGNORECASE)
+
+SELECT_SQL = text(
+    'SELECT id, user_id, created_at, backend, language, text, result FROM analysis_history '
+    'WHERE id > :after ORDER BY id LIMIT :limit')
+
+# Low-cardinality columns are plain strings in the schema (so batches with
+# different value sets still concatenate); Parquet dictionary-encodes them on disk.
+SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('user_id', pa.int64()),
+    ('created_at', pa.timestamp('us')),
+    ('risk_level', pa.string()),  # HIGH / MEDIUM / LOW parsed from the result; null if absent
+    ('backend', pa.string()),     # llm / cache / rules; null for rows saved before it was recorded
+    ('language', pa.string()),
+    ('text_chars', pa.int32()),
+    ('text', pa.string()),
+    ('result', pa.string()),
+])
+
+
+def read_only_url(database_url, instance_dir=INSTANCE_DIR):
+    """Resolve relative SQLite paths the way Flask-SQLAlchemy does and open them read-only"""
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return url
+    path = url.database
+    if not os.path.isabs(path):
+        path = os.path.join(instance_dir, path)
+    return url.set(database=f'file:{path}?mode=ro', query={'uri': 'true'})
+
+
+def risk_level(result):
+    match = RISK_LEVEL_RE.search(result or '')
+    return match.group(1).upper() if match else None
+
+
+def _partition(created_at):
+    return f"date={created_at:%Y-%m-%d}" if created_at else 'date=unknown'
+
+
+def _parse_timestamp(value):
+    # SQLite hands DateTime columns back as strings through a plain text() query
+    if value is None or not isinstance(value, str):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def record_batch(rows):
+    columns = list(zip(*rows))
+    ids, user_ids, created, backends, languages, texts, results = columns
+    return pa.record_batch([
+        pa.array(ids, pa.int64()),
+        pa.array(user_ids, pa.int64()),
+        pa.array(created, pa.timestamp('us')),
+        pa.array([risk_level(r) for r in results], pa.string()),
+        pa.array(backends, pa.string()),
+        pa.array(languages, pa.string()),
+        pa.array([len(t) if t is not None else None for t in texts], pa.int32()),
+        pa.array(texts, pa.string()),
+        pa.array(results, pa.string()),
+    ], schema=SCHEMA)
+
+
+def load_state(out_dir):
+    try:
+        with open(os.path.join(out_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'high_water_mark': 0}
+
+
+def save_state(out_dir, state):
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, os.path.join(out_dir, STATE_FILE))
+
+
+class _PartFile:
+    """One Parquet file being written: a temp name until close() renames it into place"""
+
+    def __init__(self, out_dir, partition, first_id):
+        directory = os.path.join(out_dir, partition)
+        os.makedirs(directory, exist_ok=True)
+        self.partition = partition
+        self.path = os.path.join(directory, f'part-{first_id:012d}.parquet')
+        self.tmp_path = self.path + '.tmp'
+        self.writer = pq.ParquetWriter(self.tmp_path, SCHEMA, compression='zstd')
+        self.rows = 0
+        self.last_id = None
+
+    def write(self, batch):
+        self.writer.write_batch(batch)
+        self.rows += batch.num_rows
+        self.last_id = batch.column(0)[-1].as_py()
+
+    def close(self):
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+
+def export(database_url=DATABASE_URL, out_dir=EXPORT_DIR, batch_size=EXPORT_BATCH_SIZE,
+           max_rows_per_file=EXPORT_MAX_ROWS_PER_FILE):
+    """Export rows above the high-water mark; returns a summary dict"""
+    os.makedirs(out_dir, exist_ok=True)
+    state = load_state(out_dir)
+    after = state['high_water_mark']
+    engine = create_engine(read_only_url(database_url))
+    started = time.monotonic()
+    exported = 0
+    files = []
+    part = None
+
+    def commit(part):
+        part.close()
+        files.append(os.path.relpath(part.path, out_dir))
+        state.update(high_water_mark=part.last_id, updated_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+        save_state(out_dir, state)
+
+    try:
+        while True:
+            with engine.connect() as conn:
+                rows = conn.execute(SELECT_SQL, {'after': after, 'limit': batch_size}).fetchall()
+            if not rows:
+                break
+            after = rows[-1][0]
+            rows = [(r[0], r[1], _parse_timestamp(r[2])) + tuple(r[3:]) for r in rows]
+
+            # Rows arrive in id order, which is also (nearly) date order, so
+            # each batch splits into a few consecutive same-day runs.
+            start = 0
+            while start < len(rows):
+                partition = _partition(rows[start][2])
+                end = start + 1
+                while end < len(rows) and _partition(rows[end][2]) == partition:
+                    end += 1
+                if part is not None and (part.partition != partition or part.rows >= max_rows_per_file):
+                    commit(part)
+                    part = None
+                if part is None:
+                    part = _PartFile(out_dir, partition, rows[start][0])
+                part.write(record_batch(rows[start:end]))
+                exported += end - start
+                start = end
+        if part is not None:
+            commit(part)
+            part = None
+    finally:
+        if part is not None:
+            part.writer.close()
+            os.remove(part.tmp_path)
+        engine.dispose()
+
+    return {'rows': exported, 'files': files, 'high_water_mark': state['high_water_mark'],
+            'seconds': round(time.monotonic() - started, 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Incremental Parquet export of analysis history')
+    parser.add_argument('--database-url', default=DATABASE_URL)
+    parser.add_argument('--out', default=EXPORT_DIR, help='export directory (Hive-style date= partitions)')
+    parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE, help='rows per query and row group')
+    parser.add_argument('--max-rows-per-file', type=int, default=EXPORT_MAX_ROWS_PER_FILE)
+    parser.add_argument('--interval', type=float, default=0, help='repeat every N seconds instead of exiting')
+    args = parser.parse_args(argv)
+
+    while True:
+        summary = export(args.database_url, args.out, args.batch_size, args.max_rows_per_file)
+        print(f"✅ Exported {summary['rows']} rows into {len(summary['files'])} files in {summary['seconds']}s "
+              f"(high-water mark {summary['high_water_mark']})")
+        if not args.interval:
+            return 0
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""
+Image analysis: Amazon Rekognition text and label detection, scored
+against the active rule pack, with the perceptual-hash result cache and
+the local pre-screen in front of it. Text in large images is detected
+tile by tile (see image_tiling).
+
+PIL and numpy are imported with this module, so routes import it on the
+first image request rather than at startup.
+"""
+
+import atexit
+import base64
+import io
+import logging
+import os
+from datetime import datetime
+
+from PIL import Image
+
+import aws_clients
+from analyzer import analyzer, rule_packs
+from circuit_breaker import CircuitOpenError, breakers
+from config import INSTANCE_DIR
+from image_cache import ImageResultCache, dhash
+from image_prescreen import IMAGE_PRESCREEN_ENABLED, prescreen, prescreen_stats, should_skip_rekognition
+from image_tiling import REKOGNITION_MAX_BYTES, TileBudget, detect_text_tiled, downscale, encode_tiles, plan_tiles
+from profiling import span
+
+log = logging.getLogger(__name__)
+
+
+def decode_image(image_data):
+    """Decode a base64 image (with or without a data: URL prefix) to (bytes, width, height)"""
+    # Handle different base64 formats
+    if ',' in image_data:
+        image_b64 = image_data.split(',')[1]
+    else:
+        image_b64 = image_data
+        
+    image_bytes = base64.b64decode(image_b64)
+    image = Image.open(io.BytesIO(image_bytes))
+    width, height = image.size
+    return image_bytes, width, height
+
+
+def score_rekognition_results(text_response, label_response, width, height, file_size):
+    """Score Rekognition text and label detections for fraud indicators"""
+    detected_texts = [item['DetectedText'] for item in text_response.get('TextDetections', [])]
+    detected_labels = [(item['Name'], item['Confidence']) for item in label_response.get('Labels', [])]
+    
+    # Analyze for fraud indicators
+    fraud_score = 0
+    fraud_indicators = []
+    detailed_analysis = f"Amazon Rekognition analysis of {width}x{height} image ({file_size} bytes): "
+    
+    # Check detected text for fraud patterns
+    pack = rule_packs.active()
+    suspicious_texts = []
+    
+    for text in detected_texts:
+        if any(keyword in text.lower() for keyword in pack.image_text_keywords):
+            fraud_score += 25
+            suspicious_texts.append(text)
+    
+    if suspicious_texts:
+        fraud_indicators.append(f'Suspicious text detected: {", ".join(suspicious_texts[:3])}')
+        detailed_analysis += f"Found {len(suspicious_texts)} suspicious text elements including urgency tactics and fraud keywords. "
+    
+    # Check for document-like content
+    found_documents = [label for label, conf in detected_labels if label.lower() in pack.image_document_labels and conf > 70]
+    
+    if found_documents:
+        fraud_score += 15
+        fraud_indicators.append(f'Document detected: {found_documents[0]} - verify authenticity through official channels')
+        detailed_analysis += f"Detected document-like content: {', '.join(found_documents)}. This could be a legitimate document or a fraudulent reproduction. "
+    
+    # Technical analysis for fraud patterns
+    if width < 300 or height < 300:
+        fraud_score += 20
+        fraud_indicators.append(f'Small image size ({width}x{height}) - commonly used in phishing emails to evade detection')
+        detailed_analysis += "Small image dimensions are often used in phishing campaigns to bypass email security filters. "
+    
+    if file_size < 10000:
+        fraud_score += 10
+        fraud_indicators.append('Small file size indicates heavy compression or low quality - common in fraudulent images')
+        detailed_analysis += "Low file size suggests image compression that may hide manipulation artifacts. "
+    
+    # Check for QR codes or barcodes
+    qr_labels = [label for label, conf in detected_labels if 'qr' in label.lower() or 'barcode' in label.lower()]
+    if qr_labels:
+        fraud_score += 15
+        fraud_indicators.append('QR code or barcode detected - verify destination before scanning')
+        detailed_analysis += "QR codes can redirect to malicious websites or download harmful content. "
+    
+    # High confidence labels analysis
+    high_conf_labels = [label for label, conf in detected_labels if conf > 90]
+    if high_conf_labels:
+        detailed_analysis += f"High-confidence visual elements detected: {', '.join(high_conf_labels[:5])}. "
+    
+    if detected_texts:
+        detailed_analysis += f"Text elements found: {', '.join(detected_texts[:3])}{'...' if len(detected_texts) > 3 else ''}. "
+    
+    risk_level = 'HIGH' if fraud_score >= 50 else 'MEDIUM' if fraud_score >= 25 else 'LOW'
+    
+    result = {
+        'risk_level': risk_level,
+        'risk_score': min(fraud_score, 100),
+        'detailed_analysis': detailed_analysis,
+        'fraud_indicators': fraud_indicators if fraud_indicators else ['No specific fraud indicators detected in image analysis'],
+        'warnings': fraud_indicators,
+        'recommendations': [
+            'Verify any text claims through official channels',
+            'Check document authenticity if official-looking',
+            'Be cautious of urgent language or prize notifications',
+            'Do not scan QR codes from untrusted sources',
+            'Cross-reference with known legitimate sources'
+        ],
+        'timestamp': datetime.now().isoformat(),
+        'analysis_method': 'Amazon-Rekognition',
+        'rule_pack': pack.label,
+        'detected_text_count': len(detected_texts),
+        'detected_labels_count': len(detected_labels)
+    }
+    if 'Tiling' in text_response:
+        result['tiling'] = text_response['Tiling']
+    return result
+
+
+def screen_image(image_bytes, width, height):
+    """Run the local pre-screen; returns None if it is disabled or fails"""
+    if not IMAGE_PRESCREEN_ENABLED:
+        return None
+    try:
+        screen = prescreen(image_bytes, width, height)
+    except Exception as e:
+        log.warning("Image pre-screen failed: %s", e)
+        return None
+    return record_screen(screen)
+
+
+def record_screen(screen):
+    """Decide whether a pre-screened image skips Rekognition, and count it"""
+    screen['skipped'] = should_skip_rekognition(screen)
+    prescreen_stats.record(screen, screen['skipped'])
+    return screen
+
+
+def prescreen_result(screen, width, height, file_size):
+    """Result for an image the local pre-screen found clean"""
+    signals = screen['signals']
+    return {
+        'risk_level': 'LOW',
+        'risk_score': 0,
+        'detailed_analysis': (f"Local pre-screen of {width}x{height} image ({file_size} bytes): no text-like regions, "
+                              f"QR codes, alert banners or editing traces found "
+                              f"(text density {signals['text_density']:.3f}). Photo-like content with nothing to read."),
+        'fraud_indicators': ['No specific fraud indicators detected in image analysis'],
+        'warnings': [],
+        'recommendations': analyzer._get_image_recommendations('LOW'),
+        'timestamp': datetime.now().isoformat(),
+        'analysis_method': 'Local-Prescreen',
+        'rule_pack': rule_packs.active().label,
+        'prescreen': {'decision': screen['decision'], 'confidence': screen['confidence'],
+                      'signals': signals, 'elapsed_ms': screen['elapsed_ms']}
+    }
+
+
+def image_error_result(image_data, e):
+    """Result returned when an image cannot be decoded or analyzed"""
+    log.warning("Image analysis error: %s", e, extra={'image_chars': len(image_data) if image_data else 0})
+    
+    return {
+        'risk_level': 'MEDIUM',
+        'risk_score': 50,
+        'warnings': [f'Image processing failed: {str(e)[:100]}'],
+        'recommendations': ['Check image format and try again', 'Manually verify image authenticity'],
+        'timestamp': datetime.now().isoformat(),
+        'analysis_method': 'Error-Fallback',
+        'rule_pack': rule_packs.active().label,
+        'error_details': str(e)
+    }
+
+
+def rekognition_inputs(image_bytes, downscaled=None, tile_budget=None):
+    """(bytes for whole-image calls, tile boxes, tile bytes, (width, height)); tiles only for large images.
+
+    Images over Rekognition's size limit are sent whole as a downscaled
+    copy (pass `downscaled` if one was already made); tiles are always cut
+    from the full-resolution original.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    tiles = plan_tiles(image.width, image.height, tile_budget or TileBudget())
+    if downscaled is None and len(image_bytes) > REKOGNITION_MAX_BYTES:
+        downscaled = downscale(image, REKOGNITION_MAX_BYTES)
+    return downscaled or image_bytes, tiles, encode_tiles(image, tiles) if tiles else [], image.size
+
+
+def detect(image_bytes, downscaled=None, tile_budget=None):
+    """Rekognition text and label detections for one image, through the circuit breaker"""
+    rekognition = aws_clients.registry.client('rekognition')
+    rekognition_breaker = breakers['rekognition']
+    whole, tiles, tile_bytes, (width, height) = rekognition_inputs(image_bytes, downscaled, tile_budget)
+    
+    # Detect text in image, tile by tile for large images
+    with span('rekognition.detect_text'):
+        if tiles:
+            text_response = detect_text_tiled(
+                lambda tile: rekognition_breaker.call(rekognition.detect_text, Image={'Bytes': tile}),
+                tile_bytes, tiles, width, height)
+        else:
+            text_response = rekognition_breaker.call(rekognition.detect_text, Image={'Bytes': whole})
+    
+    # Detect labels/objects
+    with span('rekognition.detect_labels'):
+        label_response = rekognition_breaker.call(rekognition.detect_labels, Image={'Bytes': whole},
+                                                  MaxLabels=20)
+    return text_response, label_response
+
+
+# Rekognition results for previously seen images, matched by perceptual hash
+image_cache = ImageResultCache(os.getenv('IMAGE_CACHE_PATH', os.path.join(INSTANCE_DIR, 'image_cache.json')))
+atexit.register(image_cache.save)
+
+
+def analyze_image_with_bedrock(image_data):
+    """Analyze image using Amazon Rekognition"""
+    try:
+        with span('decode_image'):
+            image_bytes, width, height = decode_image(image_data)
+        file_size = len(image_bytes)
+        
+        # Re-uploads of an already analyzed image skip Rekognition
+        with span('image_cache.lookup'):
+            image_hash = dhash(image_bytes)
+            cached = image_cache.lookup(image_hash)
+        if cached is not None:
+            return cached
+        
+        # Text-free photos are screened locally and never reach Rekognition
+        with span('prescreen'):
+            screen = screen_image(image_bytes, width, height)
+        if screen and screen['skipped']:
+            return prescreen_result(screen, width, height, file_size)
+        
+        # Use Amazon Rekognition for image analysis
+        text_response, label_response = detect(image_bytes)
+        
+        with span('score'):
+            result = score_rekognition_results(text_response, label_response, width, height, file_size)
+        if screen:
+            result['prescreen'] = {'decision': screen['decision'], 'reasons': screen['reasons']}
+        image_cache.store(image_hash, result)
+        return result
+        
+        # Enhanced rule-based fallback
+        risk_score = 30
+        warnings = []
+        detailed_analysis = f'Analyzed {width}x{height} pixel image ({file_size} bytes). '
+        
+        if width < 200 or height < 200:
+            risk_score += 25
+            warnings.append('Very small image size - commonly used in phishing emails')
+            detailed_analysis += 'Small image dimensions suggest this may be a low-quality screenshot or thumbnail, which is often used in fraudulent communications to evade detection. '
+        
+        if width > 1920 or height > 1080:
+            risk_score += 15
+            warnings.append('Unusually large image - possible full screenshot')
+            detailed_analysis += 'Large image size suggests this may be a full screenshot of a website or application, which could indicate phishing attempts. '
+        
+        if file_size < 10000:  # Less than 10KB
+            risk_score += 20
+            warnings.append('Very small file size - possible compressed or low-quality image')
+            detailed_analysis += 'Small file size combined with image dimensions suggests heavy compression or poor quality, common in fraudulent documents. '
+        
+        risk_level = 'HIGH' if risk_score >= 60 else 'MEDIUM' if risk_score >= 35 else 'LOW'
+        
+        return {
+            'risk_level': risk_level,
+            'risk_score': risk_score,
+            'detailed_analysis': detailed_analysis,
+            'fraud_indicators': warnings if warnings else ['Basic technical analysis completed'],
+            'warnings': warnings if warnings else ['Basic image validation completed'],
+            'recommendations': [
+                'Verify image source and authenticity through official channels',
+                'Check for signs of digital manipulation or editing',
+                'Be cautious of unsolicited images, especially with urgent requests',
+                'Cross-reference any claims made in the image with official sources'
+            ],
+            'timestamp': datetime.now().isoformat(),
+            'analysis_method': 'Enhanced-Rule-Based-Fallback',
+            'image_properties': f'{width}x{height}'
+        }
+        
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        return image_error_result(image_data, e)
@@ -0,0 +1,375 @@
+"""
+Batch image analysis: many screenshots (or a zip of them) in one request,
+with each image's result streamed back as soon as it is ready.
+
+Each image goes through three stages, pipelined so a slow image never holds
+up the others:
+
+    decode   decode, perceptual hash, local pre-screen and, for images over
+             Rekognition's size limit, a downscaled JPEG; CPU-bound, so it
+             runs in a shared process pool (BATCH_DECODE_WORKERS)
+    detect   Rekognition text and label detection; I/O-bound, at most
+             BATCH_IO_CONCURRENCY images of a batch in flight at once
+             (large images are tiled, from one tile budget per batch)
+    score    result cache, rule-pack scoring and cache store, on the same
+             I/O thread as detect
+
+Batches are bounded by BATCH_MAX_IMAGES, BATCH_MAX_IMAGE_BYTES per image,
+BATCH_MAX_BYTES in total and BATCH_TIMEOUT_SECONDS end to end.
+
+Decode workers are spawned processes. They run only this module's decode
+code, but spawn also re-imports the parent's main script as __mp_main__:
+under `python app.py` that imports app.py's modules, and app.py skips
+create_app() there, so a worker opens no database and no AWS clients. A
+script that starts the pool must keep its own work under an
+`if __name__ == '__main__':` guard.
+"""
+
+import atexit
+import base64
+import binascii
+import contextvars
+import functools
+import io
+import logging
+import multiprocessing
+import os
+import posixpath
+import queue
+import threading
+import time
+import zipfile
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image
+
+from image_cache import dhash
+from image_prescreen import IMAGE_PRESCREEN_ENABLED, prescreen
+from image_tiling import REKOGNITION_MAX_BYTES, TileBudget, downscale
+
+log = logging.getLogger(__name__)
+
+BATCH_MAX_IMAGES = int(os.getenv('BATCH_MAX_IMAGES', 20))
+BATCH_MAX_IMAGE_BYTES = int(os.getenv('BATCH_MAX_IMAGE_BYTES', 10 * 1024 * 1024))
+BATCH_MAX_BYTES = int(os.getenv('BATCH_MAX_BYTES', 50 * 1024 * 1024))
+BATCH_IO_CONCURRENCY = int(os.getenv('BATCH_IO_CONCURRENCY', 4))
+BATCH_DECODE_WORKERS = int(os.getenv('BATCH_DECODE_WORKERS', min(4, os.cpu_count() or 1)))  # 0 = decode on I/O threads
+BATCH_DECODE_START_METHOD = os.getenv('BATCH_DECODE_START_METHOD', 'spawn')
+BATCH_TIMEOUT_SECONDS = float(os.getenv('BATCH_TIMEOUT_SECONDS', 120))
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tif', '.tiff')
+ZIP_CONTENT_TYPES = ('application/zip', 'application/x-zip-compressed')
+
+
+class BatchLimitError(ValueError):
+    """The batch is over one of its size limits"""
+
+
+class BatchCollector:
+    """Images of one batch, in submission order, checked against the per-batch limits as they are added"""
+
+    def __init__(self, max_images=BATCH_MAX_IMAGES, max_image_bytes=BATCH_MAX_IMAGE_BYTES, max_bytes=BATCH_MAX_BYTES):
+        self.max_images = max_images
+        self.max_image_bytes = max_image_bytes
+        self.max_bytes = max_bytes
+        self.images = []
+        self.total_bytes = 0
+
+    def check(self, name, size):
+        """Raise BatchLimitError if an image of `size` bytes would not fit"""
+        if len(self.images) >= self.max_images:
+            raise BatchLimitError(f'Too many images: at most {self.max_images} per batch')
+        if size > self.max_image_bytes:
+            raise BatchLimitError(f'{name} is larger than {self.max_image_bytes} bytes')
+        if self.total_bytes + size > self.max_bytes:
+            raise BatchLimitError(f'Batch is larger than {self.max_bytes} bytes')
+
+    def add(self, name, data):
+        self.check(name, len(data))
+        if not data:
+            raise ValueError(f'{name} is empty')
+        self.images.append((name, data))
+        self.total_bytes += len(data)
+
+    def add_base64(self, name, image_data):
+        """Add a base64 image, with or without a data: URL prefix"""
+        self.add(name, decode_base64(name, image_data, self.max_image_bytes))
+
+    def add_zip(self, name, data):
+        """Add the images in a zip archive, skipping directories, hidden files and other file types.
+
+        Sizes are checked against the archive's declared (uncompressed) sizes
+        before anything is inflated, and zipfile never inflates past them.
+        """
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(data))
+        except zipfile.BadZipFile:
+            raise ValueError(f'{name} is not a valid zip archive')
+        with archive:
+            for info in archive.infolist():
+                member = info.filename
+                base = posixpath.basename(member)
+                if (info.is_dir() or base.startswith('.') or member.startswith('__MACOSX/')
+                        or not base.lower().endswith(IMAGE_EXTENSIONS)):
+                    continue
+                self.check(member, info.file_size)
+                try:
+                    self.add(member, archive.read(info))
+                except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+                    raise ValueError(f'{member}: cannot be extracted ({e})')
+
+    def add_upload(self, name, data, content_type=''):
+        if name.lower().endswith('.zip') or content_type in ZIP_CONTENT_TYPES:
+            self.add_zip(name, data)
+        else:
+            self.add(name, data)
+
+
+def decode_base64(name, value, max_bytes):
+    """Bytes of a base64 string (with or without a data: URL prefix), refusing payloads over max_bytes undecoded"""
+    if not isinstance(value, str) or not value:
+        raise ValueError(f'{name}: expected a base64 string')
+    encoded = value.split(',', 1)[1] if ',' in value else value
+    if len(encoded) * 3 // 4 > max_bytes + 2:
+        raise BatchLimitError(f'{name} is larger than {max_bytes} bytes')
+    try:
+        return base64.b64decode(encoded)
+    except binascii.Error:
+        raise ValueError(f'{name} is not valid base64')
+
+
+def collect_json(data):
+    """Images from a JSON body: {"images": ["<base64>" | {"name": ..., "image": "<base64>"}], "archive": "<base64 zip>"}"""
+    collector = BatchCollector()
+    images = data.get('images') or []
+    if not isinstance(images, list):
+        raise ValueError('images must be a list')
+    for index, item in enumerate(images):
+        if isinstance(item, dict):
+            collector.add_base64(str(item.get('name') or f'image-{index}'), item.get('image'))
+        else:
+            collector.add_base64(f'image-{index}', item)
+    if data.get('archive'):
+        collector.add_zip('archive', decode_base64('archive', data['archive'], collector.max_bytes))
+    return collector
+
+
+def prepare_image(image_bytes, run_prescreen=IMAGE_PRESCREEN_ENABLED):
+    """Decode stage (runs in a decode worker): size, hash, pre-screen and a downscaled copy if Rekognition needs one"""
+    image = Image.open(io.BytesIO(image_bytes))
+    width, height = image.size
+    screen = None
+    if run_prescreen:
+        try:
+            screen = prescreen(image_bytes, width, height)
+        except Exception as e:
+            log.warning("Image pre-screen failed: %s", e)
+    # Only a downscaled copy is sent back; the parent already has the original bytes
+    upload = downscale(image, REKOGNITION_MAX_BYTES) if len(image_bytes) > REKOGNITION_MAX_BYTES else None
+    return {
+        'width': width,
+        'height': height,
+        'file_size': len(image_bytes),
+        'hash': dhash(image_bytes),
+        'screen': screen,
+        'upload': upload
+    }
+
+
+class BatchStats:
+    """Batch counters, reported under 'image_batch' in /api/stats"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {'batches': 0, 'images': 0, 'rekognition': 0, 'cached': 0, 'prescreened': 0,
+                         'rule_based': 0, 'failed': 0, 'timed_out': 0, 'resized': 0, 'inline_decodes': 0}
+        self.active = 0
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def batch_started(self, images):
+        with self._lock:
+            self.counters['batches'] += 1
+            self.counters['images'] += images
+            self.active += 1
+
+    def batch_finished(self):
+        with self._lock:
+            self.active -= 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters,
+                        active_batches=self.active,
+                        max_images=BATCH_MAX_IMAGES,
+                        io_concurrency=BATCH_IO_CONCURRENCY,
+                        decode_workers=BATCH_DECODE_WORKERS)
+
+
+batch_stats = BatchStats()
+
+_decode_pool = None
+_decode_pool_lock = threading.Lock()
+
+
+def decode_pool():
+    """Process pool shared by all batches for the decode stage, started by the first batch"""
+    global _decode_pool
+    if BATCH_DECODE_WORKERS <= 0:
+        return None
+    with _decode_pool_lock:
+        if _decode_pool is None:
+            _decode_pool = ProcessPoolExecutor(max_workers=BATCH_DECODE_WORKERS,
+                                               mp_context=multiprocessing.get_context(BATCH_DECODE_START_METHOD))
+            atexit.register(_decode_pool.shutdown, wait=False, cancel_futures=True)
+        return _decode_pool
+
+
+def discard_decode_pool(pool):
+    """Forget a broken pool (e.g. a worker was killed) so the next batch starts a new one"""
+    global _decode_pool
+    with _decode_pool_lock:
+        if _decode_pool is pool:
+            _decode_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def analyze_prepared(image_bytes, prepared, use_rekognition, tile_budget=None):
+    """Detect and score stages for one decoded image; returns (result, how it was analyzed)"""
+    import image_analysis
+    from analyzer import analyzer
+    from circuit_breaker import CircuitOpenError
+
+    cached = image_analysis.image_cache.lookup(prepared['hash'])
+    if cached is not None:
+        return cached, 'cached'
+
+    width, height, file_size = prepared['width'], prepared['height'], prepared['file_size']
+    screen = prepared['screen']
+    if screen is not None:
+        image_analysis.record_screen(screen)
+        if screen['skipped']:
+            return image_analysis.prescreen_result(screen, width, height, file_size), 'prescreened'
+
+    if use_rekognition:
+        try:
+            text_response, label_response = image_analysis.detect(image_bytes, prepared['upload'], tile_budget)
+            result = image_analysis.score_rekognition_results(text_response, label_response, width, height, file_size)
+            if screen:
+                result['prescreen'] = {'decision': screen['decision'], 'reasons': screen['reasons']}
+            image_analysis.image_cache.store(prepared['hash'], result)
+            return result, 'rekognition'
+        except CircuitOpenError:
+            pass
+        except Exception as e:
+            log.warning("Rekognition batch image analysis failed: %s", e)
+
+    data_url = 'data:image;base64,' + base64.b64encode(image_bytes).decode('ascii')
+    return analyzer.analyze_image(data_url), 'rule_based'
+
+
+def run_batch(images, use_rekognition, timeout=BATCH_TIMEOUT_SECONDS):
+    """Analyze (name, bytes) pairs; yields {'index', 'name', 'result' | 'error'} in completion order, then a summary.
+
+    Closing the generator early (the client went away) cancels the images
+    that have not started.
+    """
+    import image_analysis
+
+    started = time.perf_counter()
+    batch_stats.batch_started(len(images))
+    done = queue.Queue()
+    context = contextvars.copy_context()  # request id for log lines from the pool threads
+    io_pool = ThreadPoolExecutor(max_workers=max(1, min(BATCH_IO_CONCURRENCY, len(images))),
+                                 thread_name_prefix='batch-io')
+    pool = decode_pool()
+    tile_budget = TileBudget()  # shared by every image of the batch
+    decodes = []
+
+    def finish(index, prepared):
+        name, image_bytes = images[index]
+        try:
+            if prepared is None:
+                batch_stats.count('inline_decodes')
+                prepared = prepare_image(image_bytes)
+            if prepared['upload'] is not None:
+                batch_stats.count('resized')
+            result, method = analyze_prepared(image_bytes, prepared, use_rekognition, tile_budget)
+        except Exception as e:
+            result, method = image_analysis.image_error_result(image_bytes, e), 'failed'
+        batch_stats.count(method)
+        done.put({'index': index, 'name': name, 'result': result})
+
+    def submit_finish(index, prepared=None):
+        try:
+            io_pool.submit(context.copy().run, finish, index, prepared)
+        except RuntimeError:
+            pass  # the batch was abandoned and the pool shut down
+
+    def decoded(index, future):
+        try:
+            prepared = future.result()
+        except CancelledError:
+            return
+        except BrokenProcessPool:
+            submit_finish(index)  # decode on the I/O thread instead
+            return
+        except Exception as e:
+            batch_stats.count('failed')
+            done.put({'index': index, 'name': images[index][0],
+                      'result': image_analysis.image_error_result(images[index][1], e)})
+            return
+        submit_finish(index, prepared)
+
+    pending = set(range(len(images)))
+    risk_levels = {}
+    try:
+        for index, (name, image_bytes) in enumerate(images):
+            if pool is not None:
+                try:
+                    future = pool.submit(prepare_image, image_bytes)
+                except BrokenProcessPool:
+                    discard_decode_pool(pool)
+                    pool = None
+                else:
+                    decodes.append(future)
+                    future.add_done_callback(functools.partial(decoded, index))
+                    continue
+            submit_finish(index)
+
+        deadline = started + timeout
+        while pending:
+            try:
+                item = done.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            pending.discard(item['index'])
+            level = item['result'].get('risk_level', 'UNKNOWN')
+            risk_levels[level] = risk_levels.get(level, 0) + 1
+            yield item
+
+        for index in sorted(pending):
+            yield {'index': index, 'name': images[index][0], 'error': f'Timed out after {timeout:g}s'}
+        if pending:
+            batch_stats.count('timed_out', len(pending))
+            log.warning("Image batch timed out", extra={'images': len(images), 'unfinished': len(pending)})
+
+        yield {'summary': {
+            'images': len(images),
+            'completed': len(images) - len(pending),
+            'timed_out': len(pending),
+            'risk_levels': risk_levels,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        }}
+    finally:
+        for future in decodes:
+            future.cancel()
+        io_pool.shutdown(wait=False, cancel_futures=True)
+        batch_stats.batch_finished()
+
+
+def stats():
+    return batch_stats.snapshot()
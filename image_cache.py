@@ -0,0 +1,216 @@
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from PIL import Image
+
+from hamming_index import HammingIndex
+
+log = logging.getLogger(__name__)
+
+IMAGE_CACHE_MAX_DISTANCE = int(os.getenv('IMAGE_CACHE_MAX_DISTANCE', 6))
+IMAGE_CACHE_SIZE = int(os.getenv('IMAGE_CACHE_SIZE', 5000))
+IMAGE_CACHE_SAVE_EVERY = int(os.getenv('IMAGE_CACHE_SAVE_EVERY', 20))
+# Hashes with fewer set (or unset) bits than this come from near-flat images,
+# e.g. text on a plain background where the text blurs away at 9x8, and
+# would match unrelated images with the same layout.
+IMAGE_CACHE_MIN_DETAIL_BITS = int(os.getenv('IMAGE_CACHE_MIN_DETAIL_BITS', 8))
+
+HASH_SIZE = 8  # 8x8 gradient bits -> 64-bit hash
+
+
+def dhash(image_bytes, hash_size=HASH_SIZE):
+    """64-bit difference hash of an encoded image.
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale
+    thumbnail and each bit records whether a pixel is brighter than its
+    right-hand neighbour, so re-compression, resizing and small colour
+    shifts leave most bits unchanged. JPEGs are decoded at reduced scale
+    via draft(), which skips most of the full-size decode.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    image.draft('L', (hash_size * 8, hash_size * 8))
+    pixels = list(image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR).getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+class ImageResultCache:
+    """Bounded LRU of image analysis results keyed by perceptual hash.
+
+    lookup() returns the result stored for the nearest hash within
+    max_distance bits, so re-uploads of the same screenshot with different
+    compression or size reuse the earlier Rekognition analysis. Entries are
+    saved to `path` as JSON on save(), and on a background thread every
+    `save_every` new results, so a request never waits for the write or
+    fails because of it. Each worker process has its own cache, so a save
+    merges with what other workers already wrote to the file.
+    """
+
+    def __init__(self, path=None, capacity=IMAGE_CACHE_SIZE, max_distance=IMAGE_CACHE_MAX_DISTANCE,
+                 save_every=IMAGE_CACHE_SAVE_EVERY, min_detail_bits=IMAGE_CACHE_MIN_DETAIL_BITS):
+        self.path = path
+        self.min_detail_bits = min_detail_bits
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # hash -> (result, stored_at), least recently used first
+        self._index = HammingIndex(bits=HASH_SIZE * HASH_SIZE)
+        self._unsaved = 0
+        self._save_lock = threading.Lock()  # one save at a time: background thread, atexit
+        self._save_wanted = threading.Event()
+        self._saver = None
+        self._saver_pid = None
+        self.save_errors = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.low_detail = 0
+        self.load()
+
+    def cacheable(self, image_hash):
+        set_bits = bin(image_hash).count('1')
+        return min(set_bits, HASH_SIZE * HASH_SIZE - set_bits) >= self.min_detail_bits
+
+    def lookup(self, image_hash):
+        """Cached result for a near-duplicate image, or None"""
+        if not self.cacheable(image_hash):
+            with self._lock:
+                self.low_detail += 1
+            return None
+        with self._lock:
+            match = self._index.nearest(image_hash, self.max_distance)
+            if match is None:
+                self.misses += 1
+                return None
+            distance, key = match
+            self._entries.move_to_end(key)
+            result, stored_at = self._entries[key]
+            self.hits += 1
+        return dict(result, cache={'hit': True, 'distance': distance,
+                                   'cached_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(stored_at))})
+
+    def store(self, image_hash, result):
+        if not self.cacheable(image_hash):
+            return
+        with self._lock:
+            self._insert(image_hash, result, time.time())
+            self._unsaved += 1
+            due = self.path and self._unsaved >= self.save_every
+        if due:
+            self._request_save()
+
+    def _request_save(self):
+        with self._lock:
+            # Checked by pid so a worker forked after the thread started gets its own
+            if self._saver is None or self._saver_pid != os.getpid():
+                self._saver = threading.Thread(target=self._save_loop, name='image-cache-save', daemon=True)
+                self._saver_pid = os.getpid()
+                self._saver.start()
+        self._save_wanted.set()
+
+    def _save_loop(self):
+        while True:
+            self._save_wanted.wait()
+            self._save_wanted.clear()
+            self.save()
+
+    def _insert(self, image_hash, result, stored_at):
+        self._entries[image_hash] = (result, stored_at)
+        self._entries.move_to_end(image_hash)
+        self._index.add(image_hash, image_hash)
+        while len(self._entries) > self.capacity:
+            old_hash, _ = self._entries.popitem(last=False)
+            self._index.remove(old_hash)
+            self.evictions += 1
+
+    def save(self):
+        """Merge entries into `path` atomically (temp file + rename) if anything changed.
+
+        Entries already in the file, saved by other worker processes, are
+        kept; the newest `capacity` of both are written. Errors are logged
+        and counted rather than raised; returns False if the write failed.
+        """
+        if not self.path:
+            return True
+        with self._save_lock:
+            with self._lock:
+                if not self._unsaved:
+                    return True
+                unsaved, self._unsaved = self._unsaved, 0
+                mine = dict(self._entries)
+            try:
+                self._write(mine)
+            except Exception as e:
+                log.warning("Could not save image cache to %s: %s", self.path, e)
+                with self._lock:
+                    self._unsaved += unsaved
+                    self.save_errors += 1
+                return False
+        return True
+
+    def _write(self, mine):
+        merged = {int(entry['hash'], 16): (entry['result'], entry['stored_at']) for entry in self._read()}
+        for image_hash, (result, stored_at) in mine.items():
+            if image_hash not in merged or merged[image_hash][1] <= stored_at:
+                merged[image_hash] = (result, stored_at)
+        newest = sorted(merged.items(), key=lambda item: item[1][1])[-self.capacity:]
+        payload = [{'hash': format(h, '016x'), 'stored_at': stored_at, 'result': result}
+                   for h, (result, stored_at) in newest]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': 1, 'entries': payload}, f)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _read(self):
+        """Entries in the file at `path`; [] if it is missing or unreadable"""
+        if not self.path or not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path) as f:
+                return json.load(f).get('entries', [])
+        except Exception as e:
+            log.warning("Could not load image cache from %s: %s", self.path, e)
+            return []
+
+    def load(self):
+        entries = self._read()
+        if not entries:
+            return
+        with self._lock:
+            for entry in entries:
+                self._insert(int(entry['hash'], 16), entry['result'], entry['stored_at'])
+        log.info("Loaded %d cached image analyses", len(self._entries))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'capacity': self.capacity,
+                'max_distance': self.max_distance,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'skipped_low_detail': self.low_detail,
+                'save_errors': self.save_errors
+            }
@@ -0,0 +1,268 @@
+"""
+Local image pre-screen that runs before Rekognition.
+
+Computes a handful of cheap signals on a downscaled copy of the image with
+NumPy and decides whether the image is confidently clean (a photo with no
+text, QR code, alert banner or editing traces). Clean images skip the paid
+Rekognition calls; everything else is escalated. The pre-screen never
+returns HIGH on its own: Rekognition's HIGH verdicts depend on reading the
+text in the image, which this pass does not do.
+"""
+
+import io
+import os
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+IMAGE_PRESCREEN_ENABLED = os.getenv('IMAGE_PRESCREEN', 'true').lower() in ('1', 'true', 'yes')
+IMAGE_PRESCREEN_MIN_CONFIDENCE = float(os.getenv('IMAGE_PRESCREEN_MIN_CONFIDENCE', 0.85))
+
+ANALYSIS_SIZE = 384      # longest side of the working copy, in pixels
+BLOCK = 8                # block size for edge density and flatness
+STRONG_EDGE = 60         # gray-level step that counts as a sharp edge
+TEXT_BLOCK_DENSITY = 0.12
+TEXT_DENSITY_CLEAN = 0.02
+BANNER_FRACTION = 0.12   # height of the top/bottom strips checked for banners
+LONG_ASPECT = 3.0        # scrolling captures this elongated shrink their text away in the working copy
+EDITING_SOFTWARE = ('photoshop', 'gimp', 'canva', 'picsart', 'pixlr', 'paint.net', 'affinity', 'snapseed', 'fotor')
+GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def load_working_copy(image_bytes):
+    """(RGB working copy with longest side <= ANALYSIS_SIZE, opened image, original size).
+
+    For JPEGs draft() lets the decoder scale by 1/2 to 1/8 in the DCT, so
+    a 12 MP photo is never fully decoded.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    width, height = image.size
+    scale = ANALYSIS_SIZE / max(width, height)
+    if scale < 1:
+        image.draft('RGB', (max(1, int(width * scale)), max(1, int(height * scale))))
+    working = image.convert('RGB')
+    working.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.BILINEAR)
+    return working, image, (width, height)
+
+
+def _blocks(values, block=BLOCK):
+    h, w = values.shape[0] // block * block, values.shape[1] // block * block
+    return values[:h, :w].reshape(h // block, block, w // block, block)
+
+
+def edge_signals(gray):
+    """Text-density estimate from the sharp-edge map, plus the flat-block fraction.
+
+    Rendered text is dense in short, high-contrast strokes, so blocks where
+    many pixels sit on a sharp edge are counted as text-like. Screenshots
+    and flyers also have many perfectly flat blocks; photos have few.
+    """
+    gx = np.abs(np.diff(gray, axis=1))[:-1, :]
+    gy = np.abs(np.diff(gray, axis=0))[:, :-1]
+    strong = (np.maximum(gx, gy) > STRONG_EDGE).astype(np.float32)
+    if min(strong.shape) < BLOCK:
+        return {'text_density': 0.0, 'edge_density': 0.0, 'flat_fraction': 0.0}
+
+    block_density = _blocks(strong).mean(axis=(1, 3))
+    block_std = _blocks(gray).std(axis=(1, 3))
+    return {
+        'text_density': round(float((block_density > TEXT_BLOCK_DENSITY).mean()), 4),
+        'edge_density': round(float(strong.mean()), 4),
+        'flat_fraction': round(float((block_std < 2.0).mean()), 4)
+    }
+
+
+def error_level(working, rgb, quality=90):
+    """Error-level analysis: spread of per-block JPEG re-compression error.
+
+    A region pasted in from another image (or re-rendered text) re-compresses
+    differently from its surroundings, so the ratio between the worst blocks
+    and the typical block rises.
+    """
+    buffer = io.BytesIO()
+    working.save(buffer, format='JPEG', quality=quality)
+    resaved = np.asarray(Image.open(buffer), dtype=np.float32)
+    error = np.abs(rgb - resaved).mean(axis=2)
+    if min(error.shape) < BLOCK:
+        return {'ela_mean': round(float(error.mean()), 3), 'ela_block_ratio': 1.0}
+    block_error = _blocks(error).mean(axis=(1, 3)).ravel()
+    typical = float(np.median(block_error)) + 0.5
+    return {
+        'ela_mean': round(float(error.mean()), 3),
+        'ela_block_ratio': round(float(np.percentile(block_error, 99)) / typical, 2)
+    }
+
+
+def _finder_runs(dark):
+    """Centres (row, col) of 1:1:3:1:1 dark/light/dark/light/dark runs along each row"""
+    h, w = dark.shape
+    change = np.ones((h, w), dtype=bool)
+    change[:, 1:] = dark[:, 1:] != dark[:, :-1]
+    starts = np.flatnonzero(change.ravel())
+    lengths = np.diff(np.append(starts, h * w)).astype(np.float32)
+    if len(starts) < 5:
+        return np.empty((0, 2), dtype=np.int64)
+
+    rows = starts // w
+    colour = dark.ravel()[starts]
+    l0, l1, l2, l3, l4 = (lengths[i:len(lengths) - 4 + i] for i in range(5))
+    module = (l0 + l1 + l2 + l3 + l4) / 7.0
+    tolerance = module / 2.0 + 0.5
+    match = ((rows[:-4] == rows[4:]) & colour[:-4] & (module >= 1.0)
+             & (np.abs(l0 - module) < tolerance) & (np.abs(l1 - module) < tolerance)
+             & (np.abs(l2 - 3 * module) < 3 * tolerance)
+             & (np.abs(l3 - module) < tolerance) & (np.abs(l4 - module) < tolerance))
+    index = np.flatnonzero(match)
+    centre_col = starts[index] % w + (l0[index] + l1[index] + l2[index] / 2.0).astype(np.int64)
+    return np.stack([rows[index], centre_col], axis=1)
+
+
+def qr_finder_patterns(gray):
+    """Number of QR finder patterns: 1:1:3:1:1 runs that cross both horizontally and vertically"""
+    threshold = (np.percentile(gray, 5) + np.percentile(gray, 95)) / 2.0
+    dark = gray < threshold
+    h, w = dark.shape
+    horizontal = np.zeros((h, w), dtype=bool)
+    vertical = np.zeros((h, w), dtype=bool)
+    centres = _finder_runs(dark)
+    horizontal[centres[:, 0], np.clip(centres[:, 1], 0, w - 1)] = True
+    centres = _finder_runs(np.ascontiguousarray(dark.T))
+    vertical[np.clip(centres[:, 1], 0, h - 1), centres[:, 0]] = True
+
+    # allow the two centre estimates to disagree by a pixel
+    grown = vertical.copy()
+    grown[1:, :] |= vertical[:-1, :]
+    grown[:-1, :] |= vertical[1:, :]
+    grown[:, 1:] |= grown[:, :-1].copy()
+    grown[:, :-1] |= grown[:, 1:].copy()
+    points = np.argwhere(horizontal & grown)
+
+    patterns = []
+    for y, x in points:
+        for p in patterns:
+            if abs(p[0] - y) <= 6 and abs(p[1] - x) <= 6:
+                break
+        else:
+            patterns.append((y, x))
+    return len(patterns)
+
+
+def banner_signals(rgb):
+    """Solid, saturated colour bands across the top or bottom of the image (fake alert headers)"""
+    strip = max(1, int(rgb.shape[0] * BANNER_FRACTION))
+    found = []
+    for name, region in (('top', rgb[:strip]), ('bottom', rgb[-strip:])):
+        pixels = region[::2, ::2].reshape(-1, 3)
+        median = np.median(pixels, axis=0)
+        share = float((np.abs(pixels - median).max(axis=1) < 30).mean())
+        saturation = (median.max() - median.min()) / (median.max() + 1e-6)
+        if share > 0.6 and saturation > 0.45 and median.max() > 90:
+            found.append({'position': name, 'color': [int(c) for c in median], 'coverage': round(share, 2)})
+    return found
+
+
+def editing_software(image):
+    """EXIF Software tag if it names an image editor"""
+    try:
+        software = str(image.getexif().get(0x0131, '') or '')
+    except Exception:
+        return None
+    if any(editor in software.lower() for editor in EDITING_SOFTWARE):
+        return software.strip()[:80]
+    return None
+
+
+def prescreen(image_bytes, width=None, height=None):
+    """Run every local signal and decide whether Rekognition can be skipped.
+
+    Returns a dict with 'decision' ('clean' or 'escalate'), 'confidence',
+    'reasons' (why it escalated), 'signals' and 'elapsed_ms'.
+    """
+    start = time.perf_counter()
+    working, image, size = load_working_copy(image_bytes)
+    width, height = width or size[0], height or size[1]
+    rgb = np.asarray(working, dtype=np.float32)
+    gray = rgb @ GRAY_WEIGHTS
+
+    signals = edge_signals(gray)
+    signals.update(error_level(working, rgb) if image.format == 'JPEG' else {'ela_mean': None, 'ela_block_ratio': None})
+    signals['qr_finder_patterns'] = qr_finder_patterns(gray)
+    signals['banners'] = banner_signals(rgb)
+    signals['editing_software'] = editing_software(image)
+
+    reasons = []
+    if signals['text_density'] >= TEXT_DENSITY_CLEAN:
+        reasons.append('text-like regions')
+    if signals['qr_finder_patterns'] >= 3:
+        reasons.append('QR code finder patterns')
+    if signals['banners']:
+        reasons.append('solid colour banner')
+    if signals['editing_software']:
+        reasons.append(f"edited with {signals['editing_software']}")
+    if signals['ela_block_ratio'] is not None and signals['ela_block_ratio'] > 12:
+        reasons.append('inconsistent compression (possible edit)')
+    if width < 300 or height < 300:
+        reasons.append('small image')
+    if max(width, height) >= LONG_ASPECT * min(width, height):
+        reasons.append('long capture')
+
+    if reasons:
+        decision, confidence = 'escalate', 0.0
+    else:
+        # Further from the text threshold and less flat (more photo-like) -> more confident
+        margin = 1.0 - signals['text_density'] / TEXT_DENSITY_CLEAN
+        confidence = round(0.7 + 0.2 * margin + 0.1 * (1.0 - signals['flat_fraction']), 3)
+        decision = 'clean'
+
+    return {
+        'decision': decision,
+        'confidence': confidence,
+        'reasons': reasons,
+        'signals': signals,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+    }
+
+
+def should_skip_rekognition(screen, min_confidence=IMAGE_PRESCREEN_MIN_CONFIDENCE):
+    return screen['decision'] == 'clean' and screen['confidence'] >= min_confidence
+
+
+class PrescreenStats:
+    """Skip/escalate counters and pre-screen latency, reported in /api/stats"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.skipped = 0
+        self.escalated = 0
+        self.total_ms = 0.0
+        self.reasons = {}
+
+    def record(self, screen, skipped):
+        with self._lock:
+            if skipped:
+                self.skipped += 1
+            else:
+                self.escalated += 1
+            self.total_ms += screen['elapsed_ms']
+            for reason in screen['reasons']:
+                key = reason.split(' with ')[0]
+                self.reasons[key] = self.reasons.get(key, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            screened = self.skipped + self.escalated
+            return {
+                'enabled': IMAGE_PRESCREEN_ENABLED,
+                'min_confidence': IMAGE_PRESCREEN_MIN_CONFIDENCE,
+                'screened': screened,
+                'rekognition_skipped': self.skipped,
+                'escalated': self.escalated,
+                'skip_rate': round(self.skipped / screened, 4) if screened else 0.0,
+                'avg_ms': round(self.total_ms / screened, 2) if screened else 0.0,
+                'escalation_reasons': dict(self.reasons)
+            }
+
+
+prescreen_stats = PrescreenStats()
@@ -0,0 +1,252 @@
+"""
+Tiled text detection for large images.
+
+Rekognition's detect_text returns at most 100 words per image and misses
+text that is small relative to the whole image, so a long chat screenshot
+or a full-page website capture loses most of its words. Long images (the
+longest side over IMAGE_TILE_MIN_SIDE and at least IMAGE_TILE_MIN_ASPECT
+times the shortest) are cut into overlapping tiles of about IMAGE_TILE_SIZE
+pixels, each tile goes to detect_text on its own (IMAGE_TILE_CONCURRENCY at
+a time), and the detections are mapped back to the original image and
+merged:
+
+    plan_tiles()        grid of tile boxes, within the request's TileBudget
+    encode_tiles()      JPEG bytes per tile
+    merge_detections()  one TextDetections list in original coordinates,
+                        with words and lines seen in two overlapping tiles
+                        kept once
+
+Every tile is a paid Rekognition call, so each request gets a TileBudget of
+IMAGE_TILE_BUDGET tiles (shared by all images of a batch). An image that
+would need more tiles gets fewer, larger ones; once the budget is spent,
+images are sent whole.
+"""
+
+import contextvars
+import io
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+IMAGE_TILING = os.getenv('IMAGE_TILING', 'true').lower() in ('1', 'true', 'yes')
+IMAGE_TILE_MIN_SIDE = int(os.getenv('IMAGE_TILE_MIN_SIDE', 2000))
+IMAGE_TILE_MIN_ASPECT = float(os.getenv('IMAGE_TILE_MIN_ASPECT', 1.5))  # 4:3 camera photos are sent whole
+IMAGE_TILE_SIZE = int(os.getenv('IMAGE_TILE_SIZE', 1280))
+IMAGE_TILE_OVERLAP = int(os.getenv('IMAGE_TILE_OVERLAP', 160))  # px; keep above the tallest line of text
+IMAGE_TILE_BUDGET = int(os.getenv('IMAGE_TILE_BUDGET', 16))
+IMAGE_TILE_CONCURRENCY = int(os.getenv('IMAGE_TILE_CONCURRENCY', 4))
+
+REKOGNITION_MAX_BYTES = 5 * 1024 * 1024  # largest image Rekognition accepts as raw bytes
+EDGE_MARGIN = 3          # px; a box this close to a tile edge shared with a neighbour may be cut off
+DUPLICATE_OVERLAP = 0.5  # intersection over the smaller box above which two detections can be one
+CELL = 128               # px; spatial hash cell for finding overlapping detections
+
+
+class TileBudget:
+    """Tiles one request may still send to Rekognition"""
+
+    def __init__(self, limit=IMAGE_TILE_BUDGET):
+        self.limit = limit
+        self.remaining = limit
+        self._lock = threading.Lock()
+
+    def take(self, wanted):
+        """Claim up to `wanted` tiles; returns how many were granted"""
+        with self._lock:
+            granted = min(wanted, self.remaining)
+            self.remaining -= granted
+            return granted
+
+    def release(self, count):
+        with self._lock:
+            self.remaining += count
+
+
+def _axis(length, tile, overlap):
+    """Tile start offsets along one axis, evenly spaced so the last tile ends at the edge"""
+    if length <= tile:
+        return [0], length
+    count = math.ceil((length - overlap) / (tile - overlap))
+    step = (length - tile) / (count - 1)
+    return [round(i * step) for i in range(count)], tile
+
+
+def grid(width, height, max_tiles, tile_size=IMAGE_TILE_SIZE, overlap=IMAGE_TILE_OVERLAP):
+    """(left, top, right, bottom) tile boxes covering the image; tiles grow until there are at most max_tiles"""
+    while True:
+        xs, tile_w = _axis(width, tile_size, overlap)
+        ys, tile_h = _axis(height, tile_size, overlap)
+        if len(xs) * len(ys) <= max_tiles:
+            return [(x, y, x + tile_w, y + tile_h) for y in ys for x in xs]
+        tile_size = int(tile_size * 1.25)
+
+
+def plan_tiles(width, height, budget):
+    """Tiles for an image of this size, charged to budget; [] when the image should be sent whole"""
+    long_side, short_side = max(width, height), max(1, min(width, height))
+    if not IMAGE_TILING or long_side <= IMAGE_TILE_MIN_SIDE or long_side / short_side < IMAGE_TILE_MIN_ASPECT:
+        return []
+    granted = budget.take(len(grid(width, height, budget.limit)))
+    if granted < 2:
+        budget.release(granted)
+        return []
+    tiles = grid(width, height, granted)
+    budget.release(granted - len(tiles))
+    return tiles
+
+
+def downscale(image, max_bytes, quality=85):
+    """JPEG re-encoding of image, shrunk by a quarter per step until it is under max_bytes"""
+    image = image.convert('RGB')
+    while True:
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=quality)
+        if buffer.tell() <= max_bytes or max(image.size) <= 256:
+            return buffer.getvalue()
+        image = image.resize((max(1, image.width * 3 // 4), max(1, image.height * 3 // 4)), Image.BILINEAR)
+
+
+def encode_tiles(image, tiles, quality=90):
+    """JPEG bytes of each tile of image"""
+    image = image.convert('RGB')
+    encoded = []
+    for box in tiles:
+        buffer = io.BytesIO()
+        image.crop(box).save(buffer, format='JPEG', quality=quality)
+        encoded.append(buffer.getvalue() if buffer.tell() <= REKOGNITION_MAX_BYTES
+                       else downscale(image.crop(box), REKOGNITION_MAX_BYTES))
+    return encoded
+
+
+def _to_pixels(geometry_box, tile):
+    left, top, right, bottom = tile
+    tile_w, tile_h = right - left, bottom - top
+    x0 = left + geometry_box['Left'] * tile_w
+    y0 = top + geometry_box['Top'] * tile_h
+    return x0, y0, x0 + geometry_box['Width'] * tile_w, y0 + geometry_box['Height'] * tile_h
+
+
+def _is_cut(box, tile, width, height):
+    """True if box touches a tile edge that another tile overlaps (the text may continue past it)"""
+    x0, y0, x1, y1 = box
+    left, top, right, bottom = tile
+    return ((left > 0 and x0 - left < EDGE_MARGIN) or (top > 0 and y0 - top < EDGE_MARGIN)
+            or (right < width and right - x1 < EDGE_MARGIN) or (bottom < height and bottom - y1 < EDGE_MARGIN))
+
+
+def _overlap(a, b):
+    """Intersection area over the smaller box's area"""
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return w * h / smaller if smaller > 0 else 0.0
+
+
+def _cells(box):
+    for cx in range(int(box[0] // CELL), int(box[2] // CELL) + 1):
+        for cy in range(int(box[1] // CELL), int(box[3] // CELL) + 1):
+            yield cx, cy
+
+
+def _same_detection(a, b):
+    """True if a and b, from different tiles, look like one word or line seen twice"""
+    return (a['key'][0] != b['key'][0]
+            and a['detection'].get('Type') == b['detection'].get('Type')
+            and bool(a['text']) and (a['text'] in b['text'] or b['text'] in a['text'])
+            and _overlap(a['box'], b['box']) >= DUPLICATE_OVERLAP)
+
+
+def merge_detections(responses, tiles, width, height):
+    """Merge per-tile detect_text responses into one response in original-image coordinates.
+
+    Two detections from different tiles are the same one when they have the
+    same type, their boxes mostly overlap and one text contains the other
+    (a word cut at a tile edge reads as a prefix of the whole word). The
+    copy not cut by a tile edge wins, then the longer text, then the more
+    confident one. Ids are renumbered and ParentIds follow the kept line.
+    """
+    candidates = []
+    for tile_index, (tile, response) in enumerate(zip(tiles, responses)):
+        for detection in response.get('TextDetections', []):
+            geometry = detection.get('Geometry') or {}
+            box = _to_pixels(geometry['BoundingBox'], tile) if 'BoundingBox' in geometry else None
+            candidates.append({
+                'key': (tile_index, detection.get('Id')),
+                'detection': detection,
+                'tile': tile,
+                'box': box,
+                'cut': box is not None and _is_cut(box, tile, width, height),
+                'text': detection.get('DetectedText', '').strip().lower()
+            })
+
+    kept, alias, cells = [], {}, {}
+    # Best copies first: not cut by a tile edge, then the longest text, then the most confident
+    ranked = sorted(candidates, key=lambda c: (not c['cut'], len(c['text']), c['detection'].get('Confidence', 0)),
+                    reverse=True)
+    for candidate in ranked:
+        box = candidate['box']
+        duplicate = None if box is None else next(
+            (other for cell in _cells(box) for other in cells.get(cell, ()) if _same_detection(candidate, other)), None)
+        if duplicate is not None:
+            alias[candidate['key']] = duplicate['key']
+            continue
+        kept.append(candidate)
+        if box is not None:
+            for cell in _cells(box):
+                cells.setdefault(cell, []).append(candidate)
+
+    # Reading order: top to bottom, then left to right
+    kept.sort(key=lambda c: (c['box'][1], c['box'][0]) if c['box'] is not None else (math.inf, 0))
+    new_ids = {c['key']: new_id for new_id, c in enumerate(kept)}
+    merged = []
+    for candidate in kept:
+        detection = dict(candidate['detection'], Id=new_ids[candidate['key']])
+        parent = detection.pop('ParentId', None)
+        if parent is not None:
+            parent_key = (candidate['key'][0], parent)
+            parent_key = alias.get(parent_key, parent_key)
+            if parent_key in new_ids:
+                detection['ParentId'] = new_ids[parent_key]
+        if candidate['box'] is not None:
+            detection['Geometry'] = _geometry(candidate['box'], candidate['detection']['Geometry'], candidate['tile'],
+                                              width, height)
+        merged.append(detection)
+
+    first = responses[0] if responses else {}
+    return {
+        'TextDetections': merged,
+        'TextModelVersion': first.get('TextModelVersion'),
+        'Tiling': {
+            'tiles': len(tiles),
+            'tile_size': [tiles[0][2] - tiles[0][0], tiles[0][3] - tiles[0][1]] if tiles else None,
+            'detections': len(candidates),
+            'duplicates_removed': len(candidates) - len(kept)
+        }
+    }
+
+
+def _geometry(box, geometry, tile, width, height):
+    """Tile-relative Geometry rescaled to ratios of the original image"""
+    left, top, right, bottom = tile
+    x0, y0, x1, y1 = box
+    mapped = {'BoundingBox': {'Width': (x1 - x0) / width, 'Height': (y1 - y0) / height,
+                              'Left': x0 / width, 'Top': y0 / height}}
+    if 'Polygon' in geometry:
+        mapped['Polygon'] = [{'X': (left + point['X'] * (right - left)) / width,
+                              'Y': (top + point['Y'] * (bottom - top)) / height} for point in geometry['Polygon']]
+    return mapped
+
+
+def detect_text_tiled(detect_text, tile_bytes, tiles, width, height, concurrency=IMAGE_TILE_CONCURRENCY):
+    """Run detect_text(bytes) on every tile, at most `concurrency` at once, and merge the results"""
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(tiles))),
+                            thread_name_prefix='tile-detect') as pool:
+        # Each call runs in a copy of the caller's context, so its log lines keep the request id
+        futures = [pool.submit(contextvars.copy_context().run, detect_text, tile) for tile in tile_bytes]
+        responses = [future.result() for future in futures]
+    return merge_detections(responses, tiles, width, height)
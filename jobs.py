@@ -0,0 +1,383 @@
+import itertools
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+PRIORITIES = {'high': 0, 'normal': 5, 'low': 9}
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 8))
+JOB_RESULT_TTL_SECONDS = float(os.getenv('JOB_RESULT_TTL_SECONDS', 600))
+JOB_MAX_QUEUE = int(os.getenv('JOB_MAX_QUEUE', 1000))
+JOB_SSE_HEARTBEAT_SECONDS = float(os.getenv('JOB_SSE_HEARTBEAT_SECONDS', 15))
+JOB_DB_TIMEOUT = float(os.getenv('JOB_DB_TIMEOUT', 1.0))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', 0.5))  # how often /events re-reads a job run by another worker
+JOB_ORPHAN_SECONDS = 24 * 3600  # unfinished rows this old belong to a worker that died
+
+SAVE_SQL = """
+INSERT INTO jobs (id, kind, priority, status, progress, message, result, error,
+                  created_at, started_at, finished_at, expires_at, version)
+VALUES (:id, :kind, :priority, :status, :progress, :message, :result, :error,
+        :created_at, :started_at, :finished_at, :expires_at, :version)
+ON CONFLICT (id) DO UPDATE SET
+    status = excluded.status, progress = excluded.progress, message = excluded.message,
+    result = excluded.result, error = excluded.error, started_at = excluded.started_at,
+    finished_at = excluded.finished_at, expires_at = excluded.expires_at, version = excluded.version
+WHERE excluded.version > jobs.version
+"""
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at JOB_MAX_QUEUE"""
+
+
+class UnknownJobTypeError(Exception):
+    """Raised when no handler is registered for the submitted job type"""
+
+
+class Job:
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    FINISHED = (SUCCEEDED, FAILED)
+
+    def __init__(self, kind, params, priority):
+        self.local = True  # run by this process; False for a copy read from the JobStore
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.priority = priority
+        self.status = self.QUEUED
+        self.progress = 0
+        self.message = 'Queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.expires_at = None
+        self.version = 0
+
+    @property
+    def finished(self):
+        return self.status in self.FINISHED
+
+    def to_row(self):
+        return {
+            'id': self.id, 'kind': self.kind, 'priority': self.priority, 'status': self.status,
+            'progress': self.progress, 'message': self.message,
+            'result': None if self.result is None else json.dumps(self.result, default=str),
+            'error': self.error, 'created_at': self.created_at, 'started_at': self.started_at,
+            'finished_at': self.finished_at, 'expires_at': self.expires_at, 'version': self.version
+        }
+
+    @classmethod
+    def from_row(cls, row):
+        job = cls(row['kind'], {}, row['priority'])
+        job.local = False
+        for name, value in row.items():
+            setattr(job, name, value)
+        job.result = None if row['result'] is None else json.loads(row['result'])
+        return job
+
+    def to_dict(self, include_result=True):
+        data = {
+            'job_id': self.id,
+            'type': self.kind,
+            'priority': self.priority,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'expires_at': self.expires_at
+        }
+        if include_result and self.status == self.SUCCEEDED:
+            data['result'] = self.result
+        if self.status == self.FAILED:
+            data['error'] = self.error
+        return data
+
+
+def sse_event(version, snapshot):
+    """The Server-Sent Event for a job snapshot, and whether it is the stream's last"""
+    event = 'done' if snapshot['status'] in Job.FINISHED else 'progress'
+    return f"event: {event}\nid: {version}\ndata: {json.dumps(snapshot)}\n\n", event == 'done'
+
+
+class JobStore:
+    """Job status and results in SQLite, shared by every worker process.
+
+    A job runs in the process that accepted it; each update is written here
+    so that a GET /api/jobs/<id> or /events request landing on another
+    worker can still answer for it.
+    """
+
+    COLUMNS = ('id', 'kind', 'priority', 'status', 'progress', 'message', 'result', 'error',
+               'created_at', 'started_at', 'finished_at', 'expires_at', 'version')
+
+    def __init__(self, path, timeout=JOB_DB_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS jobs '
+                         '(id TEXT PRIMARY KEY, kind TEXT NOT NULL, priority TEXT NOT NULL, status TEXT NOT NULL, '
+                         'progress INTEGER NOT NULL, message TEXT, result TEXT, error TEXT, created_at REAL NOT NULL, '
+                         'started_at REAL, finished_at REAL, expires_at REAL, version INTEGER NOT NULL)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def save(self, row):
+        """Write a job row; an older version never overwrites a newer one"""
+        self._connection().execute(SAVE_SQL, row)
+
+    def load(self, job_id, now=None):
+        """The stored Job, or None if it is unknown or expired"""
+        now = time.time() if now is None else now
+        row = self._connection().execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (job_id, now)).fetchone()
+        return None if row is None else Job.from_row(dict(zip(self.COLUMNS, row)))
+
+    def purge(self, now=None):
+        now = time.time() if now is None else now
+        self._connection().execute('DELETE FROM jobs WHERE expires_at <= ? OR (expires_at IS NULL AND created_at < ?)',
+                                   (now, now - JOB_ORPHAN_SECONDS))
+
+
+class JobManager:
+    """Priority worker pool with an expiring result store.
+
+    Handlers are registered per job type as handler(params, progress) and
+    run on `workers` daemon threads, lowest priority number first and FIFO
+    within a priority. progress(percent, message) publishes an update that
+    wait() and events() subscribers see. Finished jobs are kept for
+    `result_ttl` seconds and then dropped.
+
+    With a `store`, every update is also written to the JobStore, and get()
+    and events() find jobs that another worker process is running. Jobs
+    still run in the process that accepted them, and wait() only works for
+    those. Without a store, jobs are visible only to their own process. If
+    the store cannot be written, jobs fall back to that in-memory behaviour
+    and the failure is counted as store_errors.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, result_ttl=JOB_RESULT_TTL_SECONDS,
+                 max_queue=JOB_MAX_QUEUE, latency_window=500, store=None):
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.max_queue = max_queue
+        self.store = store
+        self.handlers = {}
+
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._jobs = {}
+        self._expiry = deque()  # (expires_at, job_id) in finish order
+        self._threads = []
+        self._queued_by_priority = {}
+        self._running = 0
+        self._counts = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'rejected': 0, 'expired': 0, 'store_errors': 0}
+        self._queue_wait = deque(maxlen=latency_window)
+        self._run_time = deque(maxlen=latency_window)
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    def _start_workers(self):
+        # Called with the lock held; threads start on first submit so that
+        # importing the app (scripts, benchmarks) does not spawn workers.
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, kind, params=None, priority='normal'):
+        if kind not in self.handlers:
+            raise UnknownJobTypeError(kind)
+        if priority not in PRIORITIES:
+            raise ValueError(f"Invalid priority. Use: {', '.join(PRIORITIES)}")
+
+        job = Job(kind, params or {}, priority)
+        with self._lock:
+            self._purge_expired()
+            if self._queue.qsize() >= self.max_queue:
+                self._counts['rejected'] += 1
+                raise QueueFullError(f"job queue is full ({self.max_queue})")
+            self._jobs[job.id] = job
+            self._counts['submitted'] += 1
+            self._queued_by_priority[priority] = self._queued_by_priority.get(priority, 0) + 1
+            self._start_workers()
+            purge = self._counts['submitted'] % 100 == 0
+            row = job.to_row()
+        self._store_call('save', row)
+        if purge:
+            self._store_call('purge')
+        self._queue.put((PRIORITIES[priority], next(self._seq), job))
+        return job
+
+    def get(self, job_id):
+        """The job, whichever worker process runs it; None if unknown or expired"""
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+        return job if job is not None else self._store_call('load', job_id)
+
+    def _store_call(self, method, *args):
+        if self.store is None:
+            return None
+        try:
+            return getattr(self.store, method)(*args)
+        except (sqlite3.Error, OSError) as e:
+            log.warning("Job store %s failed: %s", method, e)
+            with self._lock:
+                self._counts['store_errors'] += 1
+            return None
+
+    def wait(self, job, timeout=None):
+        """Block until the job finishes or timeout passes; return job.finished"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while not job.finished:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+            return job.finished
+
+    def events(self, job, heartbeat=JOB_SSE_HEARTBEAT_SECONDS):
+        """Yield Server-Sent Events for every job update until it finishes.
+
+        A job run by another worker process is followed by re-reading it from
+        the store every JOB_POLL_SECONDS; the stream ends if it expires there.
+        """
+        seen = -1
+        while True:
+            version, snapshot = self.next_update(job, seen, heartbeat)
+            if snapshot is None:
+                return
+            if version == seen:
+                yield ': keep-alive\n\n'
+                continue
+            seen = version
+            event, done = sse_event(version, snapshot)
+            yield event
+            if done:
+                return
+
+    def next_update(self, job, seen, timeout=0):
+        """(version, snapshot) once job moves past version `seen` or timeout passes; (None, None) once it expired
+        from the store. With timeout=0 it only checks, so an event loop can poll it."""
+        if job.local:
+            return self._next_local_update(job, seen, timeout)
+        return self._next_stored_update(job, seen, timeout)
+
+    def _next_local_update(self, job, seen, timeout):
+        """(version, snapshot) once job moves past version `seen` or timeout passes"""
+        with self._changed:
+            if job.version == seen:
+                self._changed.wait(timeout)
+            return job.version, job.to_dict(include_result=job.finished)
+
+    def _next_stored_update(self, job, seen, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            stored = self._store_call('load', job.id)
+            remaining = deadline - time.monotonic()
+            if stored is None or stored.version != seen or remaining <= 0:
+                break
+            time.sleep(min(JOB_POLL_SECONDS, remaining))
+        if stored is None:
+            return None, None
+        return stored.version, stored.to_dict(include_result=stored.finished)
+
+    def _update(self, job, **fields):
+        with self._changed:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.version += 1
+            row = job.to_row()
+        # Written before waiters are woken, so what wait() returns is already visible to other workers
+        self._store_call('save', row)
+        with self._changed:
+            self._changed.notify_all()
+
+    def _work(self):
+        while True:
+            _, _, job = self._queue.get()
+            started = time.time()
+            with self._lock:
+                self._queued_by_priority[job.priority] -= 1
+                self._running += 1
+                self._queue_wait.append(started - job.created_at)
+            self._update(job, status=Job.RUNNING, started_at=started, message='Running')
+
+            def progress(percent, message=None, job=job):
+                self._update(job, progress=max(0, min(100, int(percent))), message=message or job.message)
+
+            try:
+                result = self.handlers[job.kind](job.params, progress)
+                outcome = dict(status=Job.SUCCEEDED, result=result, progress=100, message='Done')
+            except Exception as e:
+                log.error("Job failed: %s", e, extra={'job_id': job.id, 'job_kind': job.kind})
+                outcome = dict(status=Job.FAILED, error=str(e), message='Failed')
+
+            finished = time.time()
+            with self._lock:
+                self._running -= 1
+                self._counts['succeeded' if outcome['status'] == Job.SUCCEEDED else 'failed'] += 1
+                self._run_time.append(finished - started)
+                self._expiry.append((finished + self.result_ttl, job.id))
+            self._update(job, finished_at=finished, expires_at=finished + self.result_ttl, **outcome)
+            self._queue.task_done()
+
+    def _purge_expired(self):
+        now = time.time()
+        while self._expiry and self._expiry[0][0] <= now:
+            _, job_id = self._expiry.popleft()
+            if self._jobs.pop(job_id, None) is not None:
+                self._counts['expired'] += 1
+
+    @staticmethod
+    def _percentiles(samples):
+        if not samples:
+            return {'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+        ordered = sorted(samples)
+        pick = lambda pct: ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+        return {'p50_ms': round(pick(0.50) * 1000, 1), 'p95_ms': round(pick(0.95) * 1000, 1),
+                'max_ms': round(ordered[-1] * 1000, 1)}
+
+    def stats(self):
+        with self._lock:
+            self._purge_expired()
+            return {
+                'workers': self.workers,
+                'queue_depth': sum(self._queued_by_priority.values()),
+                'queue_depth_by_priority': {p: n for p, n in self._queued_by_priority.items() if n},
+                'running': self._running,
+                'stored_jobs': len(self._jobs),
+                'shared_store': self.store.path if self.store is not None else None,
+                'counts': dict(self._counts),
+                'queue_wait': self._percentiles(self._queue_wait),
+                'run_time': self._percentiles(self._run_time)
+            }
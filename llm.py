@@ -0,0 +1,159 @@
+"""
+Bedrock LLM access: model routing, prompts and response parsing.
+
+langchain_aws takes about a second to import, so the Bedrock client is set
+up on the first call to available() or invoke() rather than when the app
+starts; processes that only need the rule engine never import it.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+import aws_clients
+from circuit_breaker import CircuitOpenError, breakers
+from model_router import ModelRouter, parse_models
+from profiling import span
+
+log = logging.getLogger(__name__)
+
+MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "meta.llama3-8b-instruct-v1:0")
+# Candidate models for routing, fastest first; defaults to just MODEL_ID
+BEDROCK_MODELS = parse_models(os.getenv("BEDROCK_MODELS"), MODEL_ID)
+REGION = aws_clients.REGION
+
+model_router = ModelRouter(BEDROCK_MODELS)
+
+_lock = threading.Lock()
+_models = {}     # model_id -> LLM client
+_status = None   # None until first use, then True/False
+
+
+def _load():
+    global _status
+    with _lock:
+        if _status is not None:
+            return
+        try:
+            from langchain_aws import BedrockLLM
+
+            client = aws_clients.registry.client('bedrock-runtime')
+            _models[MODEL_ID] = BedrockLLM(model_id=MODEL_ID, region_name=REGION, client=client)
+            _status = True
+            log.info("Bedrock initialized with %s in %s", MODEL_ID, REGION)
+            if len(BEDROCK_MODELS) > 1:
+                log.info("Routing LLM calls across %s", ', '.join(BEDROCK_MODELS))
+        except Exception as e:
+            _status = False
+            log.error("Bedrock initialization failed, falling back to rule-based analysis: %s", e)
+
+
+def available():
+    """True if Bedrock can be used; sets up the client on the first call"""
+    if _status is None:
+        _load()
+    return _status
+
+
+def loaded():
+    """None until the first available()/invoke(), then whether Bedrock could be set up"""
+    return _status
+
+
+def use_llm(model):
+    """Answer every routed model with `model` (e.g. the load-test fake)"""
+    global _status
+    with _lock:
+        _models.clear()
+        _models.update(dict.fromkeys(BEDROCK_MODELS, model))
+        _status = True
+
+
+def llm_for(model_id):
+    """The LLM client for model_id, created on first use"""
+    model = _models.get(model_id)
+    if model is None:
+        from langchain_aws import BedrockLLM
+
+        client = aws_clients.registry.client('bedrock-runtime')
+        model = _models.setdefault(model_id, BedrockLLM(model_id=model_id, region_name=REGION, client=client))
+    return model
+
+
+def invoke_llm(prompt, endpoint='analyze', input_chars=None):
+    """Invoke the routed Bedrock model through its circuit breaker; returns (response, model_id)"""
+    model_id = model_router.choose(endpoint, len(prompt) if input_chars is None else input_chars)
+    start = time.monotonic()
+    try:
+        with span(f'llm.invoke {model_id}'):
+            response = breakers['bedrock'].call(llm_for(model_id).invoke, prompt)
+    except CircuitOpenError:
+        raise
+    except Exception:
+        model_router.record(model_id, time.monotonic() - start, ok=False)
+        raise
+    model_router.record(model_id, time.monotonic() - start, ok=True)
+    return response, model_id
+
+
+def llm_response_text(response):
+    """Normalize the different LLM response shapes to plain text"""
+    if hasattr(response, 'content'):
+        return response.content
+    elif isinstance(response, dict) and 'content' in response:
+        return response['content']
+    return str(response)
+
+
+def extract_json(response_text, open_char='{', close_char='}'):
+    """Parse the first JSON object/array embedded in an LLM response, or None"""
+    json_start = response_text.find(open_char)
+    json_end = response_text.rfind(close_char) + 1
+    if json_start != -1 and json_end != 0:
+        return json.loads(response_text[json_start:json_end])
+    return None
+
+
+def analysis_prompt(text):
+    return f"Analyze this text for fraud indicators: {text}"
+
+
+def call_scenario_prompt(difficulty):
+    return f"""Generate a realistic {difficulty} difficulty scam call scenario. Return ONLY a JSON object with this exact format:
+{{
+    "caller_name": "caller identity (e.g., Bank Security, IRS Agent)",
+    "script": "what the scammer says (1-2 sentences)",
+    "red_flags": ["list", "of", "fraud", "indicators"]
+}}
+
+Make it {difficulty} to detect. Use common scam tactics like urgency, threats, requests for personal info, or too-good-to-be-true offers."""
+
+
+def practice_examples_prompt(example_type, count):
+    return f"""Generate {count} realistic {example_type} examples for fraud detection training. Return ONLY a JSON array:
+[
+    {{
+        "type": "category",
+        "text": "example content",
+        "is_fraud": true/false,
+        "explanation": "why this is/isn't fraud"
+    }}
+]
+
+Types: phishing_email, scam_text, fake_news, investment_scam, tech_support_scam, legitimate_message
+Make them realistic and educational."""
+
+
+def home_examples_prompt(count):
+    return f"""Generate {count} diverse fraud detection examples. Return ONLY a JSON array with this exact format:
+[
+    {{
+        "type": "example_type",
+        "text": "example text content",
+        "is_fraud": true/false
+    }}
+]
+
+Include mix of: phishing_email, fake_news, scam_text, legitimate_message. Make examples realistic and varied."""
@@ -0,0 +1,326 @@
+"""Local stand-ins for Bedrock, Rekognition and Polly.
+
+Each fake sleeps for a latency drawn from a configurable distribution and
+fails with a configurable error rate, then returns a payload shaped like the
+real service response so the app's parsing and scoring code runs unchanged.
+"""
+
+import asyncio
+import io
+import json
+import math
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+
+class LatencyModel:
+    """Latency distribution in milliseconds.
+
+    Spec strings:
+        const:50             always 50 ms
+        uniform:20,80        uniform between 20 and 80 ms
+        normal:100,15        mean 100 ms, stddev 15 ms (clamped at 0)
+        lognormal:120,0.5    median 120 ms, sigma 0.5 (long right tail)
+    """
+
+    def __init__(self, kind='const', params=(0.0,)):
+        self.kind = kind
+        self.params = tuple(float(p) for p in params)
+
+    @classmethod
+    def parse(cls, spec):
+        if ':' not in spec:
+            return cls('const', (spec,))
+        kind, _, raw = spec.partition(':')
+        params = [p for p in raw.split(',') if p]
+        if kind not in ('const', 'uniform', 'normal', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        return cls(kind, params)
+
+    def sample(self, rng):
+        p = self.params
+        if self.kind == 'uniform':
+            ms = rng.uniform(p[0], p[1])
+        elif self.kind == 'normal':
+            ms = rng.gauss(p[0], p[1])
+        elif self.kind == 'lognormal':
+            ms = rng.lognormvariate(math.log(p[0]), p[1])
+        else:
+            ms = p[0]
+        return max(0.0, ms) / 1000.0
+
+    def __str__(self):
+        return f"{self.kind}:{','.join(f'{p:g}' for p in self.params)}"
+
+
+class _FakeEvents:
+    """Just enough of botocore's event emitter for the client registry's pool counters"""
+
+    def __init__(self):
+        self._handlers = {}
+
+    def register(self, event_name, handler):
+        self._handlers.setdefault(event_name, []).append(handler)
+
+    def emit(self, event_name, **kwargs):
+        for handler in self._handlers.get(event_name, ()):
+            handler(**kwargs)
+
+
+class _FakeMeta:
+    def __init__(self, service_name):
+        self.events = _FakeEvents()
+        self.endpoint_url = f'https://{service_name}.fake.local'
+
+
+class FakeService:
+    """Shared latency/error behaviour for the fake clients"""
+
+    service_name = 'fake'
+
+    def __init__(self, latency='const:0', error_rate=0.0, seed=None):
+        self.latency = latency if isinstance(latency, LatencyModel) else LatencyModel.parse(latency)
+        self.error_rate = float(error_rate)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.meta = _FakeMeta(self.service_name)
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency.sample(self._rng)
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def _error(self, operation):
+        return ClientError(
+            {'Error': {'Code': 'ThrottlingException', 'Message': f'Simulated {self.service_name} failure'},
+             'ResponseMetadata': {'HTTPStatusCode': 429}},
+            operation
+        )
+
+    def _simulate(self, operation):
+        delay, fail = self._draw()
+        self.meta.events.emit('before-send')
+        try:
+            time.sleep(delay)
+        finally:
+            self.meta.events.emit('response-received')
+        if fail:
+            raise self._error(operation)
+
+    async def _simulate_async(self, operation):
+        delay, fail = self._draw()
+        await asyncio.sleep(delay)
+        if fail:
+            raise self._error(operation)
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'errors': self.errors, 'latency': str(self.latency), 'error_rate': self.error_rate}
+
+
+class FakeBedrockLLM(FakeService):
+    """Stand-in for langchain_aws.BedrockLLM with an invoke(prompt) method"""
+
+    service_name = 'bedrock'
+
+    SCAM_SAMPLES = [
+        ('phishing_email', 'Your PayPal account has been limited. Click here to restore access within 24 hours.', True),
+        ('scam_text', 'USPS: your package is on hold. Pay the $1.99 redelivery fee at usps-redeliver.info', True),
+        ('investment_scam', 'Send $500 in bitcoin today and I guarantee you $5000 return by Friday.', True),
+        ('tech_support_scam', 'Microsoft detected a virus on your PC. Call 1-800-555-0199 now.', True),
+        ('fake_news', "Doctors hate this miracle cure that reverses aging overnight!", True),
+        ('legitimate_message', 'Your dentist appointment is confirmed for Tuesday at 3pm.', False),
+        ('legitimate_message', 'Your order #48213 has shipped and will arrive Thursday.', False),
+    ]
+
+    def invoke(self, prompt):
+        self._simulate('InvokeModel')
+        return self.respond(prompt)
+
+    def respond(self, prompt):
+        lowered = prompt.lower()
+        if 'scam call scenario' in lowered:
+            return json.dumps({
+                'caller_name': 'Bank Security Department',
+                'script': 'This is your bank. We detected unusual charges and need you to confirm your card number and PIN right away.',
+                'red_flags': ['urgency', 'request for PIN', 'unsolicited call']
+            })
+        if 'return only a json array' in lowered:
+            count = 5
+            for token in lowered.split():
+                if token.isdigit():
+                    count = int(token)
+                    break
+            examples = []
+            for i in range(count):
+                example_type, text, is_fraud = self.SCAM_SAMPLES[i % len(self.SCAM_SAMPLES)]
+                examples.append({
+                    'type': example_type,
+                    'text': text,
+                    'is_fraud': is_fraud,
+                    'explanation': 'Uses urgency and an unusual payment request' if is_fraud else 'Routine notification with no requests'
+                })
+            return 'Here are the examples:\n' + json.dumps(examples, indent=2)
+        return ("Risk Level: HIGH\n"
+                "Warning Signs: Urgency, request for credentials, suspicious link\n"
+                "Explanation: The message pressures the reader to act immediately and asks for "
+                "account details through a link that does not belong to the claimed sender.")
+
+
+class FakeRekognitionClient(FakeService):
+    """Stand-in for the boto3 Rekognition client"""
+
+    service_name = 'rekognition'
+
+    LINES = ['URGENT: Account Suspended', 'Click here to verify your identity',
+             'Congratulations, you are a winner!', 'Offer expires in 24 hours', 'support@secure-bank-login.com']
+
+    LABELS = [('Text', 99.2), ('Document', 91.5), ('Page', 88.0), ('Screenshot', 85.3),
+              ('Electronics', 72.1), ('Qr Code', 64.0), ('Paper', 61.8)]
+
+    @staticmethod
+    def _box(index, total):
+        top = 0.05 + 0.85 * index / max(total, 1)
+        box = {'Width': 0.6, 'Height': 0.05, 'Left': 0.1, 'Top': top}
+        polygon = [{'X': box['Left'], 'Y': top}, {'X': box['Left'] + box['Width'], 'Y': top},
+                   {'X': box['Left'] + box['Width'], 'Y': top + box['Height']}, {'X': box['Left'], 'Y': top + box['Height']}]
+        return {'BoundingBox': box, 'Polygon': polygon}
+
+    def detect_text(self, Image=None, **kwargs):
+        self._simulate('DetectText')
+        return self.text_payload()
+
+    def text_payload(self):
+        detections = []
+        next_id = 0
+        for i, line in enumerate(self.LINES):
+            line_id = next_id
+            detections.append({'DetectedText': line, 'Type': 'LINE', 'Id': line_id,
+                               'Confidence': 98.5 - i, 'Geometry': self._box(i, len(self.LINES))})
+            next_id += 1
+            for word in line.split():
+                detections.append({'DetectedText': word, 'Type': 'WORD', 'Id': next_id, 'ParentId': line_id,
+                                   'Confidence': 97.0 - i, 'Geometry': self._box(i, len(self.LINES))})
+                next_id += 1
+        return {'TextDetections': detections, 'TextModelVersion': '3.0',
+                'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def detect_labels(self, Image=None, MaxLabels=None, **kwargs):
+        self._simulate('DetectLabels')
+        return self.labels_payload(MaxLabels)
+
+    def labels_payload(self, MaxLabels=None):
+        labels = [{'Name': name, 'Confidence': conf, 'Instances': [], 'Parents': [],
+                   'Aliases': [], 'Categories': []} for name, conf in self.LABELS]
+        if MaxLabels:
+            labels = labels[:MaxLabels]
+        return {'Labels': labels, 'LabelModelVersion': '3.0',
+                'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+
+class FakePollyClient(FakeService):
+    """Stand-in for the boto3 Polly client"""
+
+    service_name = 'polly'
+
+    # MPEG-1 Layer III, 128 kbps, 44.1 kHz frame header; each frame is 417 bytes
+    _FRAME = b'\xff\xfb\x90\x64' + b'\x00' * 413
+
+    def synthesize_speech(self, Text='', OutputFormat='mp3', VoiceId='Matthew', Engine='standard', **kwargs):
+        self._simulate('SynthesizeSpeech')
+        return {'AudioStream': io.BytesIO(self.audio_bytes(Text)), 'ContentType': 'audio/mpeg',
+                'RequestCharacters': len(Text), 'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+    def audio_bytes(self, Text):
+        # Roughly 15 characters per second of speech, ~38 frames per second
+        frames = max(1, int(len(Text) / 15 * 38))
+        return b'ID3\x03\x00\x00\x00\x00\x00\x00' + self._FRAME * frames
+
+
+class FakeSession:
+    """boto3.Session look-alike whose client() hands out the fakes"""
+
+    def __init__(self, rekognition=None, polly=None):
+        self.rekognition = rekognition or FakeRekognitionClient()
+        self.polly = polly or FakePollyClient()
+
+    def client(self, service_name, region_name=None, **kwargs):
+        if service_name == 'rekognition':
+            return self.rekognition
+        if service_name == 'polly':
+            return self.polly
+        raise ValueError(f"No fake available for {service_name}")
+
+
+def build_fakes(bedrock_latency='const:0', rekognition_latency='const:0', polly_latency='const:0',
+                bedrock_errors=0.0, rekognition_errors=0.0, polly_errors=0.0, seed=None):
+    """Return (session, llm) stand-ins ready for app.use_aws_clients()"""
+    llm = FakeBedrockLLM(bedrock_latency, bedrock_errors, seed)
+    session = FakeSession(
+        rekognition=FakeRekognitionClient(rekognition_latency, rekognition_errors, seed),
+        polly=FakePollyClient(polly_latency, polly_errors, seed)
+    )
+    return session, llm
+
+
+class _AsyncBody:
+    """Minimal stand-in for an aiobotocore StreamingBody"""
+
+    def __init__(self, data):
+        self._data = data
+
+    async def read(self):
+        return self._data
+
+
+class AsyncFakeBedrockRuntime:
+    """aiobotocore bedrock-runtime look-alike backed by a FakeBedrockLLM"""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    async def invoke_model(self, modelId=None, body='{}', **kwargs):
+        await self.llm._simulate_async('InvokeModel')
+        prompt = json.loads(body).get('prompt', '')
+        payload = {'generation': self.llm.respond(prompt), 'stop_reason': 'stop'}
+        return {'body': _AsyncBody(json.dumps(payload).encode('utf-8')), 'contentType': 'application/json'}
+
+
+class AsyncFakeRekognition:
+    def __init__(self, rekognition):
+        self.rekognition = rekognition
+
+    async def detect_text(self, Image=None, **kwargs):
+        await self.rekognition._simulate_async('DetectText')
+        return self.rekognition.text_payload()
+
+    async def detect_labels(self, Image=None, MaxLabels=None, **kwargs):
+        await self.rekognition._simulate_async('DetectLabels')
+        return self.rekognition.labels_payload(MaxLabels)
+
+
+class AsyncFakePolly:
+    def __init__(self, polly):
+        self.polly = polly
+
+    async def synthesize_speech(self, Text='', **kwargs):
+        await self.polly._simulate_async('SynthesizeSpeech')
+        return {'AudioStream': _AsyncBody(self.polly.audio_bytes(Text)), 'ContentType': 'audio/mpeg'}
+
+
+def build_async_clients(session, llm):
+    """Async client dict for asgi_app.upstream.use_clients(), sharing the sync fakes' settings"""
+    return {
+        'bedrock-runtime': AsyncFakeBedrockRuntime(llm),
+        'rekognition': AsyncFakeRekognition(session.rekognition),
+        'polly': AsyncFakePolly(session.polly),
+    }
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the Flask app.
+
+Starts the app on a local threaded server with Bedrock, Rekognition and
+Polly replaced by the fakes in loadtest/fake_aws.py, drives every route at
+increasing concurrency and writes per-endpoint throughput, latency
+percentiles and error rates as JSON.
+
+    python -m loadtest.run --concurrency 1,8,32 --duration 3 \\
+        --bedrock-latency lognormal:800,0.4 --rekognition-errors 0.05 \\
+        --output loadtest_results.json
+"""
+
+import argparse
+import base64
+import http.client
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aws_clients
+from loadtest.fake_aws import build_fakes
+
+
+def _sample_image_b64(width=640, height=480):
+    from PIL import Image, ImageDraw
+    image = Image.new('RGB', (width, height), color=(240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, width, 60], fill=(200, 30, 30))
+    for y in range(90, height - 20, 24):
+        draw.text((20, y), 'URGENT: verify your account now to claim your prize', fill=(0, 0, 0))
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=85)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+SCAM_TEXT = ("URGENT: Your bank account has been suspended. Click here to verify your identity "
+             "within 24 hours or send $200 in gift cards to restore access.")
+
+
+def build_scenarios(token):
+    """Every route with a representative request body: (name, method, path, body, headers)"""
+    image = _sample_image_b64()
+    auth = {'Authorization': f'Bearer {token}'}
+    return [
+        ('GET /', 'GET', '/', None, {}),
+        ('GET /api/health', 'GET', '/api/health', None, {}),
+        ('GET /api/stats', 'GET', '/api/stats', None, {}),
+        ('GET /api/examples', 'GET', '/api/examples?lang=en&count=4', None, {}),
+        ('GET /api/translations/<lang>', 'GET', '/api/translations/es', None, {}),
+        ('POST /register', 'POST', '/register', lambda: {'email': f'load-{uuid.uuid4().hex}@example.com', 'password': 'load-test-pw'}, {}),
+        ('POST /login', 'POST', '/login', {'email': 'loadtest@example.com', 'password': 'load-test-pw'}, {}),
+        ('POST /analyze', 'POST', '/analyze', {'text': SCAM_TEXT}, auth),
+        ('POST /api/analyze/email', 'POST', '/api/analyze/email',
+         {'sender': 'security@free-email.com', 'subject': 'Urgent: account suspended', 'content': SCAM_TEXT}, {}),
+        ('POST /api/analyze/text', 'POST', '/api/analyze/text', {'content': SCAM_TEXT, 'sender_number': '+1-900-555-0199'}, {}),
+        ('POST /api/analyze/call', 'POST', '/api/analyze/call',
+         {'caller_number': '+1-202-555-0143', 'call_type': 'unknown', 'urgency_level': 'high'}, {}),
+        ('POST /api/analyze/website', 'POST', '/api/analyze/website',
+         {'url': 'http://secure-login.fake-site.com', 'content': 'Act now! Limited time free money offer'}, {}),
+        ('POST /api/analyze/image', 'POST', '/api/analyze/image', {'image': image}, {}),
+        ('POST /api/analyze/images', 'POST', '/api/analyze/images', {'images': [image, image, image]}, {}),
+        ('POST /api/generate/call-scenario', 'POST', '/api/generate/call-scenario', {'difficulty': 'hard'}, {}),
+        ('POST /api/generate/call-audio', 'POST', '/api/generate/call-audio',
+         {'script': 'This is the IRS. You owe back taxes and must pay today.', 'voice_type': 'authority'}, {}),
+        ('POST /api/practice/call-test', 'POST', '/api/practice/call-test', {'difficulty': 'medium', 'include_audio': True}, {}),
+        ('POST /api/practice/call-test/<id>/submit', 'POST', '/api/practice/call-test/test_1234/submit',
+         {'is_scam': True, 'identified_flags': ['urgency', 'payment demand']}, {}),
+        ('POST /api/generate/examples', 'POST', '/api/generate/examples', {'type': 'mixed', 'count': 5}, {}),
+        ('GET /history', 'GET', '/history', None, auth),
+    ]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _worker(port, method, path, body, headers, deadline, max_requests, counter, lock):
+    latencies = []
+    statuses = {}
+    failures = 0
+    while time.monotonic() < deadline:
+        with lock:
+            if counter[0] >= max_requests:
+                break
+            counter[0] += 1
+        payload = body() if callable(body) else body
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        req_headers = dict(headers)
+        if data is not None:
+            req_headers['Content-Type'] = 'application/json'
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            conn.request(method, path, body=data, headers=req_headers)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            status = response.status
+        except Exception:
+            status = 'connection_error'
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        statuses[status] = statuses.get(status, 0) + 1
+        if status == 'connection_error' or status >= 500:
+            failures += 1
+    return latencies, statuses, failures
+
+
+def run_level(port, scenario, concurrency, duration, max_requests):
+    name, method, path, body, headers = scenario
+    deadline = time.monotonic() + duration
+    counter, lock = [0], threading.Lock()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(_worker, port, method, path, body, headers, deadline, max_requests, counter, lock)
+                   for _ in range(concurrency)]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(l for r in results for l in r[0])
+    statuses = {}
+    for _, worker_statuses, _ in results:
+        for status, count in worker_statuses.items():
+            statuses[str(status)] = statuses.get(str(status), 0) + count
+    errors = sum(r[2] for r in results)
+    total = len(latencies)
+    return {
+        'endpoint': name,
+        'concurrency': concurrency,
+        'requests': total,
+        'duration_seconds': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(_percentile(latencies, 50), 2) if total else None,
+        'p95_ms': round(_percentile(latencies, 95), 2) if total else None,
+        'p99_ms': round(_percentile(latencies, 99), 2) if total else None,
+        'max_ms': round(latencies[-1], 2) if total else None,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'status_counts': statuses
+    }
+
+
+def start_app(fake_session, fake_llm, pool_size=None):
+    """Import the app against a throwaway database and serve it on a free port"""
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')  # keep per-request log lines out of the report
+    from flask_jwt_extended import create_access_token
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    import app as app_module
+    from models import User, db
+
+    if pool_size:
+        aws_clients.registry.max_pool_connections = pool_size
+    app_module.use_aws_clients(fake_session, fake_llm)
+    app_module.init_db(app_module.app)
+    with app_module.app.app_context():
+        if not User.query.filter_by(email='loadtest@example.com').first():
+            user = User(email='loadtest@example.com')
+            user.set_password('load-test-pw')
+            db.session.add(user)
+            db.session.commit()
+        user = User.query.filter_by(email='loadtest@example.com').first()
+        token = create_access_token(identity=str(user.id))
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, token
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline load test with local AWS stand-ins')
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds per endpoint per level')
+    parser.add_argument('--max-requests', type=int, default=2000, help='request cap per endpoint per level')
+    parser.add_argument('--endpoints', default='', help='comma-separated substrings to select endpoints')
+    parser.add_argument('--bedrock-latency', default='lognormal:400,0.4')
+    parser.add_argument('--rekognition-latency', default='lognormal:150,0.3')
+    parser.add_argument('--polly-latency', default='lognormal:250,0.3')
+    parser.add_argument('--bedrock-errors', type=float, default=0.0)
+    parser.add_argument('--rekognition-errors', type=float, default=0.0)
+    parser.add_argument('--polly-errors', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--aws-pool-size', type=int, default=None,
+                        help='override AWS_MAX_POOL_CONNECTIONS to see pool saturation')
+    parser.add_argument('--output', default='-', help='JSON output path, or - for stdout')
+    args = parser.parse_args(argv)
+
+    db_dir = tempfile.mkdtemp(prefix='scamsense-loadtest-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'loadtest.db')}"
+    os.environ['IMAGE_CACHE_PATH'] = os.path.join(db_dir, 'image_cache.json')
+    os.environ['RATE_LIMIT'] = 'false'  # all load comes from one client address
+
+    fake_session, fake_llm = build_fakes(
+        args.bedrock_latency, args.rekognition_latency, args.polly_latency,
+        args.bedrock_errors, args.rekognition_errors, args.polly_errors, args.seed
+    )
+    server, token = start_app(fake_session, fake_llm, args.aws_pool_size)
+    port = server.server_port
+
+    scenarios = build_scenarios(token)
+    if args.endpoints:
+        wanted = [w.strip() for w in args.endpoints.split(',') if w.strip()]
+        scenarios = [s for s in scenarios if any(w in s[0] for w in wanted)]
+    levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+
+    results = []
+    try:
+        for concurrency in levels:
+            for scenario in scenarios:
+                result = run_level(port, scenario, concurrency, args.duration, args.max_requests)
+                results.append(result)
+                print(f"{result['endpoint']:<45} c={concurrency:<4} {result['throughput_rps']:>8.1f} rps  "
+                      f"p50={result['p50_ms']}ms p99={result['p99_ms']}ms err={result['error_rate']:.1%}",
+                      file=sys.stderr)
+    finally:
+        server.shutdown()
+
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {
+            'concurrency_levels': levels,
+            'duration_seconds': args.duration,
+            'max_requests': args.max_requests,
+            'fakes': {
+                'bedrock': fake_llm.stats(),
+                'rekognition': fake_session.rekognition.stats(),
+                'polly': fake_session.polly.stats()
+            }
+        },
+        'aws_connection_pools': aws_clients.registry.stats(),
+        'results': results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output)
+        print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Latency-aware routing of LLM prompts across several Bedrock model IDs.
+
+BEDROCK_MODELS lists the candidate models from fastest/smallest to
+slowest/largest. Each call names its endpoint; the endpoint's class sets
+the latency SLO and the preference order:
+
+- interactive endpoints ('analyze', 'call-scenario') prefer the fastest
+  model, unless the input is longer than MODEL_LONG_INPUT_CHARS, in which
+  case they prefer the largest;
+- background endpoints ('examples') prefer the largest model and accept a
+  much looser SLO.
+
+The first model in that order whose recent p95 latency is within the SLO
+and whose recent error rate is below MODEL_MAX_ERROR_RATE is chosen. Stats
+only cover the last MODEL_STATS_WINDOW_SECONDS, so a model that was
+shifted away from for being slow becomes eligible again once its old
+samples age out.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+MODEL_SLO_INTERACTIVE_MS = float(os.getenv('MODEL_SLO_INTERACTIVE_MS', 3000))
+MODEL_SLO_BACKGROUND_MS = float(os.getenv('MODEL_SLO_BACKGROUND_MS', 20000))
+MODEL_LONG_INPUT_CHARS = int(os.getenv('MODEL_LONG_INPUT_CHARS', 2000))
+MODEL_MAX_ERROR_RATE = float(os.getenv('MODEL_MAX_ERROR_RATE', 0.2))
+MODEL_STATS_WINDOW_SECONDS = float(os.getenv('MODEL_STATS_WINDOW_SECONDS', 300))
+MODEL_MIN_SAMPLES = 5  # fewer recent calls than this and the model counts as healthy
+
+ENDPOINT_CLASSES = {'analyze': 'interactive', 'call-scenario': 'interactive', 'examples': 'background'}
+
+
+def parse_models(value, default):
+    models = [model.strip() for model in (value or '').split(',') if model.strip()]
+    return list(dict.fromkeys(models)) or [default]
+
+
+class _ModelStats:
+    def __init__(self, window_seconds):
+        self.window_seconds = window_seconds
+        self.samples = deque()  # (finished_at, elapsed_ms, ok)
+        self.calls = 0
+        self.errors = 0
+        self.routed = {}  # endpoint -> times chosen
+
+    def add(self, elapsed_ms, ok, now):
+        self.samples.append((now, elapsed_ms, ok))
+        self.calls += 1
+        if not ok:
+            self.errors += 1
+        self.expire(now)
+
+    def expire(self, now):
+        cutoff = now - self.window_seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+
+    def summary(self):
+        latencies = sorted(elapsed for _, elapsed, ok in self.samples if ok)
+        failures = sum(1 for _, _, ok in self.samples if not ok)
+        count = len(self.samples)
+        return {
+            'recent_calls': count,
+            'p50_ms': round(latencies[len(latencies) // 2], 1) if latencies else None,
+            'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1) if latencies else None,
+            'error_rate': round(failures / count, 4) if count else 0.0
+        }
+
+
+class ModelRouter:
+    def __init__(self, models, slo_ms=None, long_input_chars=MODEL_LONG_INPUT_CHARS,
+                 max_error_rate=MODEL_MAX_ERROR_RATE, window_seconds=MODEL_STATS_WINDOW_SECONDS):
+        self.models = list(models)
+        self.slo_ms = slo_ms or {'interactive': MODEL_SLO_INTERACTIVE_MS, 'background': MODEL_SLO_BACKGROUND_MS}
+        self.long_input_chars = long_input_chars
+        self.max_error_rate = max_error_rate
+        self._lock = threading.Lock()
+        self._stats = {model: _ModelStats(window_seconds) for model in self.models}
+        self.shifted = 0  # calls that did not go to the first-preference model
+
+    def preference(self, endpoint, input_chars):
+        """Candidate models for a call, most preferred first"""
+        if ENDPOINT_CLASSES.get(endpoint, 'interactive') == 'background' or input_chars > self.long_input_chars:
+            return self.models[::-1]
+        return list(self.models)
+
+    def _healthy(self, summary, slo_ms):
+        if summary['recent_calls'] < MODEL_MIN_SAMPLES:
+            return True
+        if summary['error_rate'] > self.max_error_rate:
+            return False
+        return summary['p95_ms'] is None or summary['p95_ms'] <= slo_ms
+
+    def choose(self, endpoint, input_chars):
+        """Model ID to serve this call"""
+        candidates = self.preference(endpoint, input_chars)
+        if len(candidates) == 1:
+            chosen = candidates[0]
+        else:
+            slo_ms = self.slo_ms[ENDPOINT_CLASSES.get(endpoint, 'interactive')]
+            now = time.monotonic()
+            with self._lock:
+                summaries = {}
+                for model in candidates:
+                    self._stats[model].expire(now)
+                    summaries[model] = self._stats[model].summary()
+            healthy = [model for model in candidates if self._healthy(summaries[model], slo_ms)]
+            if healthy:
+                chosen = healthy[0]
+            else:
+                # Nothing meets the SLO: take the least-bad model
+                chosen = min(candidates, key=lambda m: (summaries[m]['error_rate'] > self.max_error_rate,
+                                                        summaries[m]['p95_ms'] or 0.0))
+        with self._lock:
+            routed = self._stats[chosen].routed
+            routed[endpoint] = routed.get(endpoint, 0) + 1
+            if chosen != candidates[0]:
+                self.shifted += 1
+        return chosen
+
+    def record(self, model_id, elapsed, ok):
+        """Feed back one call's latency (seconds) and outcome"""
+        with self._lock:
+            stats = self._stats.get(model_id)
+            if stats is not None:
+                stats.add(elapsed * 1000.0, ok, time.monotonic())
+
+    def stats(self):
+        with self._lock:
+            models = {}
+            for model, stats in self._stats.items():
+                stats.expire(time.monotonic())
+                models[model] = dict(stats.summary(), calls=stats.calls, errors=stats.errors, routed=dict(stats.routed))
+            return {'slo_ms': dict(self.slo_ms), 'long_input_chars': self.long_input_chars,
+                    'shifted_calls': self.shifted, 'models': models}
@@ -36,14 +36,40 @@ class AnalysisHistory(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     text = db.Column(db.Text, nullable=False)
     result = db.Column(db.Text, nullable=False)
+    backend = db.Column(db.String(16))  # 'llm', 'cache' or 'rules'; NULL for rows saved before it was recorded
+    language = db.Column(db.String(8))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     user = db.relationship('User', backref=db.backref('analyses', lazy=True))
     
+    # /history reads a user's newest rows; without this it scans the table
+    __table_args__ = (db.Index('ix_analysis_history_user_created', 'user_id', 'created_at'),)
+    
     def to_dict(self):
         return {
             'id': self.id,
             'text': self.text,
             'result': self.result,
+            'backend': self.backend,
+            'language': self.language,
             'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+        }
+
+# Columns and indexes added after tables were first created. create_all()
+# only creates missing tables, so upgrade_schema() adds these to existing databases.
+ADDED_COLUMNS = {
+    'analysis_history': {'backend': 'VARCHAR(16)', 'language': 'VARCHAR(8)'},
+}
+ADDED_INDEXES = [index for index in AnalysisHistory.__table__.indexes]
+
+def upgrade_schema():
+    """Add any ADDED_COLUMNS/ADDED_INDEXES missing from existing tables (nullable, so no backfill needed)"""
+    inspector = db.inspect(db.engine)
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        for name, ddl in columns.items():
+            if name not in existing:
+                db.session.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+    db.session.commit()
+    for index in ADDED_INDEXES:
+        index.create(db.engine, checkfirst=True)
\ No newline at end of file
@@ -0,0 +1,416 @@
+"""
+Phone-number normalization and a reported-number reputation index.
+
+Numbers are normalized to E.164 ("+14155550123") and stored as sorted
+uint64 arrays (8 bytes per number plus one category byte), so a feed of
+millions of reported numbers fits in tens of MB and is searched with
+np.searchsorted. Prefix entries (premium-rate ranges, spoofed blocks)
+are matched longest-first against the number's leading digits.
+
+Feed lines:
+
+    +1 415 555 0123,robocall       one number
+    +1900*,premium-rate            every number starting with +1900
+    -+14155550123                  withdraw an earlier report
+
+Lines appended to the feed are picked up incrementally: they go into a
+small in-memory delta that is merged into the sorted arrays once it
+grows past PHONE_DELTA_COMPACT entries, so updates never need a rebuild.
+Replace the file (or truncate it) to force a full reload.
+
+Parsing a multi-million line feed takes seconds, so the sorted arrays are
+also written to a snapshot file after each full load and compaction.
+Workers starting later map the snapshot (sharing its pages) and only
+parse the feed lines appended after it was taken.
+"""
+
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+PHONE_DEFAULT_COUNTRY_CODE = os.getenv('PHONE_DEFAULT_COUNTRY_CODE', '1')
+PHONE_FEED_CHECK_SECONDS = float(os.getenv('PHONE_FEED_CHECK_SECONDS', 30))
+PHONE_DELTA_COMPACT = int(os.getenv('PHONE_DELTA_COMPACT', 10000))
+
+SNAPSHOT_MAGIC = b'SSPR'
+SNAPSHOT_HEADER = struct.Struct('<4sI')  # magic, metadata json length
+
+NON_DIGITS_RE = re.compile(r'[^\d+]')
+E164_LINE_RE = re.compile(r'(\+[1-9]\d{6,14})(?:,([^#,\s]+))?\s*$')
+MIN_DIGITS = 7   # shortest national significant number we accept, with country code
+MAX_DIGITS = 15  # E.164 maximum
+_MISSING = object()  # not in the delta (None there means the number was removed)
+
+# Built-in prefixes: premium-rate and shared-cost ranges commonly used for
+# call-back and "one ring" fraud.
+BUILTIN_PREFIXES = {
+    '+1900': 'premium-rate', '+1976': 'premium-rate',
+    '+44909': 'premium-rate', '+44908': 'premium-rate', '+44871': 'premium-rate', '+4470': 'personal-number',
+    '+881': 'satellite', '+882': 'international-network', '+883': 'international-network',
+    '+1268': 'one-ring-scam', '+1284': 'one-ring-scam', '+1473': 'one-ring-scam', '+1649': 'one-ring-scam',
+    '+1664': 'one-ring-scam', '+1767': 'one-ring-scam', '+1876': 'one-ring-scam',
+}
+
+
+def normalize_number(number, default_country_code=PHONE_DEFAULT_COUNTRY_CODE):
+    """E.164 form of a phone number ("+14155550123"), or None if it cannot be one.
+
+    Accepts punctuation and spaces, "00" and "011" international prefixes,
+    and national numbers in the default country (10-digit NANP numbers, or
+    a leading trunk "0" elsewhere).
+    """
+    if number is None:
+        return None
+    raw = NON_DIGITS_RE.sub('', str(number))
+    plus = raw.startswith('+')
+    digits = raw.replace('+', '')
+    if not digits:
+        return None
+
+    if not plus:
+        if digits.startswith('011') and default_country_code == '1':
+            digits = digits[3:]
+        elif digits.startswith('00'):
+            digits = digits[2:]
+        elif default_country_code == '1':
+            if len(digits) == 10:
+                digits = '1' + digits
+            elif len(digits) != 11 or not digits.startswith('1'):
+                return None  # NANP numbers need an area code
+        elif default_country_code and digits.startswith('0'):
+            digits = default_country_code + digits[1:]
+        elif default_country_code:
+            digits = default_country_code + digits
+
+    if not MIN_DIGITS <= len(digits) <= MAX_DIGITS or digits.startswith('0'):
+        return None
+    return '+' + digits
+
+
+def _normalize_prefix(prefix):
+    """'+1 900*' -> '+1900'; prefixes are always written in international form"""
+    digits = NON_DIGITS_RE.sub('', prefix).lstrip('+')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    return '+' + digits if digits else None
+
+
+def parse_feed_line(line):
+    """(op, key, category) where op is 'add' or 'remove' and key is a number or 'prefix*', or None"""
+    match = E164_LINE_RE.match(line)
+    if match:  # already-normalized "+14155550123[,category]", the common case in large feeds
+        return 'add', match.group(1), match.group(2) or 'reported'
+    line = line.split('#', 1)[0].strip()
+    if not line:
+        return None
+    op = 'add'
+    if line.startswith('-'):
+        op, line = 'remove', line[1:].strip()
+    number, _, category = line.partition(',')
+    number = number.strip()
+    if number.endswith('*'):
+        prefix = _normalize_prefix(number[:-1])
+        key = prefix + '*' if prefix else None
+    else:
+        key = normalize_number(number)
+    if key is None:
+        return None
+    return op, key, category.strip() or 'reported'
+
+
+class PhoneReputation:
+    """Reported numbers and prefixes, with lookups by exact number then longest prefix.
+
+    The sorted arrays are replaced as a whole (never mutated in place), so
+    lookups read them without taking the lock.
+    """
+
+    def __init__(self, feed_path=None, snapshot_path=None, builtin_prefixes=None,
+                 check_seconds=PHONE_FEED_CHECK_SECONDS, compact_at=PHONE_DELTA_COMPACT):
+        self.feed_path = feed_path
+        self.snapshot_path = snapshot_path
+        self.check_seconds = check_seconds
+        self.compact_at = compact_at
+        self._lock = threading.Lock()
+        self._categories = ['reported']
+        self._category_ids = {'reported': 0}
+        self._sorted = (np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint8))  # numbers, category ids
+        self._delta = {}          # number -> category id, or None for a removal
+        self._feed_prefixes = {}  # '+1900' -> category name
+        self._prefixes = {}       # built-in and feed prefixes
+        self._max_prefix = 0
+        self._builtin = dict(builtin_prefixes or {})
+        self._feed_position = 0
+        self._feed_identity = None
+        self._checked_at = 0.0
+        self.lookups = 0
+        self.hits = 0
+        self.compactions = 0
+        self._set_prefixes()
+        if not self.load_snapshot():
+            self.reload()
+
+    def _category_id(self, name):
+        category_id = self._category_ids.get(name)
+        if category_id is None:
+            if len(self._categories) >= 255:
+                return self._category_ids['reported']
+            category_id = self._category_ids[name] = len(self._categories)
+            self._categories.append(name)
+        return category_id
+
+    def _set_prefixes(self):
+        merged = dict(self._builtin)
+        merged.update(self._feed_prefixes)
+        self._prefixes = merged
+        self._max_prefix = max((len(p) for p in merged), default=0)
+
+    def reload(self):
+        """Read the whole feed and rebuild the sorted arrays"""
+        if not self.feed_path or not os.path.exists(self.feed_path):
+            return
+        start = time.perf_counter()
+        numbers, categories, prefixes = [], [], {}
+        with self._lock:
+            with open(self.feed_path, 'rb') as f:
+                for line in f:
+                    parsed = parse_feed_line(line.decode('utf-8', errors='replace'))
+                    if parsed is None:
+                        continue
+                    op, key, category = parsed
+                    if key.endswith('*'):
+                        if op == 'add':
+                            prefixes[key[:-1]] = category
+                        else:
+                            prefixes.pop(key[:-1], None)
+                    elif op == 'add':
+                        numbers.append(int(key[1:]))
+                        categories.append(self._category_id(category))
+                    else:
+                        numbers.append(int(key[1:]))
+                        categories.append(-1)
+                position = f.tell()
+                identity = self._identity(f.fileno())
+            self._sorted = self._sorted_unique(np.array(numbers, dtype=np.uint64), np.array(categories, dtype=np.int16))
+            self._delta = {}
+            self._feed_prefixes = prefixes
+            self._set_prefixes()
+            self._feed_position, self._feed_identity = position, identity
+        log.info("Phone reputation index loaded", extra={'numbers': len(self._sorted[0]), 'prefixes': len(prefixes),
+                                                         'seconds': round(time.perf_counter() - start, 1)})
+        self.save_snapshot()
+
+    def save_snapshot(self):
+        """Write the sorted arrays and feed position atomically (temp file + rename)"""
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            numbers, categories = self._sorted
+            meta = json.dumps({
+                'count': len(numbers),
+                'categories': self._categories,
+                'feed_prefixes': self._feed_prefixes,
+                'feed_position': self._feed_position,
+                'feed_identity': self._feed_identity
+            }).encode('utf-8')
+            directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(meta)))
+                    f.write(meta)
+                    f.write(b'\0' * (-f.tell() % 8))  # align the uint64 array
+                    f.write(numbers.astype('<u8').tobytes())
+                    f.write(categories.tobytes())
+                os.replace(tmp_path, self.snapshot_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    def load_snapshot(self):
+        """Map a snapshot taken from the current feed and apply the lines added since; False if unusable"""
+        if not self.snapshot_path or not self.feed_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, meta_len = SNAPSHOT_HEADER.unpack_from(mm, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError('not a phone reputation snapshot')
+            meta = json.loads(mm[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + meta_len])
+            stat = os.stat(self.feed_path)
+            if meta['feed_identity'] != [stat.st_dev, stat.st_ino] or stat.st_size < meta['feed_position']:
+                return False
+            offset = SNAPSHOT_HEADER.size + meta_len
+            offset += -offset % 8
+            count = meta['count']
+            numbers = np.frombuffer(mm, dtype='<u8', count=count, offset=offset)
+            categories = np.frombuffer(mm, dtype=np.uint8, count=count, offset=offset + 8 * count)
+        except Exception as e:
+            log.warning("Could not load phone reputation snapshot %s: %s", self.snapshot_path, e)
+            return False
+        with self._lock:
+            self._sorted = (numbers, categories)
+            self._categories = meta['categories']
+            self._category_ids = {name: i for i, name in enumerate(self._categories)}
+            self._feed_prefixes = meta['feed_prefixes']
+            self._set_prefixes()
+            self._delta = {}
+            self._feed_position, self._feed_identity = meta['feed_position'], (stat.st_dev, stat.st_ino)
+        applied = self.apply_updates()
+        log.info("Phone reputation index mapped", extra={'numbers': count, 'new_feed_lines': applied})
+        return True
+
+    @staticmethod
+    def _identity(fd):
+        stat = os.fstat(fd)
+        return stat.st_dev, stat.st_ino
+
+    @staticmethod
+    def _sorted_unique(numbers, categories):
+        """Sort by number keeping the last entry per number; drop removals (category -1)"""
+        order = np.argsort(numbers, kind='stable')
+        numbers, categories = numbers[order], categories[order]
+        last = np.ones(len(numbers), dtype=bool)
+        last[:-1] = numbers[1:] != numbers[:-1]
+        keep = last & (categories >= 0)
+        return numbers[keep], categories[keep].astype(np.uint8)
+
+    def _refresh(self):
+        """Apply lines appended to the feed since the last check; reload if it was replaced or truncated"""
+        now = time.monotonic()
+        if not self.feed_path or now - self._checked_at < self.check_seconds:
+            return
+        self._checked_at = now
+        try:
+            stat = os.stat(self.feed_path)
+        except OSError:
+            return
+        if (stat.st_dev, stat.st_ino) != self._feed_identity or stat.st_size < self._feed_position:
+            self.reload()
+        elif stat.st_size > self._feed_position:
+            self.apply_updates()
+
+    def apply_updates(self):
+        """Read complete lines appended to the feed since the last read into the delta"""
+        with self._lock:
+            with open(self.feed_path, 'rb') as f:
+                f.seek(self._feed_position)
+                data = f.read()
+            complete = data.rfind(b'\n') + 1
+            self._feed_position += complete
+            applied = 0
+            for line in data[:complete].decode('utf-8', errors='replace').splitlines():
+                parsed = parse_feed_line(line)
+                if parsed:
+                    self._apply(*parsed)
+                    applied += 1
+            compact = len(self._delta) >= self.compact_at
+        if compact:
+            self.compact()
+        return applied
+
+    def _apply(self, op, key, category):
+        if key.endswith('*'):
+            prefixes = dict(self._feed_prefixes)
+            if op == 'add':
+                prefixes[key[:-1]] = category
+            else:
+                prefixes.pop(key[:-1], None)
+            self._feed_prefixes = prefixes
+            self._set_prefixes()
+        else:
+            self._delta[int(key[1:])] = self._category_id(category) if op == 'add' else None
+
+    def add(self, number, category='reported'):
+        """Report a number (or 'prefix*') without touching the feed file"""
+        key = number if str(number).endswith('*') else normalize_number(number)
+        parsed = parse_feed_line(f"{key},{category}") if key else None
+        if parsed is None:
+            return False
+        with self._lock:
+            self._apply(*parsed)
+            compact = len(self._delta) >= self.compact_at
+        if compact:
+            self.compact()
+        return True
+
+    def remove(self, number):
+        parsed = parse_feed_line(f"-{number}")
+        if parsed is None:
+            return False
+        with self._lock:
+            self._apply(*parsed)
+        return True
+
+    def compact(self):
+        """Merge the delta into the sorted arrays"""
+        with self._lock:
+            if not self._delta:
+                return
+            delta_numbers = np.fromiter(self._delta.keys(), dtype=np.uint64, count=len(self._delta))
+            delta_categories = np.fromiter((-1 if c is None else c for c in self._delta.values()),
+                                           dtype=np.int16, count=len(self._delta))
+            numbers, categories = self._sorted
+            self._sorted = self._sorted_unique(np.concatenate([numbers, delta_numbers]),
+                                               np.concatenate([categories.astype(np.int16), delta_categories]))
+            self._delta = {}
+            self.compactions += 1
+        self.save_snapshot()
+
+    def lookup(self, number):
+        """(matched number or prefix, category) for a reported number, else None"""
+        self._refresh()
+        e164 = normalize_number(number)
+        if e164 is None:
+            return None
+        self.lookups += 1
+        value = int(e164[1:])
+
+        # Read without the lock: compact() swaps in a new _sorted before it
+        # replaces _delta, so this delta plus whichever _sorted is read next
+        # always covers the number
+        delta = self._delta
+        category_id = delta.get(value, _MISSING)
+        if category_id is not _MISSING:
+            if category_id is not None:
+                self.hits += 1
+                return e164, self._categories[category_id]
+        else:
+            numbers, categories = self._sorted
+            i = int(np.searchsorted(numbers, np.uint64(value)))
+            if i < len(numbers) and int(numbers[i]) == value:
+                self.hits += 1
+                return e164, self._categories[categories[i]]
+
+        prefixes = self._prefixes
+        for length in range(min(len(e164) - 1, self._max_prefix), 1, -1):
+            category = prefixes.get(e164[:length])
+            if category is not None:
+                self.hits += 1
+                return e164[:length] + '*', category
+        return None
+
+    def stats(self):
+        numbers, categories = self._sorted
+        return {
+            'numbers': len(numbers),
+            'pending_updates': len(self._delta),
+            'prefixes': len(self._prefixes),
+            'index_bytes': numbers.nbytes + categories.nbytes,
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'compactions': self.compactions
+        }
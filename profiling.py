@@ -0,0 +1,327 @@
+"""
+Opt-in per-request profiling.
+
+A profiled request records a span tree of its stages (JSON parsing,
+translation, LLM call, Rekognition, history commit, serialization, ...)
+and, from a background thread, samples the request thread's Python stack
+every PROFILE_INTERVAL_MS. Both are written to PROFILE_DIR as collapsed
+stacks ("a;b;c 123" lines) that flamegraph.pl, speedscope and inferno read
+directly, plus a JSON span tree, keyed by the request id that
+structured_logging returns in the X-Request-ID header and puts on the
+request's log lines:
+
+    <id>.json           span tree and request metadata
+    <id>.folded         sampled CPU stacks, sample counts
+    <id>.spans.folded   span tree, self time in microseconds
+
+Requests are profiled when PROFILING is on and either the client sends
+X-Profile (carrying PROFILE_TOKEN when one is set) or they are picked by
+PROFILE_SAMPLE_RATE. Unprofiled requests pay one context-variable lookup
+per span.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from contextvars import ContextVar
+
+from config import INSTANCE_DIR
+
+log = logging.getLogger(__name__)
+
+PROFILING = os.getenv('PROFILING', 'false').lower() in ('1', 'true', 'yes')
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0.0))
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+PROFILE_MAX_STORED = int(os.getenv('PROFILE_MAX_STORED', 200))
+PROFILE_DIR = os.getenv('PROFILE_DIR') or os.path.join(INSTANCE_DIR, 'profiles')
+PROFILE_HEADER = 'X-Profile'
+REQUEST_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+_current = ContextVar('profile', default=None)
+# Innermost open span, per context: threads running a copy of the request's
+# context (tiling, batch I/O) nest their spans under the span open at the copy
+_open_span = ContextVar('open_span', default=None)
+
+
+class Span:
+    """One timed stage; spans opened while it is open become its children"""
+
+    __slots__ = ('profile', 'name', 'start', 'end', 'children', '_token')
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+        self.start = None
+        self.end = None
+        self.children = []
+        self._token = None
+
+    def __enter__(self):
+        parent = _open_span.get()
+        if parent is None or parent.profile is not self.profile:
+            parent = self.profile.root
+        parent.children.append(self)  # list.append is atomic, so sibling threads can add at once
+        self._token = _open_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.end = time.perf_counter()
+        _open_span.reset(self._token)
+        return False
+
+    def duration(self):
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin):
+        return {
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(self.duration() * 1000, 3),
+            'children': [child.to_dict(origin) for child in self.children]
+        }
+
+    def folded(self, prefix, lines):
+        path = f'{prefix};{self.name}' if prefix else self.name
+        self_us = int((self.duration() - sum(child.duration() for child in self.children)) * 1e6)
+        if self_us > 0:
+            lines.append(f'{path} {self_us}')
+        for child in self.children:
+            child.folded(path, lines)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval into folded-stack counts"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_file = __file__
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename != own_file:
+                    names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            stack = ';'.join(reversed(names))
+            self.counts[stack] = self.counts.get(stack, 0) + 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class Profile:
+    def __init__(self, request_id, name, trigger):
+        self.request_id = request_id
+        self.trigger = trigger
+        self.started_at = time.time()
+        self.root = Span(self, name)
+        self.root.start = time.perf_counter()
+        self.sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+        self.sampler.start()
+
+    def finish(self):
+        if self.root.end is None:
+            self.root.end = time.perf_counter()
+            self.sampler.stop()
+
+    def to_dict(self, status=None):
+        return {
+            'request_id': self.request_id,
+            'trigger': self.trigger,
+            'started_at': self.started_at,
+            'status': status,
+            'duration_ms': round(self.root.duration() * 1000, 3),
+            'cpu_samples': self.sampler.samples,
+            'interval_ms': PROFILE_INTERVAL_MS,
+            'spans': self.root.to_dict(self.root.start)
+        }
+
+    def folded_spans(self):
+        lines = []
+        self.root.folded('', lines)
+        return '\n'.join(lines) + '\n'
+
+    def folded_samples(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(self.sampler.counts.items()))
+
+
+def span(name):
+    """Time a stage of the current profiled request; a shared no-op otherwise"""
+    profile = _current.get()
+    if profile is None:
+        return NULL_SPAN
+    return Span(profile, name)
+
+
+class ProfileStore:
+    """Profiles on disk under PROFILE_DIR, pruned to the newest max_stored"""
+
+    SUFFIXES = ('.json', '.folded', '.spans.folded')
+
+    def __init__(self, directory=PROFILE_DIR, max_stored=PROFILE_MAX_STORED):
+        self.directory = directory
+        self.max_stored = max_stored
+        self._lock = threading.Lock()
+        self.profiled = 0
+        self.triggers = {'header': 0, 'sample': 0}
+        self.write_errors = 0
+
+    def path(self, request_id, suffix):
+        return os.path.join(self.directory, request_id + suffix)
+
+    def save(self, profile, status):
+        files = {
+            '.json': json.dumps(profile.to_dict(status), indent=2),
+            '.folded': profile.folded_samples(),
+            '.spans.folded': profile.folded_spans()
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            for suffix, content in files.items():
+                with open(self.path(profile.request_id, suffix), 'w') as f:
+                    f.write(content)
+            with self._lock:
+                self.profiled += 1
+                self.triggers[profile.trigger] += 1
+            self.prune()
+        except OSError as e:
+            with self._lock:
+                self.write_errors += 1
+            log.warning("Could not store profile %s: %s", profile.request_id, e)
+
+    def prune(self):
+        with self._lock:
+            ids = self.list_ids()
+            for request_id in ids[self.max_stored:]:
+                for suffix in self.SUFFIXES:
+                    try:
+                        os.remove(self.path(request_id, suffix))
+                    except FileNotFoundError:
+                        pass
+
+    def list_ids(self):
+        """Stored request ids, newest first"""
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith('.json')]
+        except FileNotFoundError:
+            return []
+        names.sort(key=lambda name: os.path.getmtime(os.path.join(self.directory, name)), reverse=True)
+        return [name[:-len('.json')] for name in names]
+
+    def read(self, request_id, suffix):
+        """File contents for a stored profile, or None (ids are validated, so no path tricks)"""
+        if not REQUEST_ID_RE.match(request_id or ''):
+            return None
+        try:
+            with open(self.path(request_id, suffix)) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': PROFILING,
+                'sample_rate': PROFILE_SAMPLE_RATE,
+                'interval_ms': PROFILE_INTERVAL_MS,
+                'profiled_requests': self.profiled,
+                'triggers': dict(self.triggers),
+                'write_errors': self.write_errors,
+                'directory': self.directory
+            }
+
+
+profile_store = ProfileStore()
+
+
+def token_ok(value):
+    return bool(value) and (value == PROFILE_TOKEN if PROFILE_TOKEN else value.lower() in ('1', 'true', 'yes'))
+
+
+def _trigger(request):
+    if token_ok(request.headers.get(PROFILE_HEADER)):
+        return 'header'
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return 'sample'
+    return None
+
+
+def start_profile():
+    """before_request hook: start profiling this request if asked to or sampled"""
+    # Flask and the logging pipeline are only needed by the hooks; span() stays cheap to import
+    from flask import g, request
+
+    import structured_logging
+
+    if not PROFILING or request.blueprint == 'profiles':
+        return None
+    trigger = _trigger(request)
+    if trigger is None:
+        return None
+    profile = Profile(structured_logging.request_id() or structured_logging.new_request_id(),
+                      f'{request.method} {request.url_rule or request.path}', trigger)
+    g.profile = profile
+    g.profile_token = _current.set(profile)
+    return None
+
+
+def finish_profile(response):
+    """after_request hook: close the root span and store the profile"""
+    from flask import g
+
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    profile.finish()
+    _current.reset(g.pop('profile_token'))
+    profile_store.save(profile, response.status_code)
+    return response
+
+
+def abandon_profile(exc):
+    """teardown hook: stop the sampler of a request that failed before after_request"""
+    from flask import g
+
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.finish()
+        _current.reset(g.pop('profile_token'))
+
+
+def init_app(app):
+    """Register the hooks; call before the other extensions so the profile spans their hooks too"""
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
+    app.teardown_request(abandon_profile)
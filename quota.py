@@ -0,0 +1,88 @@
+"""
+Per-client quotas for the Flask routes (see rate_limit.py for the buckets).
+
+'upstream' routes call Bedrock, Rekognition or Polly and fall back to
+rule-based/static answers when over budget; 'rules' routes are rule-only
+and get a 429 once that budget is spent too. init_app() charges each
+limited request before its view runs and adds the quota headers; cached
+routes call charge() themselves, on a cache miss.
+"""
+
+import os
+
+from flask import g, jsonify, request
+from flask_jwt_extended import decode_token
+
+from config import INSTANCE_DIR
+from profiling import span
+from rate_limit import RateLimiter, client_key
+
+# Blueprint-qualified endpoint -> budget. Cached routes are charged by their
+# CachePolicy instead, and only when the response cache misses (see response_cache)
+RATE_LIMITED_ENDPOINTS = {
+    'analysis.analyze_text_main': 'upstream', 'analysis.analyze_image': 'upstream',
+    'analysis.analyze_images': 'upstream',
+    'practice.generate_practice_examples': 'upstream',
+    'practice.generate_call_scenario': 'upstream', 'practice.generate_call_audio': 'upstream',
+    'practice.call_test_practice': 'upstream', 'practice.submit_job': 'upstream',
+    'analysis.analyze_email': 'rules', 'analysis.analyze_text_api': 'rules', 'analysis.analyze_call': 'rules',
+    'analysis.analyze_website': 'rules', 'history.export_history': 'rules',
+}
+
+rate_limiter = RateLimiter(os.getenv('RATE_LIMIT_DB') or os.path.join(INSTANCE_DIR, 'rate_limit.db'))
+
+_app = None  # for decoding tokens outside a request (the ASGI routes)
+
+
+def jwt_user_id(authorization):
+    """Identity from a valid bearer token, or None"""
+    if not authorization or not authorization.startswith('Bearer '):
+        return None
+    try:
+        with _app.app_context():
+            return decode_token(authorization[7:])['sub']
+    except Exception:
+        return None
+
+
+def admit_request(budget, authorization, forwarded_for, remote_addr):
+    """Charge the caller's quota for one request; returns an Admission, or None if not limited"""
+    key = client_key(jwt_user_id(authorization), remote_addr, forwarded_for)
+    return rate_limiter.admit(key, budget)
+
+
+def enforce_quota():
+    budget = RATE_LIMITED_ENDPOINTS.get(request.endpoint)
+    if budget is None:
+        return None
+    return charge(budget)
+
+
+def charge(budget):
+    """Charge the current request to budget; returns a 429 response when it is over quota, else None"""
+    with span('quota'):
+        admission = g.admission = admit_request(budget, request.headers.get('Authorization'),
+                                                request.headers.get('X-Forwarded-For'), request.remote_addr)
+    if admission is not None and admission.status == 'rejected':
+        return jsonify({'error': 'Rate limit exceeded', 'retry_after': round(admission.retry_after, 1)}), 429
+    return None
+
+
+def add_quota_headers(response):
+    admission = g.get('admission')
+    if admission is not None:
+        response.headers.update(admission.headers())
+    return response
+
+
+def upstream_allowed():
+    """False when this request is over its upstream quota and should use the fallback path"""
+    admission = g.get('admission')
+    return admission is None or admission.upstream
+
+
+def init_app(app):
+    global _app
+    _app = app
+    app.before_request(enforce_quota)
+    app.after_request(add_quota_headers)
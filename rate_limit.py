@@ -0,0 +1,163 @@
+"""
+Token-bucket quotas per client, shared across workers through SQLite.
+
+Each client (JWT identity, else client IP) has two buckets: 'rules' for
+the cheap rule-only analysis paths and 'upstream' for paths that call
+Bedrock, Rekognition or Polly. An upstream request over its budget is
+admitted as degraded (served by the rule-based or static fallback and
+charged to the 'rules' bucket); only a client over both budgets is
+rejected.
+
+Buckets live in one SQLite table so every worker process sees the same
+counts. Each check is a single UPSERT ... RETURNING statement, so the
+refill-and-take is atomic without an explicit transaction. If the
+database is locked past RATE_LIMIT_DB_TIMEOUT or unavailable, checks fall
+back to per-process buckets rather than failing requests.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT', 'true').lower() in ('1', 'true', 'yes')
+RATE_LIMIT_DB_TIMEOUT = float(os.getenv('RATE_LIMIT_DB_TIMEOUT', 0.05))
+RATE_LIMIT_USER_MULTIPLIER = float(os.getenv('RATE_LIMIT_USER_MULTIPLIER', 4))
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv('RATE_LIMIT_TRUSTED_PROXIES', 0))
+RATE_LIMIT_IDLE_SECONDS = float(os.getenv('RATE_LIMIT_IDLE_SECONDS', 3600))
+
+# budget -> (tokens per second, burst size)
+BUDGETS = {
+    'rules': (float(os.getenv('RATE_LIMIT_RULES_PER_MINUTE', 120)) / 60,
+              float(os.getenv('RATE_LIMIT_RULES_BURST', 30))),
+    'upstream': (float(os.getenv('RATE_LIMIT_UPSTREAM_PER_MINUTE', 10)) / 60,
+                 float(os.getenv('RATE_LIMIT_UPSTREAM_BURST', 5))),
+}
+
+TAKE_SQL = """
+INSERT INTO rate_buckets (key, tokens, updated, allowed) VALUES (:key, :burst - 1, :now, 1)
+ON CONFLICT (key) DO UPDATE SET
+    allowed = MIN(:burst, tokens + (:now - updated) * :rate) >= 1,
+    tokens = MIN(:burst, tokens + (:now - updated) * :rate)
+             - (MIN(:burst, tokens + (:now - updated) * :rate) >= 1),
+    updated = :now
+RETURNING tokens, allowed
+"""
+
+
+def client_key(user_id, remote_addr, forwarded_for=None, trusted_proxies=RATE_LIMIT_TRUSTED_PROXIES):
+    """'user:<id>' for authenticated clients, else 'ip:<addr>'.
+
+    Behind N trusted proxies the client address is the Nth entry from the
+    right of X-Forwarded-For; entries further left are client-supplied.
+    """
+    if user_id is not None:
+        return f'user:{user_id}'
+    address = remote_addr
+    if trusted_proxies and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+        if len(hops) >= trusted_proxies:
+            address = hops[-trusted_proxies]
+    return f'ip:{address or "unknown"}'
+
+
+class Admission:
+    """Outcome of a quota check: 'ok', 'degraded' (no upstream calls) or 'rejected'"""
+
+    def __init__(self, status, budget, limit, remaining, retry_after):
+        self.status = status
+        self.budget = budget
+        self.limit = limit
+        self.remaining = remaining
+        self.retry_after = retry_after
+
+    @property
+    def upstream(self):
+        return self.status == 'ok'
+
+    def headers(self):
+        headers = {'X-RateLimit-Limit': str(int(self.limit)), 'X-RateLimit-Remaining': str(int(self.remaining))}
+        if self.status == 'degraded':
+            headers['X-Quota-Degraded'] = 'upstream'
+        if self.status == 'rejected':
+            headers['Retry-After'] = str(max(1, int(self.retry_after + 0.999)))
+        return headers
+
+
+class RateLimiter:
+    def __init__(self, path, budgets=None, user_multiplier=RATE_LIMIT_USER_MULTIPLIER, enabled=RATE_LIMIT_ENABLED):
+        self.path = path
+        self.budgets = budgets or BUDGETS
+        self.user_multiplier = user_multiplier
+        self.enabled = enabled
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._fallback = {}  # key -> (tokens, updated) while SQLite is unavailable
+        self._counts = {'ok': 0, 'degraded': 0, 'rejected': 0, 'store_errors': 0}
+        self._takes = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=RATE_LIMIT_DB_TIMEOUT, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS rate_buckets '
+                         '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, allowed INTEGER NOT NULL)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _take_local(self, key, rate, burst, now):
+        with self._lock:
+            tokens, updated = self._fallback.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._fallback[key] = (tokens, now)
+        return tokens, allowed
+
+    def take(self, key, budget, now=None):
+        """Refill and take one token from key's bucket; returns (allowed, remaining, retry_after, limit)"""
+        rate, burst = self.budgets[budget]
+        if key.startswith('user:'):
+            rate, burst = rate * self.user_multiplier, burst * self.user_multiplier
+        now = time.time() if now is None else now
+        bucket = f'{budget}:{key}'
+        try:
+            conn = self._connection()
+            tokens, allowed = conn.execute(TAKE_SQL, {'key': bucket, 'burst': burst, 'rate': rate, 'now': now}).fetchone()
+            self._takes += 1
+            if self._takes % 1000 == 0:
+                conn.execute('DELETE FROM rate_buckets WHERE updated < ?', (now - RATE_LIMIT_IDLE_SECONDS,))
+        except sqlite3.Error:
+            with self._lock:
+                self._counts['store_errors'] += 1
+            tokens, allowed = self._take_local(bucket, rate, burst, now)
+        retry_after = 0.0 if allowed else (1 - tokens) / rate if rate else float('inf')
+        return bool(allowed), tokens, retry_after, burst
+
+    def admit(self, key, budget):
+        """Check key against `budget`, falling back from 'upstream' to 'rules' when over quota"""
+        if not self.enabled:
+            return None
+        allowed, remaining, retry_after, limit = self.take(key, budget)
+        status = 'ok'
+        if not allowed and budget == 'upstream':
+            allowed, remaining, retry_after, limit = self.take(key, 'rules')
+            status = 'degraded'
+            budget = 'rules'
+        if not allowed:
+            status = 'rejected'
+        with self._lock:
+            self._counts[status] += 1
+        return Admission(status, budget, limit, remaining, retry_after)
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return dict(counts, enabled=self.enabled,
+                    budgets={name: {'per_minute': round(rate * 60, 2), 'burst': burst}
+                             for name, (rate, burst) in self.budgets.items()},
+                    user_multiplier=self.user_multiplier)
@@ -0,0 +1,254 @@
+"""
+Server-side cache for GET responses, with HTTP caching headers.
+
+Routes opt in with a per-route policy:
+
+    @bp.route('/api/examples')
+    @cached(EXAMPLES_CACHE)
+    def get_examples(): ...
+
+A policy sets how long a response stays fresh (ttl), how long after that a
+stale copy may still be served while one background request refreshes it
+(stale), and which query parameters are part of the cache key (vary); URL
+path arguments always are. Concurrent misses for the same key are
+coalesced: one request runs the view, the others wait for its result.
+
+Cached responses carry a weak ETag, Cache-Control (max-age is the time
+left until the entry goes stale, plus stale-while-revalidate) and Age, and
+answer If-None-Match with 304, so browsers and proxies can cache too.
+
+Only 200 responses are stored. A view can keep a response out of the
+cache (e.g. a fallback served because of a transient failure) by calling
+skip().
+
+A policy's quota budget is charged only when the request runs the view;
+hits, stale hits and coalesced waiters cost the caller nothing. Background
+revalidations are not charged to anyone.
+"""
+
+import functools
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, make_response, request
+
+from quota import charge
+from response_encoding import wants_msgpack
+
+log = logging.getLogger(__name__)
+
+RESPONSE_CACHE = os.getenv('RESPONSE_CACHE', 'true').lower() in ('1', 'true', 'yes')
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 512))
+RESPONSE_CACHE_WAIT_SECONDS = float(os.getenv('RESPONSE_CACHE_WAIT_SECONDS', 30))
+
+
+class CachePolicy:
+    def __init__(self, ttl, stale=0, vary=(), public=True, budget=None):
+        self.ttl = ttl
+        self.stale = stale
+        self.vary = tuple(vary)
+        self.public = public
+        self.budget = budget  # quota budget charged when the view runs for a request (a miss)
+
+    def cache_control(self, age):
+        max_age = max(0, int(self.ttl - age))
+        directives = ['public' if self.public else 'private', f'max-age={max_age}']
+        if self.stale:
+            directives.append(f'stale-while-revalidate={int(self.stale)}')
+        return ', '.join(directives)
+
+
+class CacheEntry:
+    __slots__ = ('body', 'status', 'headers', 'etag', 'stored_at')
+
+    def __init__(self, response):
+        self.body = response.get_data()
+        self.status = response.status_code
+        self.headers = [(name, value) for name, value in response.headers
+                        if name.lower() not in ('content-length', 'date', 'set-cookie')]
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.stored_at = time.monotonic()
+
+    def age(self):
+        return time.monotonic() - self.stored_at
+
+
+class ResponseCache:
+    """LRU of CacheEntry per key, plus the in-flight computations that misses wait on"""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0, 'not_modified': 0,
+                         'revalidations': 0, 'revalidation_errors': 0, 'skipped': 0, 'evictions': 0}
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key, response):
+        entry = CacheEntry(response)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+        return entry
+
+    def begin(self, key):
+        """Claim the computation of key; returns (True, event) for the leader, (False, event) for waiters"""
+        with self._lock:
+            event = self._inflight.get(key)
+            if event is not None:
+                return False, event
+            event = self._inflight[key] = threading.Event()
+            return True, event
+
+    def finish(self, key):
+        with self._lock:
+            event = self._inflight.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['stale_hits'] + self.counters['misses']
+            return dict(self.counters,
+                        enabled=RESPONSE_CACHE,
+                        entries=len(self._entries),
+                        in_flight=len(self._inflight),
+                        hit_rate=round((self.counters['hits'] + self.counters['stale_hits']) / lookups, 3)
+                        if lookups else 0.0)
+
+
+response_cache = ResponseCache()
+
+
+def skip():
+    """Keep the current response out of the cache"""
+    g.response_cache_skip = True
+
+
+def cache_key(policy, view_args):
+    """Endpoint, path arguments, the policy's query parameters and the negotiated body format"""
+    params = tuple((name, request.args.get(name, '')) for name in policy.vary)
+    return (request.endpoint, tuple(sorted(view_args.items())), params, wants_msgpack())
+
+
+def serve(entry, policy):
+    """Build a response from a cache entry, answering If-None-Match with 304"""
+    response = current_app.response_class(entry.body, status=entry.status, headers=entry.headers)
+    return finalize(response, entry, policy)
+
+
+def finalize(response, entry, policy):
+    age = entry.age()
+    response.set_etag(entry.etag, weak=True)
+    response.headers['Cache-Control'] = policy.cache_control(age)
+    response.headers['Age'] = str(int(age))
+    response.make_conditional(request)
+    if response.status_code == 304:
+        response_cache.count('not_modified')
+    return response
+
+
+def compute(view, view_args, key):
+    """Run the view and store its response if it is cacheable; returns (response, entry or None)"""
+    g.pop('response_cache_skip', None)
+    response = make_response(view(**view_args))
+    if response.status_code != 200 or g.pop('response_cache_skip', False):
+        response_cache.count('skipped')
+        return response, None
+    return response, response_cache.store(key, response)
+
+
+def charge_miss(policy):
+    """Charge the policy's quota budget for a request that will run the view; a 429 response if over quota"""
+    return charge(policy.budget) if policy.budget else None
+
+
+def run_uncached(policy, view, view_args):
+    rejected = charge_miss(policy)
+    return rejected if rejected is not None else view(**view_args)
+
+
+def revalidate(app, view, view_args, key, path, query_string, headers):
+    """Background refresh of a stale entry, in a fresh request context"""
+    try:
+        with app.test_request_context(path, query_string=query_string, headers=headers):
+            compute(view, view_args, key)
+        response_cache.count('revalidations')
+    except Exception as e:
+        response_cache.count('revalidation_errors')
+        log.warning("Background revalidation of %s failed: %s", path, e)
+    finally:
+        response_cache.finish(key)
+
+
+def cached(policy):
+    """Decorator for GET views: serve from the response cache according to policy"""
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**view_args):
+            if not RESPONSE_CACHE or request.method != 'GET':
+                return run_uncached(policy, view, view_args)
+
+            key = cache_key(policy, view_args)
+            entry = response_cache.get(key)
+            if entry is not None:
+                age = entry.age()
+                if age < policy.ttl:
+                    response_cache.count('hits')
+                    return serve(entry, policy)
+                if age < policy.ttl + policy.stale:
+                    response_cache.count('stale_hits')
+                    leader, _ = response_cache.begin(key)
+                    if leader:
+                        args = (current_app._get_current_object(), view, view_args, key, request.path,
+                                request.query_string.decode('latin-1'), {'Accept': request.headers.get('Accept', '')})
+                        threading.Thread(target=revalidate, args=args, name='response-cache-revalidate',
+                                         daemon=True).start()
+                    return serve(entry, policy)
+
+            response_cache.count('misses')
+            leader, event = response_cache.begin(key)
+            if not leader:
+                # Another request is computing this key: wait for its result
+                if event.wait(RESPONSE_CACHE_WAIT_SECONDS):
+                    entry = response_cache.get(key)
+                    if entry is not None and entry.age() < policy.ttl + policy.stale:
+                        response_cache.count('coalesced')
+                        return serve(entry, policy)
+                return run_uncached(policy, view, view_args)
+
+            try:
+                rejected = charge_miss(policy)
+                if rejected is not None:
+                    return rejected
+                response, entry = compute(view, view_args, key)
+            finally:
+                response_cache.finish(key)
+            return finalize(response, entry, policy) if entry is not None else response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,171 @@
+import gzip
+import os
+import threading
+import time
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+from profiling import span
+
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
+try:
+    import msgpack
+    msgpack_available = True
+except ImportError:
+    msgpack_available = False
+
+try:
+    import brotli
+    brotli_available = True
+except ImportError:
+    brotli_available = False
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+COMPRESSIBLE_MIMETYPES = {'application/json', MSGPACK_MIMETYPE, 'text/html', 'text/plain', 'text/csv',
+                          'application/x-ndjson', 'application/javascript', 'text/css'}
+
+
+class EncodingStats:
+    """Counters for response encoding and compression, reported in /api/stats"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = {'json': 0, 'msgpack': 0}
+        self.encode_seconds = {'json': 0.0, 'msgpack': 0.0}
+        self.compressed = {'gzip': 0, 'br': 0}
+        self.compress_seconds = 0.0
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    def record_encode(self, fmt, seconds):
+        with self._lock:
+            self.responses[fmt] += 1
+            self.encode_seconds[fmt] += seconds
+
+    def record_compress(self, coding, before, after, seconds):
+        with self._lock:
+            self.compressed[coding] += 1
+            self.compress_seconds += seconds
+            self.bytes_before += before
+            self.bytes_after += after
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'json_encoder': 'orjson' if orjson_available else 'stdlib',
+                'responses': dict(self.responses),
+                'avg_encode_ms': {fmt: round(self.encode_seconds[fmt] / n * 1000, 3) if n else 0.0
+                                  for fmt, n in self.responses.items()},
+                'compressed_responses': dict(self.compressed),
+                'compress_ms_total': round(self.compress_seconds * 1000, 1),
+                'bytes_before_compression': self.bytes_before,
+                'bytes_after_compression': self.bytes_after,
+                'bytes_saved': self.bytes_before - self.bytes_after
+            }
+
+
+encoding_stats = EncodingStats()
+
+
+def wants_msgpack():
+    """True if the client prefers MessagePack over JSON in its Accept header"""
+    if not msgpack_available or not has_request_context():
+        return False
+    accept = request.accept_mimetypes
+    return accept[MSGPACK_MIMETYPE] > accept['application/json']
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson and negotiates MessagePack.
+
+    Falls back to the stdlib encoder when orjson is not installed. jsonify()
+    returns MessagePack when the client's Accept header prefers it.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if not orjson_available:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+
+        if wants_msgpack():
+            start = time.perf_counter()
+            with span('serialize'):
+                body = msgpack.packb(obj, default=self.default, use_bin_type=True)
+            encoding_stats.record_encode('msgpack', time.perf_counter() - start)
+            response = self._app.response_class(body, mimetype=MSGPACK_MIMETYPE)
+        else:
+            dump_args = {}
+            if (self.compact is None and self._app.debug) or self.compact is False:
+                dump_args['indent'] = 2
+            else:
+                dump_args['separators'] = (',', ':')
+            start = time.perf_counter()
+            with span('serialize'):
+                body = f"{self.dumps(obj, **dump_args)}\n"
+            encoding_stats.record_encode('json', time.perf_counter() - start)
+            response = self._app.response_class(body, mimetype=self.mimetype)
+
+        if msgpack_available:
+            response.vary.add('Accept')
+        return response
+
+
+def _choose_encoding():
+    offered = ['br', 'gzip'] if brotli_available else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def compress_response(response):
+    """after_request hook: compress bodies above COMPRESS_MIN_BYTES"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    coding = _choose_encoding()
+    if not coding:
+        return response
+
+    start = time.perf_counter()
+    with span(f'compress {coding}'):
+        if coding == 'br':
+            compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    elapsed = time.perf_counter() - start
+
+    if len(compressed) >= len(body):
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = coding
+    encoding_stats.record_compress(coding, len(body), len(compressed), elapsed)
+    return response
+
+
+def init_app(app):
+    app.json = FastJSONProvider(app)
+    app.after_request(compress_response)
@@ -0,0 +1,15 @@
+"""
+Route modules, one blueprint each, registered by app.create_app().
+
+Blueprints have no URL prefix, so every route keeps its path; endpoint
+names are blueprint-qualified (e.g. 'analysis.analyze_text_main').
+"""
+
+from routes import analysis, auth, history, meta, practice, profiles
+
+BLUEPRINTS = (meta.bp, auth.bp, analysis.bp, practice.bp, history.bp, profiles.bp)
+
+
+def register_blueprints(app):
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
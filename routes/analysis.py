@@ -0,0 +1,283 @@
+import io
+import logging
+
+from flask import Blueprint, Request, Response, current_app, jsonify, request, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
+
+import aws_clients
+import llm
+from analyzer import analyzer, rule_based_analysis, rule_packs
+from circuit_breaker import CircuitBreaker, breakers
+from models import AnalysisHistory, db
+from profiling import span
+from quota import upstream_allowed
+from text_cache import TextResultCache, simhash
+
+log = logging.getLogger(__name__)
+
+bp = Blueprint('analysis', __name__)
+
+
+def detect_and_translate(text, target_lang='en'):
+    """Return (text_for_analysis, detected_lang).
+
+    No translation backend is configured, so text is analyzed as submitted.
+    """
+    return text, target_lang
+
+
+def translate_response(response, lang):
+    """Translate an analysis result back to the user's language (passthrough)"""
+    return response
+
+
+def save_analysis(user_id, text, result, backend=None, language=None):
+    analysis_record = AnalysisHistory(
+        user_id=user_id,
+        text=text,
+        result=result,
+        backend=backend,
+        language=language
+    )
+    with span('history.commit'):
+        db.session.add(analysis_record)
+        db.session.commit()
+
+
+text_cache = TextResultCache()
+
+
+@bp.route('/analyze', methods=['POST'])
+def analyze_text_main():
+    user_id = None
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        try:
+            user_id = 1  # Default user ID for testing
+        except:
+            pass
+
+    with span('parse_json'):
+        data = request.json
+    text = data.get('text', '')
+
+    if not text:
+        return jsonify({'error': 'No text provided'}), 400
+
+    original_text = text
+    with span('translate'):
+        text_for_analysis, detected_lang = detect_and_translate(text, 'en')
+    pack = rule_packs.active()
+    model_id = None
+    cached = None
+
+    # Paraphrases of an already-analyzed message reuse its LLM verdict
+    if llm.available():
+        with span('text_cache.lookup'):
+            text_hash = simhash(text_for_analysis)
+            cached = text_cache.lookup(text_hash)
+
+    backend = 'rules'
+    if cached is not None:
+        response, model_id = cached['result'], cached['model_id']
+        backend = 'cache'
+    elif llm.available() and upstream_allowed():
+        try:
+            response, model_id = llm.invoke_llm(llm.analysis_prompt(text_for_analysis), 'analyze',
+                                                len(text_for_analysis))
+            response = llm.llm_response_text(response)
+            backend = 'llm'
+            text_cache.store(text_hash, {'result': response, 'model_id': model_id})
+        except Exception as e:
+            model_id = None
+            with span('rule_based_analysis'):
+                response = rule_based_analysis(text_for_analysis, pack)
+    else:
+        with span('rule_based_analysis'):
+            response = rule_based_analysis(text_for_analysis, pack)
+
+    if detected_lang != 'en':
+        with span('translate_response'):
+            response = translate_response(response, detected_lang)
+
+    if user_id:
+        save_analysis(user_id, original_text, response, backend, detected_lang)
+
+    result = {'result': response, 'rule_pack': pack.label, 'model_id': model_id}
+    if cached is not None:
+        result['cache'] = cached['cache']
+    return jsonify(result)
+
+
+@bp.route('/api/analyze/email', methods=['POST'])
+def analyze_email():
+    try:
+        data = request.json
+        sender = data.get('sender', '')
+        subject = data.get('subject', '')
+        content = data.get('content', '')
+
+        if not all([sender, subject, content]):
+            return jsonify({'error': 'Missing required fields: sender, subject, content'}), 400
+
+        result = analyzer.analyze_email(sender, subject, content)
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+
+
+@bp.route('/api/analyze/text', methods=['POST'])
+def analyze_text_api():
+    try:
+        data = request.json
+        content = data.get('content', '')
+        sender_number = data.get('sender_number', '')
+
+        if not content:
+            return jsonify({'error': 'Missing required field: content'}), 400
+
+        result = analyzer.analyze_text(content, sender_number)
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+
+
+@bp.route('/api/analyze/call', methods=['POST'])
+def analyze_call():
+    try:
+        data = request.json
+        caller_number = data.get('caller_number', '')
+        call_type = data.get('call_type', 'unknown')
+        urgency_level = data.get('urgency_level', 'normal')
+
+        if not caller_number:
+            return jsonify({'error': 'Missing required field: caller_number'}), 400
+
+        result = analyzer.analyze_call(caller_number, call_type, urgency_level)
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+
+
+@bp.route('/api/analyze/website', methods=['POST'])
+def analyze_website():
+    try:
+        data = request.json
+        url = data.get('url', '')
+        content = data.get('content', '')
+
+        if not url:
+            return jsonify({'error': 'Missing required field: url'}), 400
+
+        result = analyzer.analyze_website(url, content)
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+
+
+@bp.route('/api/analyze/image', methods=['POST'])
+def analyze_image():
+    try:
+        with span('parse_json'):
+            data = request.json
+        image_data = data.get('image', '')
+
+        if not image_data:
+            return jsonify({'error': 'Missing required field: image'}), 400
+
+        # Use Amazon Rekognition unless its circuit is open or the caller is over quota
+        if breakers['rekognition'].state != CircuitBreaker.OPEN and upstream_allowed():
+            import image_analysis  # PIL and numpy load on the first image request
+
+            try:
+                if aws_clients.registry.available('rekognition'):
+                    return jsonify(image_analysis.analyze_image_with_bedrock(image_data))
+            except Exception as e:
+                log.warning("Rekognition image analysis failed: %s", e)
+
+        # Fallback to rule-based analysis
+        with span('rule_based_analysis'):
+            result = analyzer.analyze_image(image_data)
+        return jsonify(result)
+
+    except Exception as e:
+        return jsonify({'error': f'Analysis failed: {str(e)}'}), 500
+
+
+def _buffered_request(limit):
+    """A copy of the request with its body read into memory; RequestEntityTooLarge past limit bytes.
+
+    A chunked upload has no Content-Length to check up front, and Werkzeug
+    truncates such a body at MAX_CONTENT_LENGTH instead of refusing it, so
+    the body is read here in blocks against an explicit cap.
+    """
+    chunks, size = [], 0
+    while True:
+        chunk = request.stream.read(64 * 1024)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > limit:
+            raise RequestEntityTooLarge()
+        chunks.append(chunk)
+    body = b''.join(chunks)
+    environ = {key: value for key, value in request.environ.items() if key != 'HTTP_TRANSFER_ENCODING'}
+    environ.update({'wsgi.input': io.BytesIO(body), 'CONTENT_LENGTH': str(len(body))})
+    return Request(environ)
+
+
+def _collect_batch(image_batch, body):
+    """The images in body: a zip, multipart files ('images' and/or 'archive') or a JSON object"""
+    if body.mimetype in image_batch.ZIP_CONTENT_TYPES:
+        collector = image_batch.BatchCollector()
+        collector.add_zip('archive', body.get_data())
+        return collector
+    if body.files:
+        collector = image_batch.BatchCollector()
+        for upload in body.files.getlist('images') + body.files.getlist('archive'):
+            collector.add_upload(upload.filename or 'upload', upload.read(), upload.mimetype)
+        return collector
+    with span('parse_json'):
+        data = body.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object, multipart upload or zip archive')
+    return image_batch.collect_json(data)
+
+
+@bp.route('/api/analyze/images', methods=['POST'])
+def analyze_images():
+    """Analyze a batch of images, streaming one NDJSON line per image as it completes, then a summary line"""
+    import image_batch  # PIL and numpy load on the first image request
+
+    # base64 in JSON is a third larger than the images it carries
+    max_body = image_batch.BATCH_MAX_BYTES * 4 // 3 + 64 * 1024
+    too_large = {'error': f'Batch is larger than {image_batch.BATCH_MAX_BYTES} bytes'}
+    if (request.content_length or 0) > max_body:
+        return jsonify(too_large), 413
+    try:
+        with span('batch.collect'):
+            collector = _collect_batch(image_batch, _buffered_request(max_body))
+    except RequestEntityTooLarge:
+        return jsonify(too_large), 413
+    except image_batch.BatchLimitError as e:
+        return jsonify({'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not collector.images:
+        return jsonify({'error': 'No images in batch'}), 400
+
+    # One quota admission and one breaker check cover the whole batch; an
+    # open circuit or a breaker that opens mid-batch falls back per image
+    use_rekognition = (breakers['rekognition'].state != CircuitBreaker.OPEN and upstream_allowed()
+                       and aws_clients.registry.available('rekognition'))
+    log.info("Image batch started", extra={'images': len(collector.images), 'bytes': collector.total_bytes,
+                                           'rekognition': use_rekognition})
+    lines = (current_app.json.dumps(item) + '\n'
+             for item in image_batch.run_batch(collector.images, use_rekognition))
+    response = Response(stream_with_context(lines), mimetype='application/x-ndjson')
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,60 @@
+import logging
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import create_access_token
+
+from models import User, db
+
+log = logging.getLogger(__name__)
+
+bp = Blueprint('auth', __name__)
+
+
+@bp.route('/register', methods=['POST'])
+def register():
+    try:
+        data = request.json
+        email = data.get('email')
+        password = data.get('password')
+
+        if not email or not password:
+            return jsonify({'error': 'Email and password required'}), 400
+
+        if User.query.filter_by(email=email).first():
+            return jsonify({'error': 'Email already registered'}), 400
+
+        user = User(email=email)
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+
+        access_token = create_access_token(identity=str(user.id))
+        log.info("User registered", extra={'email': email, 'user_id': user.id})
+        return jsonify({'access_token': access_token, 'user': user.to_dict()})
+    except Exception as e:
+        log.exception("Register failed")
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/login', methods=['POST'])
+def login():
+    try:
+        data = request.json
+        email = data.get('email')
+        password = data.get('password')
+
+        if not email or not password:
+            return jsonify({'error': 'Email and password required'}), 400
+
+        user = User.query.filter_by(email=email).first()
+
+        if user and user.check_password(password):
+            access_token = create_access_token(identity=str(user.id))
+            log.info("Login succeeded", extra={'email': email, 'user_id': user.id})
+            return jsonify({'access_token': access_token, 'user': user.to_dict()})
+
+        log.warning("Login failed", extra={'email': email, 'user_found': user is not None})
+        return jsonify({'error': 'Invalid credentials'}), 401
+    except Exception as e:
+        log.exception("Login failed with an error")
+        return jsonify({'error': str(e)}), 500
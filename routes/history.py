@@ -0,0 +1,101 @@
+import csv
+import io
+import os
+from datetime import datetime, timezone
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+import storage
+from models import AnalysisHistory, db
+
+bp = Blueprint('history', __name__)
+
+
+@bp.route('/history', methods=['GET'])
+@jwt_required()
+def get_history():
+    user_id = get_jwt_identity()
+    with storage.read_session() as read_session:
+        analyses = read_session.scalars(db.select(AnalysisHistory).filter_by(user_id=user_id)
+                                        .order_by(AnalysisHistory.created_at.desc()).limit(20)).all()
+        return jsonify([analysis.to_dict() for analysis in analyses])
+
+
+HISTORY_EXPORT_BATCH = int(os.getenv('HISTORY_EXPORT_BATCH', 1000))
+HISTORY_EXPORT_COLUMNS = ('id', 'created_at', 'backend', 'language', 'text', 'result')
+HISTORY_EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def _history_batches(user_id, since=None, until=None, batch_size=HISTORY_EXPORT_BATCH):
+    """Yield lists of history rows (tuples in HISTORY_EXPORT_COLUMNS order), oldest first.
+
+    Each batch is its own short query resuming after the last id seen
+    (keyset pagination), so a slow client never holds a read transaction
+    open on the live database and only one batch is in memory at a time.
+    """
+    columns = [getattr(AnalysisHistory, name) for name in HISTORY_EXPORT_COLUMNS]
+    query = db.select(*columns).where(AnalysisHistory.user_id == user_id)
+    if since is not None:
+        query = query.where(AnalysisHistory.created_at >= since)
+    if until is not None:
+        query = query.where(AnalysisHistory.created_at < until)
+    last_id = 0
+    while True:
+        with storage.read_engine().connect() as conn:
+            rows = conn.execute(query.where(AnalysisHistory.id > last_id)
+                                .order_by(AnalysisHistory.id).limit(batch_size)).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield [(row[0], row[1].isoformat() if row[1] else None) + tuple(row[2:]) for row in rows]
+
+
+def _history_ndjson(batches):
+    for batch in batches:
+        yield ''.join(current_app.json.dumps(dict(zip(HISTORY_EXPORT_COLUMNS, row))) + '\n' for row in batch)
+
+
+def _history_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HISTORY_EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _parse_time_arg(name):
+    """ISO 8601 query arg as a naive UTC datetime (created_at is stored that way), or None"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@bp.route('/history/export', methods=['GET'])
+@jwt_required()
+def export_history():
+    """Stream the caller's full history as NDJSON (default) or CSV, optionally within [since, until)"""
+    user_id = get_jwt_identity()
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in HISTORY_EXPORT_FORMATS:
+        return jsonify({'error': f"Invalid format. Use: {', '.join(HISTORY_EXPORT_FORMATS)}"}), 400
+    try:
+        since, until = _parse_time_arg('since'), _parse_time_arg('until')
+    except ValueError:
+        return jsonify({'error': 'since/until must be ISO 8601 timestamps'}), 400
+
+    batches = _history_batches(user_id, since, until)
+    body = _history_csv(batches) if fmt == 'csv' else _history_ndjson(batches)
+    response = Response(stream_with_context(body), mimetype=HISTORY_EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=history.{fmt}'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,146 @@
+import logging
+import os
+import sys
+from datetime import datetime
+
+from flask import Blueprint, jsonify
+
+import aws_clients
+import llm
+import structured_logging
+from analyzer import domain_reputation, phone_reputation, rule_packs
+from circuit_breaker import breakers
+from profiling import profile_store
+from quota import rate_limiter
+from response_cache import CachePolicy, cached, response_cache
+from response_encoding import encoding_stats
+from routes.analysis import text_cache
+from routes.practice import job_manager
+
+log = logging.getLogger(__name__)
+
+bp = Blueprint('meta', __name__)
+
+STATS_CACHE = CachePolicy(ttl=float(os.getenv('STATS_CACHE_TTL', 5)), public=False)
+TRANSLATIONS_CACHE = CachePolicy(ttl=float(os.getenv('TRANSLATIONS_CACHE_TTL', 86400)),
+                                 stale=float(os.getenv('TRANSLATIONS_CACHE_STALE', 7 * 86400)))
+
+# Static translations
+TRANSLATIONS = {
+    'es': {
+        'home': 'Inicio',
+        'learn': 'Aprender',
+        'practice': 'Práctica',
+        'about': 'Acerca de',
+        'logout': 'Cerrar sesión',
+        'fraud_detection_trainer': 'Entrenador de Detección de Fraude',
+        'learn_to_identify': 'Aprende a identificar correos fraudulentos y artículos de noticias con análisis impulsado por IA',
+        'text_analyzer': 'Analizador de Texto',
+        'paste_suspicious': 'Pega texto sospechoso a continuación para análisis instantáneo de fraude:',
+        'placeholder': 'Pega correo o texto de noticias aquí...',
+        'analyze_button': 'Analizar por Fraude',
+        'analyzing': 'Analizando...',
+        'practice_examples': 'Ejemplos de Práctica'
+    },
+    'zh': {
+        'home': '首页',
+        'learn': '学习',
+        'practice': '练习',
+        'about': '关于',
+        'logout': '登出',
+        'fraud_detection_trainer': '欺诈检测训练器',
+        'learn_to_identify': '学习使用AI分析识别欺诈邮件和新闻文章',
+        'text_analyzer': '文本分析器',
+        'paste_suspicious': '在下方粘贴可疑文本进行即时欺诈分析：',
+        'placeholder': '在此粘贴邮件或新闻文本...',
+        'analyze_button': '分析欺诈',
+        'analyzing': '分析中...',
+        'practice_examples': '练习示例'
+    }
+}
+
+
+@bp.route('/')
+def home():
+    return jsonify({'status': 'Backend is running', 'port': 8000})
+
+
+@bp.route('/api/health')
+def health_check():
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'service': 'ScamGuard API'
+    })
+
+
+@bp.route('/api/stats')
+@cached(STATS_CACHE)
+def get_stats():
+    image = sys.modules.get('image_analysis')  # None until the first image request loads it
+    batch = sys.modules.get('image_batch')
+    return jsonify({
+        'total_analyses': 0,  # Could track this in a database
+        'risk_distribution': {
+            'high': 0,
+            'medium': 0,
+            'low': 0
+        },
+        'api_status': 'operational',
+        'services': {
+            'bedrock': dict(breakers['bedrock'].snapshot(), configured=llm.loaded()),  # None until first use
+            'polly': dict(breakers['polly'].snapshot(), configured=aws_clients.registry.available('polly')),
+            'rekognition': dict(breakers['rekognition'].snapshot(),
+                                configured=aws_clients.registry.available('rekognition'))
+        },
+        'encoding': encoding_stats.snapshot(),
+        'jobs': job_manager.stats(),
+        'aws_connection_pools': aws_clients.registry.stats(),
+        'image_cache': image.image_cache.stats() if image else None,
+        'text_cache': text_cache.stats(),
+        'image_prescreen': image.prescreen_stats.snapshot() if image else None,
+        'image_batch': batch.stats() if batch else None,
+        'domain_reputation': domain_reputation.stats(),
+        'rule_pack': rule_packs.stats(),
+        'rate_limit': rate_limiter.stats(),
+        'phone_reputation': phone_reputation.stats(),
+        'model_router': llm.model_router.stats(),
+        'profiling': profile_store.stats(),
+        'logging': structured_logging.stats(),
+        'response_cache': response_cache.stats(),
+        'last_updated': datetime.now().isoformat()
+    })
+
+
+@bp.route('/api/translations/<lang>')
+@cached(TRANSLATIONS_CACHE)
+def get_translations(lang):
+    """Get translations for the specified language"""
+    translations = {
+        'home': 'Home',
+        'learn': 'Learn',
+        'practice': 'Practice',
+        'about': 'About',
+        'logout': 'Logout',
+        'fraud_detection_trainer': 'Fraud Detection Trainer',
+        'learn_to_identify': 'Learn to identify fraudulent emails and news articles with AI-powered analysis',
+        'text_analyzer': 'Text Analyzer',
+        'paste_suspicious': 'Paste suspicious text below for instant fraud analysis:',
+        'placeholder': 'Paste email or news text here...',
+        'analyze_button': 'Analyze for Fraud',
+        'analyzing': 'Analyzing...',
+        'practice_examples': 'Practice Examples'
+    }
+
+    if lang == 'en':
+        return jsonify(translations)
+
+    try:
+        translated = {}
+        for key, text in translations.items():
+            result = translator.translate(text, src='en', dest=lang)
+            translated[key] = result.text
+        return jsonify(translated)
+    except Exception as e:
+        log.warning("Translation error: %s", e)
+        return jsonify(translations)  # Return English if translation fails
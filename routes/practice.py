@@ -0,0 +1,318 @@
+import logging
+import os
+import random
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, url_for
+
+import audio
+import aws_clients
+import llm
+from analyzer import analyzer
+from config import INSTANCE_DIR
+from jobs import Job, JobManager, JobStore, PRIORITIES, QueueFullError
+from quota import upstream_allowed
+from response_cache import CachePolicy, cached, skip
+
+log = logging.getLogger(__name__)
+
+bp = Blueprint('practice', __name__)
+
+# /api/examples runs a Bedrock generation; the home page calls it on every load
+EXAMPLES_CACHE = CachePolicy(ttl=float(os.getenv('EXAMPLES_CACHE_TTL', 300)),
+                             stale=float(os.getenv('EXAMPLES_CACHE_STALE', 3600)), vary=('lang', 'count'),
+                             budget='upstream')
+
+STATIC_PRACTICE_EXAMPLES = [
+    {'type': 'phishing_email', 'text': 'Your PayPal account has been limited. Click to restore access.', 'is_fraud': True, 'explanation': 'Phishing attempt using urgency and fake links'},
+    {'type': 'legitimate', 'text': 'Your order #12345 has shipped. Track at our website.', 'is_fraud': False, 'explanation': 'Normal business communication with order details'}
+]
+
+
+def generate_ai_examples(example_type='mixed', count=5):
+    """Generate AI-powered examples for practice"""
+    if not llm.available():
+        return []
+
+    try:
+        response, model_id = llm.invoke_llm(llm.practice_examples_prompt(example_type, count), 'examples')
+        examples = llm.extract_json(llm.llm_response_text(response), '[', ']')
+        if examples is not None:
+            for example in examples:
+                if isinstance(example, dict):
+                    example['model_id'] = model_id
+            return examples
+    except Exception as e:
+        log.warning("AI example generation failed: %s", e)
+
+    return []
+
+
+# Background jobs for the slow generation endpoints. The /api/generate/*
+# routes submit a high-priority job and wait up to JOB_SYNC_WAIT_SECONDS for
+# it; past that they return 202 with the job links instead of holding the
+# connection until a proxy times it out. Job state is shared through JOB_DB
+# so any gunicorn worker can answer the status and events routes.
+JOB_SYNC_WAIT_SECONDS = float(os.getenv('JOB_SYNC_WAIT_SECONDS', 25))
+job_manager = JobManager(store=JobStore(os.getenv('JOB_DB') or os.path.join(INSTANCE_DIR, 'jobs.db')))
+
+
+def examples_job(params, progress):
+    count = params['count']
+    progress(10, f'Generating {count} examples')
+    examples = [] if params.get('fallback') else generate_ai_examples(params['type'], count)
+    if not examples:
+        # Fallback to static examples
+        return STATIC_PRACTICE_EXAMPLES[:count]
+    return examples
+
+
+def call_scenario_job(params, progress):
+    progress(10, 'Generating call scenario')
+    if params.get('fallback'):
+        return analyzer.static_call_scenario(params['difficulty'])
+    return analyzer.generate_fake_call_scenario(params['difficulty'])
+
+
+def call_audio_job(params, progress):
+    progress(10, 'Synthesizing audio')
+    if params.get('fallback'):
+        return audio.simple_audio_placeholder()
+    return audio.generate_fake_call_audio(params['script'], params['voice_type'])
+
+
+job_manager.register('examples', examples_job)
+job_manager.register('call-scenario', call_scenario_job)
+job_manager.register('call-audio', call_audio_job)
+
+
+def job_params(kind, data):
+    """Validate request data for a job type; returns (params, error)"""
+    params, error = _job_params(kind, data)
+    if params is not None and not upstream_allowed():
+        params['fallback'] = True  # over quota: static/placeholder result, no upstream call
+    return params, error
+
+
+def _job_params(kind, data):
+    if kind == 'examples':
+        try:
+            count = min(int(data.get('count', 5)), 10)  # Max 10 examples
+        except (TypeError, ValueError):
+            return None, 'Invalid count'
+        return {'type': data.get('type', 'mixed'), 'count': count}, None
+    if kind == 'call-scenario':
+        difficulty = data.get('difficulty', 'medium')
+        if difficulty not in ['easy', 'medium', 'hard']:
+            return None, 'Invalid difficulty. Use: easy, medium, hard'
+        return {'difficulty': difficulty}, None
+    if kind == 'call-audio':
+        script = data.get('script', '')
+        voice_type = data.get('voice_type', 'scammer')
+        if not script:
+            return None, 'Missing required field: script'
+        if voice_type not in ['scammer', 'elderly', 'authority']:
+            return None, 'Invalid voice_type. Use: scammer, elderly, authority'
+        return {'script': script, 'voice_type': voice_type}, None
+    return None, f"Invalid job type. Use: {', '.join(job_manager.handlers)}"
+
+
+def job_links(job):
+    return dict(job.to_dict(), status_url=url_for('.get_job', job_id=job.id),
+                events_url=url_for('.job_events', job_id=job.id))
+
+
+def run_job_sync(kind, data, error_prefix):
+    """Thin synchronous wrapper: submit a job and answer with its result"""
+    params, error = job_params(kind, data)
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        job = job_manager.submit(kind, params, priority='high')
+    except QueueFullError as e:
+        return jsonify({'error': f'{error_prefix}: {str(e)}'}), 503
+
+    if not job_manager.wait(job, JOB_SYNC_WAIT_SECONDS):
+        response = jsonify(job_links(job))
+        response.headers['Location'] = url_for('.get_job', job_id=job.id)
+        return response, 202
+    if job.status == Job.FAILED:
+        return jsonify({'error': f'{error_prefix}: {job.error}'}), 500
+    return jsonify(job.result)
+
+
+@bp.route('/api/jobs', methods=['POST'])
+def submit_job():
+    data = request.json or {}
+    kind = data.get('type', '')
+    priority = data.get('priority', 'normal')
+    if priority not in PRIORITIES:
+        return jsonify({'error': f"Invalid priority. Use: {', '.join(PRIORITIES)}"}), 400
+
+    params, error = job_params(kind, data.get('params') or {})
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        job = job_manager.submit(kind, params, priority)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+
+    response = jsonify(job_links(job))
+    response.headers['Location'] = url_for('.get_job', job_id=job.id)
+    return response, 202
+
+
+@bp.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify(job.to_dict())
+
+
+@bp.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-Sent Events stream of job progress, ending with a 'done' event"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    response = Response(job_manager.events(job), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@bp.route('/api/generate/call-scenario', methods=['POST'])
+def generate_call_scenario():
+    return run_job_sync('call-scenario', request.json or {}, 'Scenario generation failed')
+
+
+@bp.route('/api/generate/call-audio', methods=['POST'])
+def generate_call_audio():
+    return run_job_sync('call-audio', request.json or {}, 'Audio generation failed')
+
+
+@bp.route('/api/practice/call-test', methods=['POST'])
+def call_test_practice():
+    try:
+        data = request.json or {}
+        difficulty = data.get('difficulty', 'medium')
+        include_audio = data.get('include_audio', False)
+
+        # Generate scenario
+        if upstream_allowed():
+            scenario = analyzer.generate_fake_call_scenario(difficulty)
+        else:
+            scenario = analyzer.static_call_scenario(difficulty)
+
+        # Generate audio if requested
+        if include_audio and aws_clients.registry.available('polly') and upstream_allowed():
+            audio_result = audio.generate_fake_call_audio(scenario['script'], 'scammer')
+            scenario['audio'] = audio_result
+
+        return jsonify({
+            'test_id': f"test_{random.randint(1000, 9999)}",
+            'scenario': scenario,
+            'instructions': 'Listen to or read the call scenario. Identify red flags and determine if this is a scam.',
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        return jsonify({'error': f'Test generation failed: {str(e)}'}), 500
+
+
+@bp.route('/api/practice/call-test/<test_id>/submit', methods=['POST'])
+def submit_call_test(test_id):
+    try:
+        data = request.json
+        user_answer = data.get('is_scam', None)
+        identified_flags = data.get('identified_flags', [])
+
+        if user_answer is None:
+            return jsonify({'error': 'Missing required field: is_scam'}), 400
+
+        # For this demo, assume all generated scenarios are scams
+        correct_answer = True
+        is_correct = user_answer == correct_answer
+
+        score = 0
+        if is_correct:
+            score += 50
+
+        # Bonus points for identifying red flags
+        score += min(len(identified_flags) * 10, 50)
+
+        return jsonify({
+            'test_id': test_id,
+            'correct': is_correct,
+            'score': score,
+            'feedback': 'Correct! This was indeed a scam call.' if is_correct else 'Incorrect. This was a scam call with several red flags.',
+            'learning_points': [
+                'Scammers often create urgency to prevent you from thinking clearly',
+                'Legitimate organizations rarely ask for sensitive information over the phone',
+                'Always verify caller identity through official channels'
+            ],
+            'timestamp': datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        return jsonify({'error': f'Test submission failed: {str(e)}'}), 500
+
+
+@bp.route('/api/generate/examples', methods=['POST'])
+def generate_practice_examples():
+    return run_job_sync('examples', request.json or {}, 'Example generation failed')
+
+
+@bp.route('/api/examples')
+@cached(EXAMPLES_CACHE)
+def get_examples():
+    lang = request.args.get('lang', 'en')
+    count = int(request.args.get('count', 4))
+
+    if llm.available() and upstream_allowed():
+        try:
+            response, model_id = llm.invoke_llm(llm.home_examples_prompt(count), 'examples')
+            examples = llm.extract_json(llm.llm_response_text(response), '[', ']')
+            if examples is not None:
+                # Add generated flag
+                for example in examples:
+                    example['generated_by'] = 'AI'
+                    example['model_id'] = model_id
+
+                return jsonify(examples)
+        except Exception as e:
+            log.warning("AI example generation failed: %s", e)
+
+    if llm.available():
+        skip()  # over quota or the generation failed: don't pin the fallback in the cache
+
+    # Fallback static examples
+    examples = [
+        {
+            'type': 'phishing_email',
+            'text': 'URGENT: Your account will be suspended! Click here immediately to verify your information.',
+            'is_fraud': True,
+            'generated_by': 'Static'
+        },
+        {
+            'type': 'fake_news',
+            'text': "Scientists discover miracle cure that doctors don't want you to know about!",
+            'is_fraud': True,
+            'generated_by': 'Static'
+        },
+        {
+            'type': 'legitimate',
+            'text': 'Your monthly statement is now available. Log in to your account to view it.',
+            'is_fraud': False,
+            'generated_by': 'Static'
+        },
+        {
+            'type': 'scam_call',
+            'text': 'This is the IRS. You owe back taxes and will be arrested unless you pay immediately.',
+            'is_fraud': True,
+            'generated_by': 'Static'
+        }
+    ]
+
+    return jsonify(examples[:count])
@@ -0,0 +1,38 @@
+from flask import Blueprint, Response, abort, jsonify, request
+
+import profiling
+from profiling import profile_store
+
+bp = Blueprint('profiles', __name__)
+
+PROFILE_FORMATS = {'json': '.json', 'folded': '.folded', 'spans': '.spans.folded'}
+
+
+@bp.before_request
+def require_profiling():
+    # Profiles expose code paths and timings: only served when profiling is on,
+    # and only to holders of PROFILE_TOKEN when one is set
+    if not profiling.PROFILING:
+        abort(404)
+    if profiling.PROFILE_TOKEN and request.headers.get(profiling.PROFILE_HEADER) != profiling.PROFILE_TOKEN:
+        return jsonify({'error': 'Profile token required'}), 403
+
+
+@bp.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'profiles': profile_store.list_ids()[:max(limit, 0)]})
+
+
+@bp.route('/api/profiles/<request_id>', methods=['GET'])
+def get_profile(request_id):
+    fmt = request.args.get('format', 'json')
+    if fmt not in PROFILE_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(PROFILE_FORMATS)}"}), 400
+
+    content = profile_store.read(request_id, PROFILE_FORMATS[fmt])
+    if content is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if fmt == 'json':
+        return Response(content, mimetype='application/json')
+    return Response(content, mimetype='text/plain')
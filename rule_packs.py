@@ -0,0 +1,189 @@
+"""
+Versioned keyword rule packs for the rule-based analyzers.
+
+A rule pack is a JSON file in RULES_DIR (see rules/core-1.0.0.json) with a
+name, a dotted numeric version and the keyword lists used by ScamAnalyzer,
+rule_based_analysis and the Rekognition scorer. The highest version in the
+directory is active unless RULE_PACK_VERSION pins one.
+
+A watcher thread polls the directory every RULES_CHECK_SECONDS. A changed
+pack is loaded, validated and compiled on that thread and then swapped in
+with a single assignment, so requests in flight keep the pack they started
+with and no request waits on a reload. A pack that fails validation is
+reported in the stats and the current pack stays active.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+RULES_DIR = os.getenv('RULES_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules')
+RULES_CHECK_SECONDS = float(os.getenv('RULES_CHECK_SECONDS', 5))
+RULE_PACK_VERSION = os.getenv('RULE_PACK_VERSION') or None
+
+KEYWORD_LISTS = ('urgent_subject', 'urgent_requests', 'website_indicators',
+                 'image_text_keywords', 'image_document_labels')
+TEXT_RISK_LEVELS = ('high', 'investment', 'medium')
+
+
+class RulePackError(ValueError):
+    """Raised when a rule pack file is missing fields or malformed"""
+
+
+def parse_version(version):
+    try:
+        return tuple(int(part) for part in str(version).split('.'))
+    except ValueError:
+        raise RulePackError(f"version must be dotted numbers, got {version!r}")
+
+
+def _keywords(value, field):
+    if not isinstance(value, list) or not all(isinstance(word, str) and word.strip() for word in value):
+        raise RulePackError(f"{field} must be a list of non-empty strings")
+    # Lower-cased and de-duplicated in order; matching is on lower-cased text
+    return tuple(dict.fromkeys(word.strip().lower() for word in value))
+
+
+class RulePack:
+    """A validated, compiled rule pack. Immutable once built."""
+
+    def __init__(self, data, path=None, checksum=None):
+        for field in ('name', 'version'):
+            if not data.get(field):
+                raise RulePackError(f"missing {field}")
+        self.name = str(data['name'])
+        self.version = str(data['version'])
+        self.version_key = parse_version(self.version)
+        self.path = path
+        self.checksum = checksum
+
+        patterns = data.get('content_patterns')
+        if not isinstance(patterns, dict) or not patterns:
+            raise RulePackError('content_patterns must be a non-empty object')
+        self.content_patterns = tuple((category, _keywords(words, f'content_patterns.{category}'))
+                                      for category, words in patterns.items())
+
+        text_risk = data.get('text_risk') or {}
+        self.text_risk = {level: _keywords(text_risk.get(level), f'text_risk.{level}') for level in TEXT_RISK_LEVELS}
+        for field in KEYWORD_LISTS:
+            setattr(self, field, _keywords(data.get(field), field))
+
+    @property
+    def label(self):
+        return f"{self.name}@{self.version}"
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            raise RulePackError(f"invalid JSON: {e}")
+        if not isinstance(data, dict):
+            raise RulePackError('rule pack must be a JSON object')
+        return cls(data, path, hashlib.sha256(raw).hexdigest()[:12])
+
+
+class RulePackManager:
+    """Holds the active rule pack and swaps in new versions from `directory`"""
+
+    def __init__(self, directory=RULES_DIR, check_seconds=RULES_CHECK_SECONDS, pinned_version=RULE_PACK_VERSION):
+        self.directory = directory
+        self.check_seconds = check_seconds
+        self.pinned_version = pinned_version
+        self._lock = threading.Lock()
+        self._watcher_pid = None
+        self._signature = None
+        self.loaded_at = None
+        self.reloads = 0
+        self.errors = {}  # file name -> last validation error
+        self._active = None
+        self.reload()
+        if self._active is None:
+            raise RulePackError(f"no usable rule pack in {directory}: {self.errors or 'no *.json files'}")
+
+    def active(self):
+        """The current pack; read it once per analysis so one result uses one pack"""
+        if self._watcher_pid != os.getpid():
+            self._start_watcher()
+        return self._active
+
+    def _start_watcher(self):
+        # Started on first use in each process: threads do not survive a
+        # fork, and importing the app from scripts should not spawn one.
+        with self._lock:
+            if self._watcher_pid == os.getpid() or not self.check_seconds:
+                return
+            self._watcher_pid = os.getpid()
+        threading.Thread(target=self._watch, name='rule-pack-watcher', daemon=True).start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.check_seconds)
+            try:
+                if self._scan() != self._signature:
+                    self.reload()
+            except Exception as e:
+                log.warning("Rule pack reload failed: %s", e)
+
+    def _files(self):
+        try:
+            names = sorted(name for name in os.listdir(self.directory) if name.endswith('.json'))
+        except OSError:
+            return []
+        return [os.path.join(self.directory, name) for name in names]
+
+    def _scan(self):
+        signature = []
+        for path in self._files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def reload(self):
+        """Load every pack in the directory and activate the best one; returns the active pack"""
+        signature = self._scan()
+        packs, errors = [], {}
+        for path, _, _ in signature:
+            try:
+                packs.append(RulePack.load(path))
+            except (OSError, RulePackError) as e:
+                errors[os.path.basename(path)] = str(e)
+        if self.pinned_version:
+            packs = [pack for pack in packs if pack.version == self.pinned_version]
+        best = max(packs, key=lambda pack: pack.version_key, default=None)
+
+        with self._lock:
+            self._signature = signature
+            self.errors = errors
+            current = self._active
+            if best is not None and (current is None or (best.label, best.checksum) != (current.label, current.checksum)):
+                self._active = best
+                self.loaded_at = time.time()
+                if current is not None:
+                    self.reloads += 1
+                log.info("Rule pack %s active (%s)", best.label, os.path.basename(best.path))
+        for name, error in errors.items():
+            log.warning("Skipped rule pack %s: %s", name, error)
+        return self._active
+
+    def stats(self):
+        pack = self._active
+        return {
+            'active': pack.label,
+            'checksum': pack.checksum,
+            'file': os.path.basename(pack.path) if pack.path else None,
+            'pinned_version': self.pinned_version,
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.loaded_at)),
+            'reloads': self.reloads,
+            'errors': dict(self.errors)
+        }
@@ -49,7 +49,8 @@ def main():
     
     try:
         # Import and run the Flask app
-        from app import app
+        from app import app, init_db
+        init_db(app)
         print("✅ Flask application loaded successfully")
         print("🌐 Server will start at http://localhost:8000")
         print("📱 Press Ctrl+C to stop the server")
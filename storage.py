@@ -0,0 +1,119 @@
+"""
+SQLite tuning and a separate read path for the app database.
+
+With the default rollback journal a writer locks the whole file, so
+/history readers and /analyze writers queue behind each other. init_app()
+arranges for SQLite databases to be switched to WAL, where readers see the
+last committed state while a write is in progress, and for per-connection
+pragmas (SQLITE_SYNCHRONOUS, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE,
+SQLITE_BUSY_TIMEOUT_MS) on every new connection. It only registers engine
+listeners: the file is opened, and switched to WAL, on the first
+connection (init_db() or the first request), so importing the app has no
+side effects on disk.
+
+Query endpoints read through read_engine(): its own connection pool, with
+PRAGMA query_only so nothing on it can write, leaving the Flask-SQLAlchemy
+engine for writes. DATABASE_READ_URL points reads at a replica instead.
+For non-SQLite or in-memory databases the pragmas are skipped and reads
+share the main engine.
+"""
+
+import logging
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+log = logging.getLogger(__name__)
+
+SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'true').lower() in ('1', 'true', 'yes')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')  # NORMAL is durable to app crashes in WAL mode
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 20000))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_READ_POOL_SIZE = int(os.getenv('SQLITE_READ_POOL_SIZE', 8))
+DATABASE_READ_URL = os.getenv('DATABASE_READ_URL') or None
+
+_read_engine = None
+
+
+def connection_pragmas(query_only=False):
+    pragmas = [
+        f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}',
+        f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}',  # negative = KiB rather than pages
+        f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+        f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+    if query_only:
+        pragmas.append('PRAGMA query_only=ON')
+    return pragmas
+
+
+def tune_sqlite(engine, query_only=False, wal=False):
+    """Run the tuning pragmas on every new DBAPI connection of `engine`; with wal, switch the file to WAL on the first"""
+    pragmas = connection_pragmas(query_only)
+
+    if wal:
+        @event.listens_for(engine, 'first_connect')
+        def set_wal(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                mode = cursor.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+            finally:
+                cursor.close()
+            log.info("SQLite tuned", extra={'journal_mode': mode, 'synchronous': SQLITE_SYNCHRONOUS})
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    engine.pool.dispose()  # connections opened before the listener get the pragmas on reconnect
+
+
+def is_file_sqlite(engine):
+    return engine.url.get_backend_name() == 'sqlite' and engine.url.database not in (None, '', ':memory:')
+
+
+def enable_wal(engine):
+    """Switch the database file to WAL (persistent, so it only has to succeed once); returns the journal mode"""
+    with engine.connect() as conn:
+        return conn.exec_driver_sql('PRAGMA journal_mode=WAL').scalar()
+
+
+def create_read_engine(write_engine, url=None, pool_size=SQLITE_READ_POOL_SIZE):
+    """A query-only engine over the same database file (or `url`)"""
+    if url:
+        return create_engine(url, pool_size=pool_size, pool_pre_ping=True)
+    engine = create_engine(write_engine.url, pool_size=pool_size, max_overflow=pool_size,
+                           connect_args={'check_same_thread': False})
+    tune_sqlite(engine, query_only=True)
+    return engine
+
+
+def init_app(app, db, tuning=SQLITE_TUNING, read_url=DATABASE_READ_URL):
+    """Tune the app's SQLite engine and set up the read pool. Call after db.init_app(); opens no connection."""
+    global _read_engine
+    with app.app_context():
+        engine = db.engine
+        if is_file_sqlite(engine) and tuning:
+            tune_sqlite(engine, wal=True)
+        if read_url or (is_file_sqlite(engine) and tuning):
+            _read_engine = create_read_engine(engine, read_url)
+        else:
+            _read_engine = engine
+
+
+def read_engine():
+    """Engine for read-only query endpoints"""
+    return _read_engine
+
+
+def read_session():
+    """ORM session on the read engine; use as a context manager"""
+    return Session(_read_engine)
@@ -0,0 +1,288 @@
+"""
+Structured, non-blocking logging.
+
+Log calls on request threads only copy the record into a bounded queue; a
+background thread formats it (JSON lines, or text with LOG_FORMAT=text)
+and writes it out. When the writer falls behind and the queue is
+full, records are dropped and counted instead of stalling the request;
+the counts are reported under 'logging' in /api/stats. Lines go to stderr
+(LOG_STREAM=stdout to change), leaving stdout to CLI and benchmark output.
+
+Every line carries the id of the request that logged it (also returned in
+the X-Request-ID header). Sensitive fields (passwords, tokens, auth
+headers, image and audio payloads) are redacted and emails masked, both
+in structured fields and in the message text.
+
+Importing this module routes the root logger through the queue (app.py
+imports it before the modules that log while loading). Modules log with
+the standard library:
+
+    log = logging.getLogger(__name__)
+    log.info('Index loaded', extra={'domains': count})
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()  # json or text
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_STREAM = os.getenv('LOG_STREAM', 'stderr').lower()
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+REDACTED = '[REDACTED]'
+SENSITIVE_KEYS = re.compile(r'pass(word|wd)?|secret|token|authorization|api[_-]?key|access[_-]?key|credential'
+                            r'|^image$|^images$|audio_data|cookie', re.IGNORECASE)
+EMAIL_KEYS = re.compile(r'email', re.IGNORECASE)
+# key=value / "key": "value" pairs, bearer tokens and long base64 runs inside free text
+SENSITIVE_TEXT = re.compile(r'''(?P<key>["']?(?:password|passwd|secret|token|api_key|access_key)["']?\s*[:=]\s*)'''
+                            r'''(?P<value>"[^"]*"|'[^']*'|[^\s,}]+)''', re.IGNORECASE)
+BEARER_TEXT = re.compile(r'Bearer\s+[A-Za-z0-9._~+/=-]+')
+BASE64_TEXT = re.compile(r'(?:data:[\w/+.-]+;base64,)?[A-Za-z0-9+/=]{200,}')
+EMAIL_TEXT = re.compile(r'\b([A-Za-z0-9._%+-])[A-Za-z0-9._%+-]*@([A-Za-z0-9.-]+\.[A-Za-z]{2,})\b')
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id'}
+
+_request_id = ContextVar('request_id', default=None)
+
+
+def new_request_id():
+    return uuid.uuid4().hex
+
+
+def request_id():
+    """Id of the request being handled in this context, or None outside requests"""
+    return _request_id.get()
+
+
+def bind_request_id(value=None):
+    """Set the current request id (a new one by default); returns the token to pass to reset_request_id()"""
+    return _request_id.set(value or new_request_id())
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+def mask_email(value):
+    return EMAIL_TEXT.sub(r'\1***@\2', value)
+
+
+def redact_text(text):
+    text = SENSITIVE_TEXT.sub(lambda m: m.group('key') + REDACTED, text)
+    text = BEARER_TEXT.sub('Bearer ' + REDACTED, text)
+    text = BASE64_TEXT.sub(lambda m: f'[{len(m.group(0))} chars of base64]', text)
+    return mask_email(text)
+
+
+def redact(value, key=''):
+    """Redact a structured field value by its key, recursing into dicts and lists"""
+    if key and SENSITIVE_KEYS.search(key):
+        return REDACTED
+    if isinstance(value, dict):
+        return {k: redact(v, str(k)) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v, key) for v in value]
+    if isinstance(value, str):
+        return mask_email(value) if EMAIL_KEYS.search(key) else redact_text(value)
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    return redact_text(str(value))
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formats a prepared record as one JSON object per line, or as text"""
+
+    def __init__(self, fmt=LOG_FORMAT):
+        super().__init__()
+        self.fmt = fmt
+
+    def fields(self, record):
+        return {key: redact(value, key) for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+    def format(self, record):
+        message = redact_text(record.getMessage())
+        if record.exc_text:
+            message = f'{message}\n{redact_text(record.exc_text)}'
+        fields = self.fields(record)
+        request_id = getattr(record, 'request_id', None)
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z'
+
+        if self.fmt == 'text':
+            extras = ' '.join(f'{key}={value}' for key, value in fields.items())
+            rid = f' [{request_id}]' if request_id else ''
+            return f'{timestamp} {record.levelname:7s} {record.name}{rid}: {message}' + (f' {extras}' if extras else '')
+
+        entry = {'ts': timestamp, 'level': record.levelname, 'logger': record.name, 'msg': message}
+        if request_id:
+            entry['request_id'] = request_id
+        entry.update(fields)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = {}
+
+    def prepare(self, record):
+        # Freeze the message and traceback on the calling thread (args may be
+        # mutated after the call returns); formatting happens on the writer
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.request_id = _request_id.get()
+        return record
+
+    def _drop(self, record):
+        with self._lock:
+            self.dropped[record.levelname] = self.dropped.get(record.levelname, 0) + 1
+
+    def emit(self, record):
+        # Skip preparing records that could not be queued anyway
+        if self.queue.full():
+            self._drop(record)
+            return
+        super().emit(record)
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._drop(record)
+            return
+        with self._lock:
+            self.enqueued += 1
+
+
+class CountingStreamHandler(logging.StreamHandler):
+    """Writes to sys.stdout/sys.stderr as they are at write time, so redirections made later still apply"""
+
+    def __init__(self, stream_name=LOG_STREAM):
+        super().__init__()
+        self.stream_name = stream_name
+        self.written = 0
+
+    def emit(self, record):
+        self.stream = sys.stdout if self.stream_name == 'stdout' else sys.stderr
+        super().emit(record)
+        self.written += 1
+
+
+class LogWriter(logging.handlers.QueueListener):
+    """Background writer; its stop sentinel waits for room rather than failing on a full queue"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel, timeout=5)
+
+
+class LogPipeline:
+    def __init__(self, level=LOG_LEVEL, fmt=LOG_FORMAT, capacity=LOG_QUEUE_SIZE, stream_name=LOG_STREAM):
+        self.capacity = capacity
+        self.queue = queue.Queue(maxsize=capacity)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.writer_handler = CountingStreamHandler(stream_name)
+        self.writer_handler.setFormatter(StructuredFormatter(fmt))
+        self.writer = LogWriter(self.queue, self.writer_handler)
+        self.level = level
+        self.format = fmt
+        self._started = False
+
+    def start(self):
+        if self._started:
+            return
+        root = logging.getLogger()
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        self.writer.start()
+        self._started = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Flush what is queued and stop the writer thread"""
+        if not self._started:
+            return
+        self._started = False
+        logging.getLogger().removeHandler(self.handler)
+        try:
+            self.writer.stop()
+        except queue.Full:
+            pass
+
+    def stats(self):
+        with self.handler._lock:
+            dropped = dict(self.handler.dropped)
+            enqueued = self.handler.enqueued
+        return {
+            'format': self.format,
+            'level': self.level,
+            'queue_capacity': self.capacity,
+            'queued': self.queue.qsize(),
+            'enqueued': enqueued,
+            'written': self.writer_handler.written,
+            'dropped': sum(dropped.values()),
+            'dropped_by_level': dropped
+        }
+
+
+pipeline = LogPipeline()
+
+
+def configure():
+    """Route all logging through the queue; safe to call more than once"""
+    pipeline.start()
+
+
+def stats():
+    return pipeline.stats()
+
+
+def bind_request():
+    """before_request hook: give the request an id for its log lines and response"""
+    from flask import g  # only the hooks need Flask; the rule engine logs without it
+
+    g.request_id_token = bind_request_id()
+
+
+def add_request_id_header(response):
+    rid = request_id()
+    if rid is not None:
+        response.headers[REQUEST_ID_HEADER] = rid
+    return response
+
+
+def unbind_request(exc):
+    from flask import g
+
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        reset_request_id(token)
+
+
+def init_app(app):
+    """Register the request-id hooks; call first so every other hook logs with the id"""
+    app.before_request(bind_request)
+    app.after_request(add_request_id_header)
+    app.teardown_request(unbind_request)
+
+
+configure()
@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Settings are read at import time, so set them before anything imports the app
+_scratch = tempfile.mkdtemp(prefix='scamsense-tests-')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('RATE_LIMIT', 'false')
+os.environ.setdefault('IMAGE_CACHE_PATH', os.path.join(_scratch, 'image_cache.json'))
+os.environ.setdefault('JOB_DB', os.path.join(_scratch, 'jobs.db'))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+
+@pytest.fixture
+def fresh_breakers(monkeypatch):
+    """Fresh circuit breakers for the test, so earlier tests' failures do not carry over"""
+    from circuit_breaker import CircuitBreaker, breakers
+
+    for name in list(breakers):
+        monkeypatch.setitem(breakers, name, CircuitBreaker(name, failure_threshold=5, reset_timeout=30))
+    return breakers
+
+
+@pytest.fixture
+def app_client(fresh_breakers):
+    """Test client for the app, with the load-test stand-ins in place of AWS"""
+    import app as core
+    from loadtest.fake_aws import build_fakes
+
+    session, bedrock = build_fakes()
+    core.use_aws_clients(session, bedrock)
+    core.init_db(core.app)
+    client = core.app.test_client()
+    client.aws_session = session
+    return client
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+
+CHUNK = 64 * 1024
+
+
+def post_chunked(path, chunks, content_type='application/json'):
+    """POST a chunked body (no Content-Length) to the ASGI app; returns (status, body, chunks read)"""
+    import asgi_app
+
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'query_string': b'', 'root_path': '',
+             'headers': [(b'content-type', content_type.encode()), (b'transfer-encoding', b'chunked')],
+             'client': ('127.0.0.1', 5000), 'server': ('testserver', 80), 'http_version': '1.1'}
+    received, sent = [], []
+
+    async def receive():
+        if len(received) < chunks:
+            received.append(CHUNK)
+            return {'type': 'http.request', 'body': b'\0' * CHUNK, 'more_body': len(received) < chunks}
+        await asyncio.sleep(3600)  # nothing more to send until the response is done
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_app.app(scope, receive, send))
+    status = next(m['status'] for m in sent if m['type'] == 'http.response.start')
+    body = b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+    return status, body, len(received)
+
+
+@pytest.mark.parametrize('path', ['/analyze', '/api/analyze/images'])
+def test_chunked_body_over_the_limit_is_refused_early(app_client, monkeypatch, path):
+    import app as core
+    import image_batch
+
+    monkeypatch.setitem(core.app.config, 'MAX_CONTENT_LENGTH', 4 * CHUNK)
+    monkeypatch.setattr(image_batch, 'BATCH_MAX_BYTES', 48 * 1024)  # a 2-chunk cap on the batch route
+
+    status, body, read = post_chunked(path, chunks=64)
+
+    assert status == 413
+    assert 'larger than' in json.loads(body)['error']
+    assert read <= 6
+
+
+def test_fallback_route_reads_a_streamed_body(app_client):
+    import asgi_app
+
+    payload = json.dumps({'content': 'URGENT: verify your account at http://bank-login.example now'}).encode()
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/analyze/text', 'query_string': b'', 'root_path': '',
+             'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())],
+             'client': ('127.0.0.1', 5000), 'server': ('testserver', 80), 'http_version': '1.1'}
+    parts = [payload[:10], payload[10:]]
+    sent = []
+
+    async def receive():
+        if parts:
+            return {'type': 'http.request', 'body': parts.pop(0), 'more_body': bool(parts)}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_app.app(scope, receive, send))
+    assert sent[0]['status'] == 200
+    assert 'risk_level' in b''.join(m.get('body', b'') for m in sent[1:]).decode()
+
+
+def test_open_job_event_streams_do_not_hold_bridge_threads(app_client, monkeypatch):
+    import asgi_app
+    from routes.practice import job_manager
+
+    release = __import__('threading').Event()
+    monkeypatch.setitem(job_manager.handlers, 'held', lambda params, progress: release.wait(10) and {'ok': True})
+    monkeypatch.setattr(asgi_app, 'JOB_POLL_SECONDS', 0.01)
+    job = job_manager.submit('held')
+
+    def request(path):
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'root_path': '',
+                 'headers': [], 'client': ('127.0.0.1', 5000), 'server': ('testserver', 80), 'http_version': '1.1'}
+        sent, first = [], [True]
+
+        async def receive():
+            if first.pop() if first else False:
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            sent.append(message)
+
+        async def run():
+            await asgi_app.app(scope, receive, send)
+            return b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+        return run()
+
+    async def scenario():
+        streams = [asyncio.ensure_future(request(f'/api/jobs/{job.id}/events'))
+                   for _ in range(asgi_app.ASYNC_WSGI_THREADS + 4)]
+        await asyncio.sleep(0.2)
+        health = await asyncio.wait_for(request('/api/health'), 5)  # a Flask route, through the bridge
+        release.set()
+        return health, await asyncio.wait_for(asyncio.gather(*streams), 15)
+
+    health, streams = asyncio.run(scenario())
+    assert health
+    assert all(b'event: done' in body and b'"ok": true' in body for body in streams)
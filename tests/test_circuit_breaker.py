@@ -0,0 +1,103 @@
+import base64
+import io
+import random
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError, ReadTimeoutError
+
+from circuit_breaker import CircuitBreaker, is_service_failure
+
+
+def client_error(code, status, operation='DetectText'):
+    return ClientError({'Error': {'Code': code, 'Message': 'simulated'},
+                        'ResponseMetadata': {'HTTPStatusCode': status}}, operation)
+
+
+def raising(error):
+    def call(*args, **kwargs):
+        raise error
+    return call
+
+
+@pytest.mark.parametrize('error', [
+    client_error('ThrottlingException', 429),
+    client_error('InternalServerError', 500),
+    client_error('ServiceUnavailableException', 503),
+    ReadTimeoutError(endpoint_url='https://rekognition.us-east-1.amazonaws.com'),
+    EndpointConnectionError(endpoint_url='https://rekognition.us-east-1.amazonaws.com'),
+])
+def test_service_failures_open_the_circuit(error):
+    breaker = CircuitBreaker('rekognition', failure_threshold=5)
+    for _ in range(5):
+        with pytest.raises(type(error)):
+            breaker.call(raising(error))
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.parametrize('code', ['InvalidImageFormatException', 'ImageTooLargeException',
+                                  'InvalidParameterException', 'ValidationException'])
+def test_caller_errors_leave_the_circuit_closed(code):
+    breaker = CircuitBreaker('rekognition', failure_threshold=5)
+    for _ in range(20):
+        with pytest.raises(ClientError):
+            breaker.call(raising(client_error(code, 400)))
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()['total_failures'] == 0
+
+
+def test_wrapped_errors_are_classified_by_their_cause():
+    def wrapped(error):
+        # langchain_aws re-raises Bedrock errors as ValueError from inside its except block
+        try:
+            try:
+                raise error
+            except ClientError as e:
+                raise ValueError(f'Error raised by bedrock service: {e}')
+        except ValueError as wrapper:
+            return wrapper
+
+    assert not is_service_failure(wrapped(client_error('ValidationException', 400, 'InvokeModel')))
+    assert is_service_failure(wrapped(client_error('ThrottlingException', 429, 'InvokeModel')))
+    assert not is_service_failure(ValueError('not an AWS error'))
+
+
+def test_caller_error_frees_the_half_open_probe():
+    breaker = CircuitBreaker('rekognition', failure_threshold=1, reset_timeout=0)
+    with pytest.raises(ClientError):
+        breaker.call(raising(client_error('ThrottlingException', 429)))
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    with pytest.raises(ClientError):
+        breaker.call(raising(client_error('InvalidImageFormatException', 400)))
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def _gif_data_url(seed):
+    from PIL import Image
+
+    rng = random.Random(seed)
+    image = Image.new('RGB', (200, 200))
+    image.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(200 * 200)])
+    buffer = io.BytesIO()
+    image.save(buffer, format='GIF')
+    return 'data:image/gif;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def test_bad_format_uploads_leave_rekognition_available(app_client, fresh_breakers):
+    rekognition = app_client.aws_session.rekognition
+    calls = []
+
+    def rejected(**kwargs):
+        calls.append(kwargs)
+        raise client_error('InvalidImageFormatException', 400)
+    rekognition.detect_text = rekognition.detect_labels = rejected
+
+    for seed in range(10):
+        response = app_client.post('/api/analyze/image', json={'image': _gif_data_url(seed)})
+        assert response.status_code == 200
+
+    assert len(calls) == 10
+    assert fresh_breakers['rekognition'].state == CircuitBreaker.CLOSED
+    assert fresh_breakers['rekognition'].snapshot()['total_failures'] == 0
@@ -0,0 +1,17 @@
+import os
+
+from domain_reputation import DomainReputation, _index_key, write_index
+
+
+def test_index_held_across_a_reload_still_answers(tmp_path):
+    index_path = str(tmp_path / 'domains.idx')
+    write_index({_index_key('scam.example'): 'phishing'}, index_path)
+    reputation = DomainReputation(index_path=index_path, check_seconds=0)
+    held = reputation._index  # what a lookup in flight on another thread has in hand
+
+    write_index({_index_key('other.example'): 'malware'}, index_path)
+    os.utime(index_path, (held.mtime + 10, held.mtime + 10))
+    assert reputation.lookup('other.example') == ('other.example', 'malware')
+    assert reputation._index is not held
+
+    assert held.category('scam.example') == 'phishing'
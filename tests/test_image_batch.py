@@ -0,0 +1,20 @@
+import io
+
+import pytest
+
+
+@pytest.mark.parametrize('content_type', ['application/zip', 'application/json'])
+def test_chunked_batch_over_the_limit_is_refused(app_client, monkeypatch, content_type):
+    import image_batch
+
+    monkeypatch.setattr(image_batch, 'BATCH_MAX_BYTES', 48 * 1024)  # a 128 KB body cap once base64 is allowed for
+    body = io.BytesIO(b'\0' * (1024 * 1024))
+
+    # Transfer-Encoding: chunked, so there is no Content-Length for the route to check
+    response = app_client.post('/api/analyze/images', input_stream=body, content_type=content_type,
+                               headers={'Transfer-Encoding': 'chunked'},
+                               environ_overrides={'wsgi.input_terminated': True})
+
+    assert response.status_code == 413
+    assert 'larger than' in response.get_json()['error']
+    assert body.tell() <= 192 * 1024  # stopped reading soon after the cap
@@ -0,0 +1,64 @@
+import json
+import random
+import time
+
+from image_cache import ImageResultCache
+
+
+def detailed_hashes(count, seed):
+    rng = random.Random(seed)
+    cache = ImageResultCache()
+    hashes = []
+    while len(hashes) < count:
+        value = rng.getrandbits(64)
+        if cache.cacheable(value):
+            hashes.append(value)
+    return hashes
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def saved_hashes(path):
+    with open(path) as f:
+        return {int(entry['hash'], 16) for entry in json.load(f)['entries']}
+
+
+def test_workers_sharing_a_file_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / 'image_cache.json')
+    first, second = ImageResultCache(path, save_every=1000), ImageResultCache(path, save_every=1000)
+    first_hashes, second_hashes = detailed_hashes(5, seed=1), detailed_hashes(5, seed=2)
+    for image_hash in first_hashes:
+        first.store(image_hash, {'risk_level': 'LOW'})
+    for image_hash in second_hashes:
+        second.store(image_hash, {'risk_level': 'HIGH'})
+
+    assert first.save() and second.save()
+    assert saved_hashes(path) == set(first_hashes) | set(second_hashes)
+
+
+def test_periodic_save_runs_in_the_background(tmp_path):
+    path = tmp_path / 'image_cache.json'
+    cache = ImageResultCache(str(path), save_every=3)
+    for image_hash in detailed_hashes(3, seed=3):
+        cache.store(image_hash, {'risk_level': 'LOW'})
+
+    assert wait_for(path.exists)
+    assert wait_for(lambda: len(saved_hashes(path)) == 3)
+
+
+def test_save_failure_does_not_fail_the_store(tmp_path):
+    blocker = tmp_path / 'not-a-dir'
+    blocker.write_text('')
+    cache = ImageResultCache(str(blocker / 'image_cache.json'), save_every=1)
+    image_hash = detailed_hashes(1, seed=4)[0]
+
+    cache.store(image_hash, {'risk_level': 'LOW'})  # would raise if the save ran on this thread
+
+    assert wait_for(lambda: cache.stats()['save_errors'] >= 1)
+    assert cache.lookup(image_hash)['risk_level'] == 'LOW'
+    assert cache.save() is False
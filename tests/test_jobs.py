@@ -0,0 +1,53 @@
+import threading
+
+from jobs import Job, JobManager, JobStore
+
+
+def test_job_is_visible_to_another_worker(tmp_path):
+    """Two managers on one store stand in for two gunicorn workers"""
+    store_path = str(tmp_path / 'jobs.db')
+    release = threading.Event()
+
+    def handler(params, progress):
+        progress(50, 'Halfway')
+        release.wait(5)
+        return {'examples': [params['n']]}
+
+    submitting, other = JobManager(workers=1, store=JobStore(store_path)), JobManager(workers=1, store=JobStore(store_path))
+    submitting.register('examples', handler)
+    job = submitting.submit('examples', {'n': 3})
+
+    seen = other.get(job.id)
+    assert seen is not None and not seen.local
+    assert seen.status in (Job.QUEUED, Job.RUNNING)
+
+    events = other.events(seen, heartbeat=0.2)
+    release.set()
+    stream = ''.join(events)
+    assert 'event: done' in stream and '"examples": [3]' in stream
+
+    finished = other.get(job.id)
+    assert finished.status == Job.SUCCEEDED
+    assert finished.result == {'examples': [3]}
+    assert other.stats()['counts']['store_errors'] == 0
+
+
+def test_expired_job_is_gone_from_the_store(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    manager = JobManager(workers=1, result_ttl=0, store=store)
+    manager.register('examples', lambda params, progress: [])
+    job = manager.submit('examples')
+    assert manager.wait(job, 5)
+
+    assert store.load(job.id) is None
+    assert JobManager(store=store).get(job.id) is None
+
+
+def test_unwritable_store_keeps_jobs_in_process(tmp_path):
+    blocker = tmp_path / 'not-a-dir'
+    blocker.write_text('')
+    manager = JobManager(workers=1, store=JobStore(str(blocker / 'jobs.db')))
+    manager.register('examples', lambda params, progress: ['ok'])
+    job = manager.submit('examples')
+
+    assert manager.wait(job, 5) and manager.get(job.id).result == ['ok']
@@ -0,0 +1,23 @@
+from phone_reputation import PhoneReputation
+
+
+class CompactingDelta(dict):
+    """A delta that lets compact() run between a membership test and the read, as another thread could"""
+
+    def __init__(self, entries, reputation):
+        super().__init__(entries)
+        self.reputation = reputation
+
+    def __contains__(self, key):
+        found = super().__contains__(key)
+        self.reputation.compact()
+        return found
+
+
+def test_lookup_survives_a_concurrent_compaction(tmp_path):
+    reputation = PhoneReputation(snapshot_path=str(tmp_path / 'phones.snap'), builtin_prefixes={})
+    assert reputation.add('+1 555 010 9999', 'irs-scam')
+    reputation._delta = CompactingDelta(reputation._delta, reputation)
+
+    assert reputation.lookup('+1 555 010 9999') == ('+15550109999', 'irs-scam')
+    assert reputation.lookup('+1 555 010 9999') == ('+15550109999', 'irs-scam')  # now from the compacted index
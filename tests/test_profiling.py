@@ -0,0 +1,36 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
+
+
+def test_spans_from_worker_threads_nest_under_their_own_parents():
+    profile = profiling.Profile('0' * 32, 'POST /api/analyze/image', 'header')
+    token = profiling._current.set(profile)
+    both_open = threading.Barrier(2)
+
+    def tile(name):
+        with profiling.span(name):
+            both_open.wait(5)  # the other thread's tile span is open too
+            with profiling.span('detect_text'):
+                pass
+            both_open.wait(5)
+
+    try:
+        with profiling.span('rekognition'):
+            with ThreadPoolExecutor(2) as pool:
+                futures = [pool.submit(contextvars.copy_context().run, tile, f'tile-{i}') for i in range(2)]
+                for future in futures:
+                    future.result()
+        with profiling.span('score'):
+            pass
+    finally:
+        profiling._current.reset(token)
+        profile.finish()
+
+    tree = profile.to_dict()['spans']
+    assert [child['name'] for child in tree['children']] == ['rekognition', 'score']
+    tiles = tree['children'][0]['children']
+    assert sorted(t['name'] for t in tiles) == ['tile-0', 'tile-1']
+    assert all([child['name'] for child in t['children']] == ['detect_text'] for t in tiles)
@@ -0,0 +1,27 @@
+import quota
+import response_cache
+from rate_limit import Admission
+
+
+def test_cached_examples_are_not_charged_to_upstream_quota(app_client, monkeypatch):
+    charged = []
+
+    def admit_request(budget, *args):
+        charged.append(budget)
+        return Admission('ok', budget, 10, 9, 0)
+
+    monkeypatch.setattr(quota, 'admit_request', admit_request)
+    response_cache.response_cache.clear()
+
+    for _ in range(5):
+        assert app_client.get('/api/examples?lang=en&count=3').status_code == 200
+
+    assert charged == ['upstream']
+
+
+def test_over_quota_miss_is_refused_and_not_cached(app_client, monkeypatch):
+    monkeypatch.setattr(quota, 'admit_request', lambda budget, *args: Admission('rejected', budget, 10, 0, 5))
+    response_cache.response_cache.clear()
+
+    assert app_client.get('/api/examples?lang=en&count=3').status_code == 429
+    assert response_cache.response_cache.stats()['entries'] == 0
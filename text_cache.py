@@ -0,0 +1,189 @@
+"""
+Near-duplicate cache of LLM text verdicts.
+
+Scam campaigns reuse one script with small edits (names, amounts, links),
+so an exact-match cache misses most repeats. Each text is normalized
+(lower-cased, with URLs, e-mail addresses and numbers replaced by
+placeholders) and reduced to a 64-bit SimHash over its words and word
+pairs. Texts whose hashes are within TEXT_CACHE_MAX_DISTANCE bits reuse the
+stored verdict. Lookups go through a HammingIndex, whose per-chunk tables
+are the LSH bands: only hashes sharing a band (to within a bit or two) are
+compared.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from hamming_index import HammingIndex
+
+TEXT_CACHE_ENABLED = os.getenv('TEXT_CACHE', 'true').lower() in ('1', 'true', 'yes')
+TEXT_CACHE_SIZE = int(os.getenv('TEXT_CACHE_SIZE', 20000))
+TEXT_CACHE_MAX_DISTANCE = int(os.getenv('TEXT_CACHE_MAX_DISTANCE', 7))
+TEXT_CACHE_TTL_SECONDS = float(os.getenv('TEXT_CACHE_TTL_SECONDS', 86400))
+# Texts with fewer words than this are too short for a stable SimHash:
+# "call me" and "text me" would land a few bits apart.
+TEXT_CACHE_MIN_WORDS = int(os.getenv('TEXT_CACHE_MIN_WORDS', 8))
+
+HASH_BITS = 64
+
+# A ., @, / or : between two word characters marks a link, e-mail address,
+# time or decimal; the whole whitespace-delimited token is replaced.
+LINK_MARK_RE = re.compile(r'(?<=\w)[.@/:](?=\w)')
+WHITESPACE_RE = re.compile(r'\s')
+LETTER_RE = re.compile(r'[a-z]')
+# Group 1 is a plain word; tokens with digits (amounts, reference codes) match with an empty group
+TOKEN_RE = re.compile(r'([a-z]+)(?![a-z0-9])|[a-z0-9]+(?:,[0-9]+)*')
+
+
+def _mask_links(text):
+    pieces = []
+    pos = 0
+    for match in LINK_MARK_RE.finditer(text):
+        start = match.start()
+        if start < pos:
+            continue
+        while start > pos and not text[start - 1].isspace():
+            start -= 1
+        end = WHITESPACE_RE.search(text, match.end())
+        end = end.start() if end else len(text)
+        token = text[start:end]
+        if '@' in token:
+            placeholder = ' emailaddr '
+        elif LETTER_RE.search(token):
+            placeholder = ' urlplaceholder '
+        else:
+            placeholder = ' num '
+        pieces.append(text[pos:start])
+        pieces.append(placeholder)
+        pos = end
+    pieces.append(text[pos:])
+    return ''.join(pieces)
+
+
+def normalize_text(text):
+    """Lower-cased words with links, e-mail addresses and numbers replaced by placeholders"""
+    return [word or 'num' for word in TOKEN_RE.findall(_mask_links(text.lower()))]
+
+
+def _mix(x):
+    """splitmix64 finalizer over a uint64 array (wrapping multiplies)"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xbf58476d1ce4e5b9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94d049bb133111eb)
+    return x ^ (x >> np.uint64(31))
+
+
+def _feature_hashes(words):
+    """uint64 hashes of every word and adjacent word pair.
+
+    Only distinct words go through blake2b; pair hashes are mixed from the
+    two word hashes in numpy, so long texts cost little more than their
+    vocabulary.
+    """
+    ids = {}
+    positions = np.fromiter((ids.setdefault(word, len(ids)) for word in words), dtype=np.intp, count=len(words))
+    vocabulary = np.frombuffer(b''.join(hashlib.blake2b(word.encode(), digest_size=8).digest() for word in ids),
+                               dtype=np.uint64)
+    word_hashes = vocabulary[positions]
+    pair_hashes = _mix(word_hashes[:-1] * np.uint64(0x9e3779b97f4a7c15) ^ word_hashes[1:])
+    return np.concatenate((word_hashes, pair_hashes))
+
+
+def simhash(text, min_words=TEXT_CACHE_MIN_WORDS):
+    """64-bit SimHash of the normalized text's words and word pairs, or None if it is too short"""
+    words = normalize_text(text)
+    if len(words) < min_words:
+        return None
+    features = _feature_hashes(words)
+    bits = np.unpackbits(features.view(np.uint8).reshape(-1, 8), axis=1)
+    # Each feature votes +1/-1 per bit; the hash keeps the sign of the total
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(features)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), 'big')
+
+
+class TextResultCache:
+    """Bounded LRU of text verdicts keyed by SimHash.
+
+    lookup() returns the result stored for the nearest hash within
+    max_distance bits that is younger than ttl seconds. Entries live in
+    memory only; each worker process has its own cache.
+    """
+
+    def __init__(self, capacity=TEXT_CACHE_SIZE, max_distance=TEXT_CACHE_MAX_DISTANCE,
+                 ttl=TEXT_CACHE_TTL_SECONDS, enabled=TEXT_CACHE_ENABLED):
+        self.capacity = capacity
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # hash -> (result, stored_at), least recently used first
+        self._index = HammingIndex(bits=HASH_BITS)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.too_short = 0
+
+    def lookup(self, text_hash):
+        """Cached result for a near-duplicate text, or None"""
+        if not self.enabled:
+            return None
+        if text_hash is None:
+            with self._lock:
+                self.too_short += 1
+            return None
+        now = time.time()
+        with self._lock:
+            for distance, key in self._index.search(text_hash, self.max_distance):
+                result, stored_at = self._entries[key]
+                if now - stored_at > self.ttl:
+                    self._remove(key)
+                    self.expired += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                break
+            else:
+                self.misses += 1
+                return None
+        return dict(result, cache={'hit': True, 'distance': distance,
+                                   'cached_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(stored_at))})
+
+    def store(self, text_hash, result):
+        if not self.enabled or text_hash is None:
+            return
+        with self._lock:
+            self._entries[text_hash] = (result, time.time())
+            self._entries.move_to_end(text_hash)
+            self._index.add(text_hash, text_hash)
+            while len(self._entries) > self.capacity:
+                old_hash = next(iter(self._entries))
+                self._remove(old_hash)
+                self.evictions += 1
+
+    def _remove(self, text_hash):
+        del self._entries[text_hash]
+        self._index.remove(text_hash)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'capacity': self.capacity,
+                'max_distance': self.max_distance,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expired': self.expired,
+                'skipped_too_short': self.too_short
+            }